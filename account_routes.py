@@ -3,6 +3,8 @@ from flask import Blueprint, render_template, request, redirect, url_for, flash,
 from flask_login import login_user, logout_user, login_required, current_user
 from models import db, User, VolunteerEntry
 from utils  import role_required
+import reportcache
+import usercache
 
 account_bp = Blueprint(
     'account',
@@ -18,7 +20,9 @@ def profile():
         current_user.full_name = request.form['full_name']
         current_user.email     = request.form['email']
         # … any other fields …
+        reportcache.bump()   # reports show volunteers' names
         db.session.commit()
+        usercache.invalidate(current_user.id)
         flash('Profile updated', 'success')
         return redirect(url_for('account.profile'))
 
@@ -38,6 +42,7 @@ def change_password():
         else:
             current_user.set_password(new_pw)
             db.session.commit()
+            usercache.invalidate(current_user.id)
             flash('Password changed successfully', 'success')
             return redirect(url_for('account.profile'))
     return render_template('change_password.html')
@@ -1,8 +1,17 @@
 # admin_routes.py
-from flask import Blueprint, render_template, request, redirect, url_for, flash, abort
+import re
+
+from flask import (Blueprint, render_template, request, redirect, url_for, flash, abort,
+                   current_app, send_from_directory)
 from flask_login import login_required, current_user
 from models import db, User, VolunteerEntry
 from utils  import role_required
+from reports import with_user
+from pagination import date_arg, page_size_arg
+import fulltext
+import reportcache
+import rollups
+import usercache
 
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
@@ -12,10 +21,29 @@ admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 @role_required('admin')
 def list_entries():
     """
-    List **all** volunteer entries for admins to edit or delete.
+    List **all** volunteer entries for admins to edit or delete,
+    one keyset page at a time, optionally filtered or searched (``q``).
     """
-    entries = VolunteerEntry.query.order_by(VolunteerEntry.date.desc()).all()
-    return render_template('admin_entries.html', entries=entries)
+    filters = {
+        'user_id':    request.args.get('user_id', type=int),
+        'event':      (request.args.get('event') or '').strip() or None,
+        'start_date': date_arg(request.args, 'start_date'),
+        'end_date':   date_arg(request.args, 'end_date'),
+    }
+    per_page = page_size_arg(request.args)
+    search = (request.args.get('q') or '').strip()
+    page = fulltext.paginate(with_user(VolunteerEntry.query), search, filters,
+                             after=request.args.get('after'),
+                             before=request.args.get('before'),
+                             per_page=per_page)
+    users = User.query.order_by(User.full_name).all()
+    return render_template('admin_entries.html',
+                           page=page,
+                           entries=page.entries,
+                           users=users,
+                           filters=filters,
+                           search=search,
+                           per_page=per_page)
 
 @admin_bp.route('/')
 @login_required
@@ -46,7 +74,9 @@ def edit_user(user_id):
         if new_pw:
             user.set_password(new_pw)
             flash('Password was reset', 'info')
+        reportcache.bump()   # reports show volunteers' names
         db.session.commit()
+        usercache.invalidate(user.id)
         flash('User updated successfully', 'success')
         return redirect(url_for('admin.list_users'))
 
@@ -60,9 +90,24 @@ def edit_user(user_id):
 @role_required('admin')
 def delete_user(user_id):
     user = User.query.get_or_404(user_id)
-    # Delete their entries first (or configure cascade)
+    # Delete their entries first (or configure cascade), and their rollup rows
+    rollups.retract_user(user.id)
     VolunteerEntry.query.filter_by(user_id=user.id).delete()
     db.session.delete(user)
+    reportcache.bump()
     db.session.commit()
+    usercache.invalidate(user_id)
     flash(f'User {user.username} deleted', 'warning')
     return redirect(url_for('admin.list_users'))
+
+
+@admin_bp.route('/profiles/<name>')
+@login_required
+@role_required('admin')
+def profile_file(name):
+    """Download a capture from profiling.py: ``<id>.pstats`` or its ``<id>.txt`` summary."""
+    if not re.fullmatch(r'[\w-]+\.(pstats|txt)', name):
+        abort(404)
+    return send_from_directory(current_app.config['PROFILE_DIR'], name,
+                               mimetype='text/plain' if name.endswith('.txt') else None,
+                               as_attachment=name.endswith('.pstats'))
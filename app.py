@@ -1,70 +1,129 @@
 # --- Standard library ---
 import os
+import re
+import secrets
+import time
+import uuid
 from datetime import datetime
 from pathlib import Path
-import io
 
 # --- Third-party ---
-import pandas as pd
 import click
 from dotenv import load_dotenv
-from flask import Flask, render_template, request, redirect, url_for, flash, abort, send_file, current_app
+from flask import (Flask, Response, render_template, request, redirect, url_for, flash, abort,
+                   send_from_directory, current_app, jsonify)
+from flask.cli import AppGroup
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
-from flask_mail import Mail, Message
+from flask_mail import Mail
+from sqlalchemy import insert, inspect
 
 # --- Local ---
 from models import db, User, VolunteerEntry
 from forms import BulkHoursForm
-from utils import ROLE_LEVEL, role_required
+from utils import ROLE_LEVEL, role_required, parse_date, parse_time, hours_between, format_time
+from reports import event_totals, volunteer_totals
+import dbtuning
+import events
+import fulltext
+import importer
+import mailqueue
+import metrics
+import migrations
+import profiling
+import querydebug
+import reportcache
+import rollups
+import usercache
+from pagination import date_arg, page_size_arg
+from account_routes import account_bp
+from admin_routes import admin_bp
 
 # Load .env
 load_dotenv()
 
 # forgot password
-from flask_mail import Mail
-
-mail = Mail()  # create the extension object first
-
-app = Flask(__name__)
-
-# ✅ LOAD CONFIG HERE (your existing environment switch)
-if os.environ.get("RENDER") == "true" or os.environ.get("ON_RENDER") == "true":
-    app.config.from_object("config.ProductionConfig")
-elif os.environ.get("FLASK_ENV") == "development":
-    app.config.from_object("config.DevelopmentConfig")
-elif os.environ.get("FLASK_ENV") == "testing":
-    app.config.from_object("config.TestingConfig")
-else:
-    app.config.from_object("config.DevelopmentConfig")
-
-# now that app.config is populated, init mail
-mail.init_app(app)
-
-
-# Init DB
-db.init_app(app)
+mail = Mail()  # create the extension objects first; create_app() binds them
 
 # Login manager
-login_manager = LoginManager(app)
+login_manager = LoginManager()
 login_manager.login_view = 'login'
 
-# Expose roles to Jinja
-app.jinja_env.globals.update(ROLE_LEVEL=ROLE_LEVEL)
+# Routes and CLI commands below are collected here, then added to each app
+# create_app() builds
+ROUTES = []
+commands = AppGroup('commands')
+
+
+def route(rule, **options):
+    """``@app.route`` for the app(s) :func:`create_app` builds later."""
+    def decorator(view):
+        ROUTES.append((rule, view, options))
+        return view
+    return decorator
+
+
+def config_from_env():
+    """The config class for this environment (your existing environment switch)."""
+    if os.environ.get("RENDER") == "true" or os.environ.get("ON_RENDER") == "true":
+        return "config.ProductionConfig"
+    elif os.environ.get("FLASK_ENV") == "development":
+        return "config.DevelopmentConfig"
+    elif os.environ.get("FLASK_ENV") == "testing":
+        return "config.TestingConfig"
+    return "config.DevelopmentConfig"
+
+
+def create_app(config=None):
+    """
+    Build the app. ``config`` is a config class or its import path; by
+    default it is picked from the environment by :func:`config_from_env`.
+    """
+    app = Flask(__name__)
+    app.config.from_object(config or config_from_env())
+
+    mail.init_app(app)
+    db.init_app(app)
+
+    # SQLite pragmas on each connection, and a fresh pool in forked workers
+    with app.app_context():
+        dbtuning.configure(db.engine, app.config['SQLITE_PRAGMAS'])
+
+    login_manager.init_app(app)
+    metrics.init_app(app)
+    querydebug.init_app(app)
+    profiling.init_app(app)
+
+    # Expose roles to Jinja
+    app.jinja_env.globals.update(ROLE_LEVEL=ROLE_LEVEL)
+    app.jinja_env.filters['hhmm'] = format_time
+
+    app.register_blueprint(account_bp)
+    app.register_blueprint(admin_bp)
+    for rule, view, options in ROUTES:
+        app.add_url_rule(rule, view_func=view, **options)
+    for command in commands.commands.values():
+        app.cli.add_command(command)
+    return app
+
+
+def __getattr__(name):
+    # `from app import app`, `gunicorn app:app` and `flask run` get an app
+    # built from the environment, on first use
+    if name == 'app':
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
 
 # User loader
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    return usercache.load_user(int(user_id))
 
-# ——— Now and only now import & register blueprints ———
-from account_routes import account_bp
-app.register_blueprint(account_bp)
-
-from admin_routes import admin_bp
-app.register_blueprint(admin_bp)
 
 # ——— CLI command to init-db & seed Admin ———
-@app.cli.command('init-db')
+@commands.command('init-db')
 def init_db():
     """Create tables & seed default Admin."""
     db.create_all()
@@ -91,8 +150,175 @@ def init_db():
         click.echo(f'Admin user "{admin_username}" already exists.')
 
 
+@commands.command('upgrade-db')
+@click.option('--batch-size', default=1000, show_default=True,
+              help='Rows rewritten per transaction.')
+@click.option('--pause', default=0.05, show_default=True,
+              help='Seconds to sleep between batches so other writers get the lock.')
+def upgrade_db(batch_size, pause):
+    """Upgrade an existing database in place (typed dates/times, indexes)."""
+    if db.engine.dialect.name != 'sqlite':
+        raise click.ClickException('upgrade-db only knows how to upgrade SQLite databases.')
+
+    db.create_all()  # any tables added since the database was created
+    for name in migrations.add_missing_columns():
+        click.echo(f'Added column {name}.')
+    stats = migrations.convert_entry_types(batch_size=batch_size, pause=pause,
+                                           echo=click.echo)
+    click.echo(f"Converted dates/times: {stats['scanned']} rows scanned, "
+               f"{stats['updated']} rewritten, {stats['cleared']} unparseable.")
+    for name in migrations.create_missing_indexes():
+        click.echo(f'Created index {name}.')
+    if fulltext.install():
+        click.echo('Built the full-text search index.')
+    click.echo(f'Rebuilt hours rollup ({rollups.rebuild()} rows).')
+    click.echo('Database is up to date.')
+
+
+@commands.command('import-hours')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--errors', 'errors_path', type=click.Path(dir_okay=False),
+              help='Where to write rows that could not be imported '
+                   '[default: <file>.errors.csv].')
+@click.option('--chunk-size', default=importer.CHUNK_SIZE, show_default=True,
+              help='Rows inserted per transaction.')
+def import_hours_command(path, errors_path, chunk_size):
+    """Import volunteer hours from a CSV or XLSX sign-in sheet."""
+    _import(path, errors_path, chunk_size)
+
+
+@commands.command('import-legacy-csv')
+@click.argument('path', required=False, type=click.Path(dir_okay=False))
+@click.option('--errors', 'errors_path', type=click.Path(dir_okay=False),
+              help='Where to write rows that could not be imported '
+                   '[default: <file>.errors.csv].')
+@click.option('--chunk-size', default=importer.CHUNK_SIZE, show_default=True,
+              help='Rows inserted per transaction.')
+def import_legacy_csv(path, errors_path, chunk_size):
+    """Import the offline volunteer_hours.csv tracker; safe to re-run."""
+    path = path or str(current_app.config['LEGACY_CSV'])
+    if not os.path.exists(path):
+        raise click.ClickException(f'No such file: {path}')
+    if 'source_hash' not in {c['name'] for c in inspect(db.engine).get_columns('volunteer_entry')}:
+        raise click.ClickException('Run "flask upgrade-db" first.')
+    _import(path, errors_path, chunk_size, dedupe=True)
+
+
+def _import(path, errors_path, chunk_size, dedupe=False):
+    errors_path = errors_path or f'{path}.errors.csv'
+    try:
+        with open(path, 'rb') as stream, open(errors_path, 'w', newline='') as error_out:
+            stats = importer.import_file(stream, path, error_out, chunk_size=chunk_size,
+                                         dedupe=dedupe)
+    except ValueError as exc:
+        raise click.ClickException(str(exc))
+    click.echo(f"Imported {stats['imported']} entries.")
+    if stats['duplicates']:
+        click.echo(f"Skipped {stats['duplicates']} rows imported before.")
+    if stats['errors']:
+        click.echo(f"{stats['errors']} rows could not be imported; see {errors_path}.")
+    else:
+        os.remove(errors_path)
+
+
+@commands.command('rebuild-rollups')
+@click.option('--verify', 'verify_only', is_flag=True,
+              help='Only compare the rollup with the entries; change nothing.')
+def rebuild_rollups(verify_only):
+    """Backfill the hours rollup from volunteer entries, or check it."""
+    if verify_only:
+        mismatches = rollups.verify()
+        for key, expected, actual in mismatches[:50]:
+            click.echo(f'  {key}: expected {expected}, found {actual}')
+        if mismatches:
+            raise click.ClickException(f'{len(mismatches)} rollup rows out of step.')
+        click.echo('Hours rollup matches volunteer entries.')
+        return
+    click.echo(f'Rebuilt hours rollup ({rollups.rebuild()} rows).')
+
+
+@commands.command('backfill-events')
+@click.option('--merge', 'merges', multiple=True, metavar='ALIAS=EVENT',
+              help='Count entries typed as ALIAS as EVENT from now on; repeatable.')
+@click.option('--batch-size', default=1000, show_default=True,
+              help='Entries rewritten per transaction.')
+@click.option('--pause', default=0.05, show_default=True,
+              help='Seconds to sleep between batches so other writers get the lock.')
+def backfill_events(merges, batch_size, pause):
+    """Link entries to events, merging spellings of the same event."""
+    pairs = []
+    for merge in merges:
+        alias, sep, target = merge.partition('=')
+        if not (sep and alias.strip() and target.strip()):
+            raise click.ClickException(f'--merge wants ALIAS=EVENT, not {merge!r}')
+        pairs.append((alias, target))
+    if 'event_id' not in {c['name'] for c in inspect(db.engine).get_columns('volunteer_entry')}:
+        raise click.ClickException('Run "flask upgrade-db" first.')
+    stats = events.backfill(pairs, batch_size=batch_size, pause=pause, echo=click.echo)
+    click.echo(f"Created {stats['events']} events, merged {stats['merged']}, "
+               f"updated {stats['updated']} entries.")
+
+
+@commands.command('rebuild-search')
+def rebuild_search():
+    """Rebuild the full-text search index over entries' event and notes."""
+    if db.engine.dialect.name != 'sqlite':
+        raise click.ClickException('Full-text search needs SQLite with FTS5.')
+    started = time.perf_counter()
+    if not fulltext.install():
+        fulltext.rebuild()
+    click.echo(f'Rebuilt the full-text search index in {time.perf_counter() - started:.1f}s.')
+
+
+@commands.command('mail-worker')
+@click.option('--workers', default=2, show_default=True, help='Sending threads.')
+@click.option('--once', is_flag=True, help='Send whatever is due now, then exit.')
+def mail_worker(workers, once):
+    """Send queued outbound mail."""
+    if once:
+        stats = mailqueue.drain()
+        click.echo(f"Sent {stats['sent']}, will retry {stats['retry']}, "
+                   f"gave up on {stats['dead']}.")
+        return
+    pool = mailqueue.start_workers(current_app._get_current_object(), workers)
+    click.echo(f'Sending queued mail with {workers} workers; Ctrl+C to stop.')
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pool.stop(timeout=30)
+
+
+@commands.command('seed-bench')
+@click.option('--users', default=200, show_default=True, help='Volunteers to add.')
+@click.option('--entries', default=10_000, show_default=True, help='Hours entries to add.')
+@click.option('--password', help='Password for every added volunteer [default: random].')
+@click.option('--seed', 'random_seed', default=0, show_default=True,
+              help='Random seed; the same seed gives the same data.')
+@click.option('--force', is_flag=True,
+              help='Seed even a database with real hours outside development.')
+def seed_bench(users, entries, password, random_seed, force):
+    """Fill the database with synthetic volunteers and hours for benchmarks."""
+    import seeding
+
+    db.create_all()
+    # Synthetic hours would land in real reports, next to an admin account
+    # anyone with the printed password can use
+    if not (current_app.debug or current_app.testing or force) and \
+            VolunteerEntry.query.first() is not None:
+        raise click.ClickException(
+            'This database already has volunteer hours and is not a development or test '
+            'database. Point DATABASE_URL at a scratch database, or pass --force.')
+    password = password or secrets.token_urlsafe(12)
+    started = time.perf_counter()
+    first_id = seeding.seed(users, entries, password=password, random_seed=random_seed)
+    click.echo(f'Added {users} volunteers and {entries} entries in '
+               f'{time.perf_counter() - started:.1f}s. Log in as bench{first_id} '
+               f'(admin) with password {password!r}.')
+
+
 # Authentication routes
-@app.route('/register', methods=['GET','POST'])
+@route('/register', methods=['GET','POST'])
 def register():
     if request.method == 'POST':
         full_name = request.form['full_name']
@@ -121,7 +347,7 @@ def register():
         return redirect(url_for('login'))
     return render_template('register.html')
 
-@app.route('/login', methods=['GET', 'POST'])
+@route('/login', methods=['GET', 'POST'])
 def login():
     if request.method == 'POST':
         user = User.query.filter_by(username=request.form['username']).first()
@@ -131,7 +357,7 @@ def login():
         flash('Invalid username or password', 'danger')
     return render_template('login.html')
 
-@app.route('/forgot-password', methods=['GET', 'POST'])
+@route('/forgot-password', methods=['GET', 'POST'])
 def forgot_password():
     if request.method == 'POST':
         email = (request.form.get('email') or '').strip().lower()
@@ -145,7 +371,8 @@ def forgot_password():
                 try:
                     token = user.get_reset_token()  # uses your models.py helper
                     reset_url = url_for('reset_password', token=token, _external=True)
-                    msg = Message(
+                    # Only queued here; a mail worker does the SMTP round trip
+                    mailqueue.enqueue(
                         subject="Reset your Kiwanis Volunteer password",
                         recipients=[email],
                         body=(
@@ -154,18 +381,17 @@ def forgot_password():
                             "If you didn’t request this, you can ignore this email."
                         ),
                     )
-                    mail.send(msg)
                     current_app.logger.info("[FP] Reset email queued for %s", email)
                 except Exception:
                     # Don’t leak details to user; log it for you
-                    current_app.logger.exception("[FP] Error while sending reset email")
+                    current_app.logger.exception("[FP] Error while queueing reset email")
         # PRG pattern so POST returns 302 in your logs
         return redirect(url_for('forgot_password'))
 
     # GET
     return render_template('forgot_password.html')
 
-@app.route('/reset-password/<token>', methods=['GET', 'POST'])
+@route('/reset-password/<token>', methods=['GET', 'POST'])
 def reset_password(token):
     user = User.verify_reset_token(token)  # your models.py helper (default 30 min)
     if not user:
@@ -179,13 +405,14 @@ def reset_password(token):
             return redirect(url_for('reset_password', token=token))
         user.set_password(pw)   # uses Werkzeug hashing via your models.py
         db.session.commit()
+        usercache.invalidate(user.id)
         flash('Your password has been reset! Please log in.', 'success')
         return redirect(url_for('login'))
 
     return render_template('reset_password.html', token=token)
 
 
-@app.route('/logout')
+@route('/logout')
 @login_required
 def logout():
     logout_user()
@@ -193,56 +420,76 @@ def logout():
     return redirect(url_for('login'))
 
 # Volunteer hours routes
-@app.route('/')
+@route('/')
 @login_required
 def index():
-    entries = VolunteerEntry.query.filter_by(user_id=current_user.id).order_by(
-        VolunteerEntry.date.desc()
-    ).all()
-    return render_template('index.html', entries=entries)
-
-@app.route('/log', methods=['GET', 'POST'])
+    filters = {
+        'event':      (request.args.get('event') or '').strip() or None,
+        'start_date': date_arg(request.args, 'start_date'),
+        'end_date':   date_arg(request.args, 'end_date'),
+    }
+    per_page = page_size_arg(request.args)
+    search = (request.args.get('q') or '').strip()
+    page = fulltext.paginate(VolunteerEntry.query, search,
+                             dict(filters, user_id=current_user.id),
+                             after=request.args.get('after'),
+                             before=request.args.get('before'),
+                             per_page=per_page)
+    return render_template('index.html',
+                           page=page,
+                           entries=page.entries,
+                           filters=filters,
+                           search=search,
+                           per_page=per_page)
+
+@route('/log', methods=['GET', 'POST'])
 @login_required
 def log():
     if request.method == 'POST':
         event = request.form['event']
-        date  = request.form.get('date') or datetime.today().strftime('%Y-%m-%d')
-        start = request.form['start']
-        end   = request.form['end']
         notes = request.form['notes']
         try:
-            start_dt = datetime.strptime(f"{date} {start}", "%Y-%m-%d %H:%M")
-            end_dt   = datetime.strptime(f"{date} {end}",   "%Y-%m-%d %H:%M")
-            total_h  = round((end_dt - start_dt).seconds / 3600, 2)
-        except Exception:
-            total_h = 0
+            date  = parse_date(request.form.get('date') or datetime.today().strftime('%Y-%m-%d'))
+            start = parse_time(request.form['start'])
+            end   = parse_time(request.form['end'])
+        except ValueError:
+            flash('Please enter a valid date and start/end times', 'danger')
+            return render_template('log.html')
+        event_id, event = events.intern(event)
         entry = VolunteerEntry(
             user_id=current_user.id,
             date=date,
             event=event,
+            event_id=event_id,
             start_time=start,
             end_time=end,
-            total_hours=total_h,
+            total_hours=hours_between(start, end),
             notes=notes
         )
         db.session.add(entry)
+        rollups.record(entry)
+        reportcache.bump()
         db.session.commit()
         return redirect(url_for('index'))
     return render_template('log.html')
 
-@app.route('/summary')
+@route('/events/suggest')
+@login_required
+def suggest_events():
+    """Event names for the event box's autocomplete: ``?q=<what was typed>``."""
+    return jsonify(events.suggest(request.args.get('q', '')))
+
+@route('/summary')
 @login_required
+@reportcache.conditional(per_user=True)
 def summary():
-    totals = {}
-    for e in VolunteerEntry.query.filter_by(user_id=current_user.id):
-        full = e.user.full_name
-        totals[full] = totals.get(full, 0) + e.total_hours
+    totals = volunteer_totals(user_id=current_user.id)
     return render_template('summary.html', totals=totals)
 
 from datetime import datetime
 from flask import abort
 
-@app.route('/entry/<int:id>/edit', methods=['GET', 'POST'])
+@route('/entry/<int:id>/edit', methods=['GET', 'POST'])
 @login_required
 def edit_entry(id):
     entry = VolunteerEntry.query.get_or_404(id)
@@ -250,19 +497,28 @@ def edit_entry(id):
         abort(403)
 
     if request.method == 'POST':
-        # Update from form
-        entry.date       = request.form.get('date', entry.date)
-        entry.event      = request.form.get('event', entry.event)
-        entry.start_time = request.form.get('start', entry.start_time)
-        entry.end_time   = request.form.get('end', entry.end_time)
-        entry.notes      = request.form.get('notes', entry.notes)
-        # Recompute hours
+        form = request.form
         try:
-            start_dt = datetime.strptime(f"{entry.date} {entry.start_time}", "%Y-%m-%d %H:%M")
-            end_dt   = datetime.strptime(f"{entry.date} {entry.end_time}",   "%Y-%m-%d %H:%M")
-            entry.total_hours = round((end_dt - start_dt).seconds / 3600, 2)
+            date  = parse_date(form['date'])  if 'date'  in form else entry.date
+            start = parse_time(form['start']) if 'start' in form else entry.start_time
+            end   = parse_time(form['end'])   if 'end'   in form else entry.end_time
         except ValueError:
-            pass
+            flash('Please enter a valid date and start/end times', 'danger')
+            return render_template('edit_entry.html', entry=entry)
+
+        # Update from form (moving the entry's hours between rollup buckets)
+        rollups.retract(entry)
+        entry.date       = date
+        if 'event' in form:
+            entry.event_id, entry.event = events.intern(form['event'])
+        entry.start_time = start
+        entry.end_time   = end
+        entry.notes      = form.get('notes', entry.notes)
+        # Recompute hours
+        if start and end:
+            entry.total_hours = hours_between(start, end)
+        rollups.record(entry)
+        reportcache.bump()
 
         db.session.commit()
         flash('Entry updated successfully', 'success')
@@ -273,7 +529,7 @@ def edit_entry(id):
     return render_template('edit_entry.html', entry=entry)
 
 
-@app.route('/entry/<int:id>/delete', methods=['POST'])
+@route('/entry/<int:id>/delete', methods=['POST'])
 @login_required
 def delete_entry(id):
     entry = VolunteerEntry.query.get_or_404(id)
@@ -281,7 +537,9 @@ def delete_entry(id):
     if entry.user_id != current_user.id and current_user.role != 'admin':
         abort(403)
 
+    rollups.retract(entry)
     db.session.delete(entry)
+    reportcache.bump()
     db.session.commit()
     flash('Entry deleted', 'warning')
 
@@ -293,15 +551,20 @@ def delete_entry(id):
 
 #Building Reports Tab
 
-@app.route('/report', methods=['GET', 'POST'])
+@route('/report', methods=['GET', 'POST'])
 @login_required
 @role_required('reporter')
+@reportcache.conditional('start_date', 'end_date', per_user=True)
 def report():
     totals = {}
-    start_date = request.form.get('start_date')
-    end_date   = request.form.get('end_date')
-
-    if request.method == 'POST':
+    # The form posts; a GET with the dates in the query string (a bookmark,
+    # a scraper) runs the same report and can be answered with a 304
+    values     = request.form if request.method == 'POST' else request.args
+    start_date = values.get('start_date')
+    end_date   = values.get('end_date')
+    submitted  = request.method == 'POST' or 'start_date' in request.args
+
+    if submitted:
         # Validate inputs
         try:
             # Dates in YYYY-MM-DD format
@@ -321,30 +584,95 @@ def report():
                                    start_date=start_date,
                                    end_date=end_date)
 
-        # Query entries in date range
-        # Since VolunteerEntry.date is stored as 'YYYY-MM-DD', string comparison works
-        entries = VolunteerEntry.query\
-            .filter(VolunteerEntry.date >= start_date)\
-            .filter(VolunteerEntry.date <= end_date)\
-            .all()
-
-        # Aggregate by full name
-        for e in entries:
-            full = e.user.full_name
-            totals[full] = totals.get(full, 0) + e.total_hours
+        # Aggregate by full name in SQL
+        totals = report_totals(start_dt, end_dt)
 
         if not totals:
             flash('No records found in that date range.', 'info')
 
     return render_template('report.html',
-                           totals=totals if request.method=='POST' else None,
+                           totals=totals if submitted else None,
                            start_date=start_date,
                            end_date=end_date)
     
+def report_totals(start_dt, end_dt):
+    """volunteer_totals for a date range, shared by /report and its totals export."""
+    return reportcache.cached_json('totals', start_dt.isoformat(), end_dt.isoformat(),
+                                   lambda: volunteer_totals(start_dt, end_dt))
+
+@route('/report/events')
+@login_required
+@role_required('reporter')
+@reportcache.conditional('start_date', 'end_date', per_user=True)
+def report_events():
+    """Hours, entries and volunteers per event, for an optional date range."""
+    start_dt = date_arg(request.args, 'start_date')
+    end_dt   = date_arg(request.args, 'end_date')
+    totals = reportcache.cached_json(
+        'events', start_dt.isoformat() if start_dt else '', end_dt.isoformat() if end_dt else '',
+        lambda: event_totals(start_dt, end_dt))
+    return render_template('report_events.html', totals=totals,
+                           start_date=start_dt, end_date=end_dt)
+
+# Query args a pivot report depends on; see pivot_spec()
+PIVOT_ARGS = ('rows', 'columns', 'granularity', 'measure', 'start_date', 'end_date')
+
+def pivot_spec(args):
+    """The pivot report asked for in ``args``: hours by volunteer and month by default."""
+    return {'rows':        args.get('rows', 'volunteer'),
+            'columns':     args.get('columns', 'date'),
+            'granularity': args.get('granularity', 'month'),
+            'measure':     args.get('measure', 'hours'),
+            'start_date':  date_arg(args, 'start_date'),
+            'end_date':    date_arg(args, 'end_date')}
+
+def pivot_kind(spec):
+    """The report cache kind for ``spec``, which must have passed pivot.check()."""
+    return 'pivot.' + '.'.join(spec[k] or '' for k in ('rows', 'columns', 'granularity', 'measure'))
+
+def pivot_table(spec):
+    """pivot.pivot for ``spec``, cached like the other reports; ValueError if it can't be run."""
+    import pivot  # pandas is only loaded by the first pivot report
+
+    pivot.check(spec['rows'], spec['columns'], spec['granularity'], spec['measure'])
+    start_dt, end_dt = spec['start_date'], spec['end_date']
+    return reportcache.cached_json(
+        pivot_kind(spec), start_dt.isoformat() if start_dt else '',
+        end_dt.isoformat() if end_dt else '', lambda: pivot.pivot(**spec))
+
+@route('/report/pivot')
+@login_required
+@role_required('reporter')
+@reportcache.conditional(*PIVOT_ARGS, per_user=True)
+def report_pivot():
+    """Hours, entries or volunteers by any two of volunteer, event, role and date."""
+    import pivot
+
+    spec = pivot_spec(request.args)
+    try:
+        table = pivot_table(spec)
+    except ValueError as e:
+        flash(str(e), 'danger')
+        table = None
+    return render_template('report_pivot.html', table=table, spec=spec,
+                           args=request.args.to_dict(), dimensions=pivot.DIMENSIONS,
+                           granularities=pivot.GRANULARITIES, measures=pivot.MEASURES)
+
+@route('/report/pivot.json')
+@login_required
+@role_required('reporter')
+@reportcache.conditional(*PIVOT_ARGS)
+def report_pivot_json():
+    """The pivot report as ``{"headers", "rows", "totals"}``."""
+    try:
+        return jsonify(pivot_table(pivot_spec(request.args)))
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+
 def is_reporter_or_admin():
     return current_user.role in ['reporter', 'admin']
 
-@app.route('/bulk-add-hours', methods=['GET', 'POST'])
+@route('/bulk-add-hours', methods=['GET', 'POST'])
 @login_required
 def bulk_add_hours():
     if not is_reporter_or_admin():
@@ -352,188 +680,263 @@ def bulk_add_hours():
         return redirect(url_for('index'))
 
     form = BulkHoursForm()
-    form.volunteers.choices = [(u.id, u.full_name) for u in User.query.order_by(User.full_name).all()]
 
     if request.method == "POST":
         # Use request.form to get the data directly
         event = request.form['event']
-        date = request.form['date']
-        start_time = request.form['start_time']
-        end_time = request.form['end_time']
         notes = request.form.get('notes', '')
         volunteer_ids = request.form.getlist('volunteers')
 
         try:
-            start_dt = datetime.strptime(f"{date} {start_time}", "%Y-%m-%d %H:%M")
-            end_dt = datetime.strptime(f"{date} {end_time}", "%Y-%m-%d %H:%M")
-            total_hours = round((end_dt - start_dt).seconds / 3600, 2)
-        except Exception:
-            total_hours = 0
-
-        for volunteer_id in volunteer_ids:
-            user = User.query.get(int(volunteer_id))
-            entry = VolunteerEntry(
+            date = parse_date(request.form['date'])
+            start_time = parse_time(request.form['start_time'])
+            end_time = parse_time(request.form['end_time'])
+        except ValueError:
+            flash('Please enter a valid date and start/end times', 'danger')
+            return render_bulk_add_hours(form)
+        total_hours = hours_between(start_time, end_time)
+        event_id, event = events.intern(event)
+
+        # One IN query for every selected volunteer; anything else is reported
+        wanted = {int(v) for v in volunteer_ids if v.strip().isdigit()}
+        users = User.query.filter(User.id.in_(wanted)).all() if wanted else []
+        found = {u.id for u in users}
+        unknown = [v for v in volunteer_ids
+                   if not v.strip().isdigit() or int(v) not in found]
+
+        rows = [
+            dict(
                 user_id=user.id,
                 date=date,
                 name=user.full_name,
                 event=event,
+                event_id=event_id,
                 start_time=start_time,
                 end_time=end_time,
                 total_hours=total_hours,
                 notes=notes
             )
-            db.session.add(entry)
+            for user in users
+        ]
+        if rows:
+            db.session.execute(insert(VolunteerEntry), rows)
+            rollups.record_rows(rows)
+            reportcache.bump()
         db.session.commit()
-        flash('Bulk volunteer hours added!', 'success')
+
+        if unknown:
+            flash(f"Skipped unknown volunteer IDs: {', '.join(unknown)}", 'warning')
+        if rows:
+            flash('Bulk volunteer hours added!', 'success')
         return redirect(url_for('index'))
 
+    return render_bulk_add_hours(form)
+
+
+def render_bulk_add_hours(form):
+    form.volunteers.choices = [(u.id, u.full_name) for u in User.query.order_by(User.full_name).all()]
     return render_template('bulk_add_hours.html', form=form)
 
 
-@app.route('/report/export/xlsx')
+@route('/import-hours', methods=['GET', 'POST'])
 @login_required
 @role_required('reporter')
+def import_hours():
+    if request.method == 'POST':
+        upload = request.files.get('file')
+        if not upload or not upload.filename:
+            flash('Please choose a CSV or XLSX file to import', 'warning')
+            return redirect(url_for('import_hours'))
+
+        errors_dir = Path(current_app.config['IMPORT_ERRORS_DIR'])
+        errors_dir.mkdir(parents=True, exist_ok=True)
+        importer.prune_error_files(errors_dir)
+        token = uuid.uuid4().hex
+        error_path = errors_dir / f'{token}.csv'
+        try:
+            with open(error_path, 'w', newline='') as error_out:
+                stats = importer.import_file(upload.stream, upload.filename, error_out)
+        except ValueError as exc:
+            error_path.unlink(missing_ok=True)
+            flash(str(exc), 'danger')
+            return redirect(url_for('import_hours'))
+
+        flash(f"Imported {stats['imported']} entries.", 'success')
+        if not stats['errors']:
+            error_path.unlink(missing_ok=True)
+            return redirect(url_for('import_hours'))
+        return render_template('import_hours.html',
+                               errors=stats['errors'],
+                               error_token=token)
+
+    return render_template('import_hours.html')
+
+
+@route('/import-hours/errors/<token>.csv')
+@login_required
+@role_required('reporter')
+def import_hours_errors(token):
+    if not re.fullmatch(r'[0-9a-f]{32}', token):
+        abort(404)
+    return send_from_directory(current_app.config['IMPORT_ERRORS_DIR'], f'{token}.csv',
+                               mimetype='text/csv', as_attachment=True,
+                               download_name='import_errors.csv')
+
+
+@route('/report/export/xlsx')
+@login_required
+@role_required('reporter')
+@reportcache.conditional('start_date', 'end_date')
 def export_xlsx():
+    import exports  # export machinery is only loaded by the first export
+
     # Grab the same form values from query string
     start_date = request.args.get('start_date')
     end_date   = request.args.get('end_date')
 
     # Re‑validate dates
     try:
-        datetime.strptime(start_date, '%Y-%m-%d')
-        datetime.strptime(end_date,   '%Y-%m-%d')
-    except Exception:
+        start_dt = parse_date(start_date)
+        end_dt   = parse_date(end_date)
+    except ValueError:
         flash('Invalid date range for export', 'danger')
         return redirect(url_for('report'))
 
-    # Query entries in that range
-    entries = VolunteerEntry.query \
-        .filter(VolunteerEntry.date >= start_date) \
-        .filter(VolunteerEntry.date <= end_date) \
-        .all()
-
-    # Build DataFrame
-    data = []
-    for e in entries:
-        data.append({
-            'Full Name': e.user.full_name,
-            'Date':      e.date,
-            'Event':     e.event,
-            'Start':     e.start_time,
-            'End':       e.end_time,
-            'Hours':     e.total_hours,
-            'Notes':     e.notes
-        })
-    df = pd.DataFrame(data)
-
-    # Write to in-memory buffer
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False, sheet_name='Report')
-    output.seek(0)
-
+    # Stream entries in that range into the workbook (unless it's cached)
     filename = f'report_{start_date}_to_{end_date}.xlsx'
-    return send_file(
-        output,
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-        as_attachment=True,
-        download_name=filename
-    )
-
-@app.route('/report/export/xlsx_totals')
+    return exports.send_cached_xlsx('xlsx', start_dt, end_dt, 'Report', exports.ENTRY_HEADERS,
+                                    lambda: exports.entry_rows(start_dt, end_dt), filename)
+
+@route('/report/export/xlsx_totals')
 @login_required
 @role_required('reporter')
+@reportcache.conditional('start_date', 'end_date')
 def export_xlsx_totals():
+    import exports
+
     start_date = request.args.get('start_date')
     end_date   = request.args.get('end_date')
 
     # Validate dates
     try:
-        datetime.strptime(start_date, '%Y-%m-%d')
-        datetime.strptime(end_date,   '%Y-%m-%d')
-    except Exception:
+        start_dt = parse_date(start_date)
+        end_dt   = parse_date(end_date)
+    except ValueError:
         flash('Invalid date range for totals export', 'danger')
         return redirect(url_for('report'))
 
     # Aggregate total hours per volunteer
-    entries = (VolunteerEntry.query
-               .filter(VolunteerEntry.date >= start_date)
-               .filter(VolunteerEntry.date <= end_date)
-               .all())
-
-    totals = {}
-    for e in entries:
-        name = e.user.full_name
-        totals[name] = totals.get(name, 0) + e.total_hours
-
-    df = pd.DataFrame(
-        [{'Full Name': n, 'Total Hours': h} for n, h in totals.items()]
-    )
-
-    buf = io.BytesIO()
-    with pd.ExcelWriter(buf, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False, sheet_name='Totals')
-    buf.seek(0)
-
     filename = f'totals_{start_date}_to_{end_date}.xlsx'
-    return send_file(
-        buf,
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-        as_attachment=True,
-        download_name=filename
-    )
+    return exports.send_cached_xlsx('xlsx_totals', start_dt, end_dt, 'Totals',
+                                    exports.TOTAL_HEADERS,
+                                    lambda: report_totals(start_dt, end_dt).items(), filename)
 
 
-@app.route('/report/export/xlsx_events')
+@route('/report/export/xlsx_events')
 @login_required
 @role_required('reporter')
+@reportcache.conditional('start_date', 'end_date')
 def export_xlsx_events():
+    import exports
+
     start_date = request.args.get('start_date')
     end_date   = request.args.get('end_date')
 
     # Validate dates
     try:
-        datetime.strptime(start_date, '%Y-%m-%d')
-        datetime.strptime(end_date,   '%Y-%m-%d')
-    except Exception:
+        start_dt = parse_date(start_date)
+        end_dt   = parse_date(end_date)
+    except ValueError:
         flash('Invalid date range for events export', 'danger')
         return redirect(url_for('report'))
 
     # List every event worked
-    entries = (VolunteerEntry.query
-               .filter(VolunteerEntry.date >= start_date)
-               .filter(VolunteerEntry.date <= end_date)
-               .all())
-
-    data = []
-    for e in entries:
-        data.append({
-            'Full Name': e.user.full_name,
-            'Date':       e.date,
-            'Event':      e.event,
-            'Start':      e.start_time,
-            'End':        e.end_time,
-            'Hours':      e.total_hours,
-            'Notes':      e.notes or ''
-        })
-
-    df = pd.DataFrame(data)
-
-    buf = io.BytesIO()
-    with pd.ExcelWriter(buf, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False, sheet_name='Events')
-    buf.seek(0)
-
     filename = f'events_{start_date}_to_{end_date}.xlsx'
-    return send_file(
-        buf,
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-        as_attachment=True,
-        download_name=filename
-    )
+    return exports.send_cached_xlsx('xlsx_events', start_dt, end_dt, 'Events',
+                                    exports.ENTRY_HEADERS,
+                                    lambda: exports.entry_rows(start_dt, end_dt, blank_notes=''),
+                                    filename)
+
+
+@route('/report/export/xlsx_pivot')
+@login_required
+@role_required('reporter')
+@reportcache.conditional(*PIVOT_ARGS)
+def export_xlsx_pivot():
+    import exports
+
+    spec = pivot_spec(request.args)
+    try:
+        table = pivot_table(spec)
+    except ValueError as e:
+        flash(str(e), 'danger')
+        return redirect(url_for('report_pivot'))
+
+    # The pivot as shown, totals row last
+    by = '_and_'.join(filter(None, (spec['rows'], spec['columns'])))
+    filename = f"pivot_{spec['measure']}_by_{by}.xlsx"
+    return exports.send_cached_xlsx('xlsx_' + pivot_kind(spec), spec['start_date'],
+                                    spec['end_date'], 'Pivot', table['headers'],
+                                    lambda: table['rows'] + [table['totals']], filename)
+
+
+@route('/report/export/csv')
+@login_required
+@role_required('reporter')
+@reportcache.conditional('start_date', 'end_date')
+def export_csv():
+    import exports
+
+    start_date = request.args.get('start_date')
+    end_date   = request.args.get('end_date')
+
+    # Validate dates
+    try:
+        start_dt = parse_date(start_date)
+        end_dt   = parse_date(end_date)
+    except ValueError:
+        flash('Invalid date range for CSV export', 'danger')
+        return redirect(url_for('report'))
+
+    rows = exports.entry_rows(start_dt, end_dt, blank_notes='')
+    filename = f'events_{start_date}_to_{end_date}.csv'
+    return exports.stream_download(exports.csv_chunks(exports.ENTRY_HEADERS, rows),
+                                   'text/csv', filename)
+
+
+@route('/report/export/ndjson')
+@login_required
+@role_required('reporter')
+@reportcache.conditional('start_date', 'end_date')
+def export_ndjson():
+    import exports
+
+    start_date = request.args.get('start_date')
+    end_date   = request.args.get('end_date')
+
+    # Validate dates
+    try:
+        start_dt = parse_date(start_date)
+        end_dt   = parse_date(end_date)
+    except ValueError:
+        flash('Invalid date range for NDJSON export', 'danger')
+        return redirect(url_for('report'))
+
+    rows = exports.entry_rows(start_dt, end_dt, blank_notes='')
+    filename = f'events_{start_date}_to_{end_date}.ndjson'
+    return exports.stream_download(exports.ndjson_chunks(exports.ENTRY_HEADERS, rows),
+                                   'application/x-ndjson', filename)
+
+
+@route('/metrics')
+def serve_metrics():
+    """Prometheus scrape target, for admins (or this machine; see metrics.allowed)."""
+    if not metrics.allowed():
+        abort(403)
+    return Response(metrics.render(), mimetype=metrics.CONTENT_TYPE)
 
 
 # Run server
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
-    app.run(debug=True, host='0.0.0.0', port=port)
+    create_app().run(debug=True, host='0.0.0.0', port=port)
@@ -0,0 +1,79 @@
+"""
+Benchmark POST /bulk-add-hours for groups of 10, 100 and 1,000 volunteers.
+
+    python bench/bulk_add.py --sizes 10 100 1000
+
+Seeds a throwaway SQLite database with enough users, logs in as a reporter
+through the Flask test client and times the bulk submission along with the
+number of SQL statements it issues. Prints JSON.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+os.environ['FLASK_ENV'] = 'development'
+os.environ.setdefault('DATABASE_URL',
+                      f"sqlite:///{tempfile.mkdtemp(prefix='kiwanis-bench-')}/volunteer.db")
+
+from sqlalchemy import event  # noqa: E402
+from werkzeug.security import generate_password_hash  # noqa: E402
+
+from app import app  # noqa: E402
+from models import db, User  # noqa: E402
+
+
+def seed(users):
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        pw = generate_password_hash('bench', method='pbkdf2:sha256:1')
+        db.session.add_all(
+            User(full_name=f'Volunteer {i}', username=f'vol{i}',
+                 email=f'vol{i}@example.com',
+                 role='reporter' if i == 1 else 'volunteer', password_hash=pw)
+            for i in range(1, users + 1))
+        db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    seed(max(args.sizes))
+    client = app.test_client()
+    client.post('/login', data={'username': 'vol1', 'password': 'bench'})
+
+    statements = []
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute',
+                     lambda *a: statements.append(1))
+
+    results = {}
+    for size in args.sizes:
+        form = {'event': 'Service Day', 'date': '2024-06-01',
+                'start_time': '08:00', 'end_time': '12:00', 'notes': '',
+                'volunteers': [str(i) for i in range(1, size + 1)]}
+        times = []
+        for _ in range(args.repeat):
+            statements.clear()
+            t0 = time.perf_counter()
+            resp = client.post('/bulk-add-hours', data=form)
+            times.append(time.perf_counter() - t0)
+            assert resp.status_code == 302, resp.status_code
+        results[size] = {'median_ms': round(statistics.median(times) * 1000, 1),
+                         'statements': len(statements)}
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+"""
+Stress a file-backed SQLite database with concurrent readers and writers.
+
+    python bench/concurrency.py --workers 4 --seconds 10 --modes default tuned
+
+Each mode runs in a fresh interpreter with ProductionConfig. 'default' is
+SQLITE_TUNED=false (rollback journal, stock settings). 'tuned' is the WAL
+and busy_timeout set from dbtuning.py. The parent seeds the database, then
+forks ``--workers`` processes, as gunicorn's preload_app would.
+
+- Worker 0 is a reporter. It alternates bulk-adding hours for 100
+  volunteers with /report and /summary reads.
+- The others are volunteers mixing POST /log with GET / and /summary.
+
+Prints JSON per mode:
+
+- completed operations per second, reads and writes
+- failures (5xx, e.g. "database is locked")
+- p50/p95/p99 latency for each operation
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+MODES = {'default': 'false', 'tuned': 'true'}
+READS = {'index', 'summary', 'report'}
+EVENTS = ['Pancake Breakfast', 'Food Drive', 'Park Cleanup', 'Reading Buddies']
+
+
+def seed(app, db, users, entries):
+    from werkzeug.security import generate_password_hash
+
+    import reportcache
+    import rollups
+
+    with app.app_context():
+        db.create_all()
+        path = db.engine.url.database
+    conn = sqlite3.connect(path)
+    pw = generate_password_hash('bench', method='pbkdf2:sha256:1')
+    conn.executemany(
+        'INSERT INTO user (id, full_name, username, email, role, password_hash) '
+        'VALUES (?, ?, ?, ?, ?, ?)',
+        [(i, f'Volunteer {i}', f'vol{i}', f'vol{i}@example.com',
+          'reporter' if i == 1 else 'volunteer', pw) for i in range(1, users + 1)])
+    rng = random.Random(7)
+    conn.executemany(
+        'INSERT INTO volunteer_entry (user_id, date, event, start_time, end_time, '
+        'total_hours, notes) VALUES (?, ?, ?, ?, ?, ?, ?)',
+        ((rng.randint(1, users), f'2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}',
+          rng.choice(EVENTS), '08:00:00.000000', '10:30:00.000000', 2.5, '')
+         for _ in range(entries)))
+    conn.commit()
+    conn.close()
+    with app.app_context():
+        rollups.rebuild()
+
+
+def worker(number, deadline, results):
+    from app import app
+
+    rng = random.Random(number)
+    client = app.test_client()
+    client.post('/login', data={'username': f'vol{number + 1}', 'password': 'bench'})
+    bulk = {'event': 'Service Day', 'date': '2024-06-01', 'start_time': '08:00',
+            'end_time': '12:00', 'notes': '', 'volunteers': [str(i) for i in range(2, 102)]}
+    log = {'event': 'Food Drive', 'date': '2024-06-02', 'start': '09:00', 'end': '11:00',
+           'notes': ''}
+    if number == 0:
+        ops = [('bulk_add', lambda: client.post('/bulk-add-hours', data=bulk)),
+               ('report', lambda: client.get('/report?start_date=2024-01-01'
+                                             '&end_date=2024-12-31')),
+               ('summary', lambda: client.get('/summary'))]
+    else:
+        ops = [('log', lambda: client.post('/log', data=log)),
+               ('index', lambda: client.get('/')),
+               ('summary', lambda: client.get('/summary'))]
+
+    timings, failures = {}, {}
+    while time.time() < deadline:
+        name, call = rng.choice(ops)
+        t0 = time.perf_counter()
+        try:
+            ok = call().status_code < 500
+        except Exception:
+            ok = False
+        elapsed = time.perf_counter() - t0
+        if ok:
+            timings.setdefault(name, []).append(elapsed)
+        else:
+            failures[name] = failures.get(name, 0) + 1
+    results.put((timings, failures))
+
+
+def percentile(values, p):
+    return statistics.quantiles(values, n=100)[p - 1] if len(values) > 1 else values[0]
+
+
+def run_mode(args):
+    """Runs inside the per-mode interpreter; prints one JSON object."""
+    logging.disable(logging.CRITICAL)   # 500s would log a traceback each
+    from app import app, db
+
+    seed(app, db, args.users, args.entries)
+    ctx = multiprocessing.get_context('fork')
+    results = ctx.Queue()
+    deadline = time.time() + args.seconds
+    procs = [ctx.Process(target=worker, args=(n, deadline, results))
+             for n in range(args.workers)]
+    for p in procs:
+        p.start()
+    collected = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+
+    timings, failures = {}, {}
+    for t, f in collected:
+        for name, values in t.items():
+            timings.setdefault(name, []).extend(values)
+        for name, n in f.items():
+            failures[name] = failures.get(name, 0) + n
+    reads = sum(len(v) for k, v in timings.items() if k in READS)
+    writes = sum(len(v) for k, v in timings.items() if k not in READS)
+    with app.app_context():
+        journal = db.session.execute(db.text('PRAGMA journal_mode')).scalar()
+    print(json.dumps({
+        'journal_mode': journal,
+        'reads_per_s': round(reads / args.seconds, 1),
+        'writes_per_s': round(writes / args.seconds, 1),
+        'failures': failures,
+        'latency_ms': {name: {'p50': round(percentile(v, 50) * 1000, 1),
+                              'p95': round(percentile(v, 95) * 1000, 1),
+                              'p99': round(percentile(v, 99) * 1000, 1),
+                              'count': len(v)}
+                       for name, v in sorted(timings.items())},
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--users', type=int, default=300)
+    parser.add_argument('--entries', type=int, default=20_000)
+    parser.add_argument('--modes', nargs='+', choices=sorted(MODES), default=['default', 'tuned'])
+    parser.add_argument('--run-mode', choices=sorted(MODES), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_mode:
+        return run_mode(args)
+
+    results = {}
+    for mode in args.modes:
+        env = dict(os.environ,
+                   RENDER='true',
+                   SQLITE_TUNED=MODES[mode],
+                   MAIL_QUEUE_WORKERS='0',
+                   DATABASE_URL=f"sqlite:///{tempfile.mkdtemp(prefix='kiwanis-stress-')}/v.db")
+        out = subprocess.run([sys.executable, __file__, '--run-mode', mode,
+                              '--workers', str(args.workers), '--seconds', str(args.seconds),
+                              '--users', str(args.users), '--entries', str(args.entries)],
+                             env=env, check=True, capture_output=True, text=True).stdout
+        results[mode] = json.loads(out.strip().splitlines()[-1])
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
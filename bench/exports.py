@@ -0,0 +1,123 @@
+"""
+Benchmark the /report/export/* routes: time to first byte, wall time,
+throughput and peak Python memory.
+
+    python bench/exports.py --entries 20000 100000
+
+Seeds a throwaway SQLite database per size, logs in as a reporter through the
+Flask test client, and downloads every export for the whole date range. Timings are
+measured on their own runs; peak memory comes from a second run under
+tracemalloc. Prints JSON.
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+os.environ['FLASK_ENV'] = 'development'
+os.environ.setdefault('DATABASE_URL',
+                      f"sqlite:///{tempfile.mkdtemp(prefix='kiwanis-bench-')}/volunteer.db")
+
+from werkzeug.security import generate_password_hash  # noqa: E402
+
+from app import app  # noqa: E402
+from models import db  # noqa: E402
+
+EXPORTS = [
+    '/report/export/xlsx',
+    '/report/export/xlsx_totals',
+    '/report/export/xlsx_events',
+    '/report/export/csv',
+    '/report/export/ndjson',
+]
+EVENTS = ['Pancake Breakfast', 'Food Drive', 'Park Cleanup', 'Reading Buddies']
+RANGE = 'start_date=2020-01-01&end_date=2024-12-31'
+
+
+def seed(users, entries):
+    """Fresh schema plus ``entries`` rows written straight through sqlite3."""
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        path = db.engine.url.database
+    conn = sqlite3.connect(path)
+    pw = generate_password_hash('bench', method='pbkdf2:sha256:1')
+    conn.executemany(
+        'INSERT INTO user (id, full_name, username, email, role, password_hash) '
+        'VALUES (?, ?, ?, ?, ?, ?)',
+        [(i, f'Volunteer {i}', f'vol{i}', f'vol{i}@example.com',
+          'reporter' if i == 1 else 'volunteer', pw) for i in range(1, users + 1)])
+    rng = random.Random(7)
+    first = date(2020, 1, 1)
+    conn.executemany(
+        'INSERT INTO volunteer_entry (user_id, date, event, start_time, end_time, '
+        'total_hours, notes) VALUES (?, ?, ?, ?, ?, ?, ?)',
+        ((rng.randint(1, users),
+          (first + timedelta(days=rng.randint(0, 5 * 365 - 1))).isoformat(),
+          rng.choice(EVENTS), '08:00:00.000000', '10:30:00.000000', 2.5,
+          'Set up tables and served') for _ in range(entries)))
+    conn.commit()
+    conn.close()
+
+
+def fetch(client, url):
+    """Stream one download; return (seconds to first chunk, total seconds, bytes)."""
+    t0 = time.perf_counter()
+    resp = client.get(url, buffered=False)
+    assert resp.status_code == 200, (url, resp.status_code)
+    ttfb, size = None, 0
+    for chunk in resp.response:
+        if ttfb is None:
+            ttfb = time.perf_counter() - t0
+        size += len(chunk)
+    resp.close()
+    return ttfb, time.perf_counter() - t0, size
+
+
+def measure(client, url, repeat, entries):
+    runs = [fetch(client, url) for _ in range(repeat)]
+    ttfb = statistics.median(r[0] for r in runs)
+    total = statistics.median(r[1] for r in runs)
+
+    # Consume the body chunk by chunk so the client doesn't count against us
+    tracemalloc.start()
+    fetch(client, url)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'ttfb_s': round(ttfb, 4),
+            'median_s': round(total, 3),
+            'rows_per_s': round(entries / total),
+            'peak_mib': round(peak / 2**20, 1),
+            'bytes': runs[-1][2]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--entries', type=int, nargs='+', default=[20_000, 100_000])
+    parser.add_argument('--users', type=int, default=300)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    results = {}
+    for size in args.entries:
+        seed(args.users, size)
+        client = app.test_client()
+        client.post('/login', data={'username': 'vol1', 'password': 'bench'})
+        results[size] = {url: measure(client, f'{url}?{RANGE}', args.repeat, size)
+                         for url in EXPORTS}
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
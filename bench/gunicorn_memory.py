@@ -0,0 +1,124 @@
+"""
+Memory of a gunicorn deployment, with and without ``preload_app``.
+
+    python bench/gunicorn_memory.py --workers 4 --requests 400
+
+Seeds a SQLite database once. Then, for each mode, it:
+
+1. starts ``gunicorn -c gunicorn.conf.py wsgi:app`` with ProductionConfig
+2. logs in as a reporter
+3. spreads ``--requests`` over /, /summary and /report, on fresh
+   connections so every worker serves some
+4. reads /proc/<pid>/smaps_rollup for the master and each worker
+
+Prints JSON per mode, in MiB:
+
+- pss: proportional set size summed over all processes, i.e. what the
+  deployment really costs; shared pages are split between their sharers
+- uss: memory private to each process, summed
+- rss: what ``ps`` shows per process, summed; shared pages count repeatedly
+"""
+import argparse
+import http.cookiejar
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.parse
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+PAGES = ['/', '/summary', '/report?start_date=2024-01-01&end_date=2024-12-31']
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def children(pid):
+    path = Path(f'/proc/{pid}/task/{pid}/children')
+    return [int(c) for c in path.read_text().split()]
+
+
+def memory(pid):
+    fields = {}
+    for line in Path(f'/proc/{pid}/smaps_rollup').read_text().splitlines()[1:]:
+        name, value = line.split(':')
+        fields[name] = int(value.split()[0])
+    return {'pss': fields['Pss'], 'uss': fields['Private_Clean'] + fields['Private_Dirty'],
+            'rss': fields['Rss']}
+
+
+def wait_ready(base, master, workers, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(base + '/login').read()
+            if len(children(master)) == workers:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError('gunicorn did not come up')
+
+
+def run_mode(preload, args, env):
+    port = free_port()
+    env = dict(env, PORT=str(port), WEB_CONCURRENCY=str(args.workers),
+               GUNICORN_PRELOAD='true' if preload else 'false')
+    server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+                               'wsgi:app'], cwd=ROOT, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        base = f'http://127.0.0.1:{port}'
+        wait_ready(base, server.pid, args.workers)
+        opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+        opener.open(base + '/login', urllib.parse.urlencode(
+            {'username': 'vol1', 'password': 'bench'}).encode()).read()
+        for i in range(args.requests):
+            opener.open(base + PAGES[i % len(PAGES)]).read()
+        time.sleep(1)
+
+        workers = children(server.pid)
+        per_process = [memory(pid) for pid in [server.pid] + workers]
+        total = {key: round(sum(p[key] for p in per_process) / 1024, 1)
+                 for key in ('pss', 'uss', 'rss')}
+        return dict(total, workers=len(workers))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--users', type=int, default=300)
+    parser.add_argument('--entries', type=int, default=20_000)
+    args = parser.parse_args()
+
+    env = dict(os.environ,
+               RENDER='true',
+               MAIL_QUEUE_WORKERS='0',
+               DATABASE_URL=f"sqlite:///{tempfile.mkdtemp(prefix='kiwanis-mem-')}/v.db")
+    os.environ.update(env)
+    from app import create_app
+    from models import db
+    from concurrency import seed
+
+    seed(create_app(), db, args.users, args.entries)
+    print(json.dumps({'preload': run_mode(True, args, env),
+                      'no_preload': run_mode(False, args, env)}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
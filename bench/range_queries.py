@@ -0,0 +1,154 @@
+"""
+Benchmark date-range queries on volunteer_entry before and after
+``flask upgrade-db`` (typed dates/times plus indexes).
+
+    python bench/range_queries.py --entries 200000
+
+Builds a throwaway SQLite database with the legacy string schema, times the
+report-style range queries, runs the in-place upgrade, and times them again.
+Prints one JSON document with median milliseconds per query.
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+LEGACY_SCHEMA = """
+CREATE TABLE user (
+    id INTEGER NOT NULL PRIMARY KEY,
+    full_name VARCHAR(150) NOT NULL,
+    username VARCHAR(100) NOT NULL UNIQUE,
+    email VARCHAR(150) NOT NULL UNIQUE,
+    role VARCHAR(50) NOT NULL,
+    password_hash VARCHAR(128) NOT NULL
+);
+CREATE TABLE volunteer_entry (
+    id INTEGER NOT NULL PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES user (id),
+    date VARCHAR(10),
+    name VARCHAR(100),
+    event VARCHAR(200),
+    start_time VARCHAR(5),
+    end_time VARCHAR(5),
+    total_hours FLOAT,
+    notes VARCHAR(300)
+);
+"""
+
+EVENTS = ['Pancake Breakfast', 'Food Drive', 'Park Cleanup', 'Reading Buddies',
+          'Coat Drive', 'Board Meeting', 'Peanut Sale', 'Holiday Bell Ringing']
+
+QUERIES = {
+    'totals_one_month': (
+        'SELECT user_id, SUM(total_hours) FROM volunteer_entry '
+        'WHERE date >= :start AND date <= :end GROUP BY user_id',
+        {'start': '2023-03-01', 'end': '2023-03-31'},
+    ),
+    'totals_one_year': (
+        'SELECT user_id, SUM(total_hours) FROM volunteer_entry '
+        'WHERE date >= :start AND date <= :end GROUP BY user_id',
+        {'start': '2023-01-01', 'end': '2023-12-31'},
+    ),
+    'one_volunteer_one_year': (
+        'SELECT * FROM volunteer_entry '
+        'WHERE user_id = :user AND date >= :start AND date <= :end',
+        {'user': 7, 'start': '2023-01-01', 'end': '2023-12-31'},
+    ),
+    'one_event_one_quarter': (
+        'SELECT * FROM volunteer_entry '
+        'WHERE event = :event AND date >= :start AND date <= :end',
+        {'event': 'Food Drive', 'start': '2023-04-01', 'end': '2023-06-30'},
+    ),
+}
+
+
+def seed(path, users, entries):
+    conn = sqlite3.connect(path)
+    conn.executescript(LEGACY_SCHEMA)
+    conn.executemany(
+        'INSERT INTO user VALUES (?, ?, ?, ?, ?, ?)',
+        [(i, f'Volunteer {i}', f'vol{i}', f'vol{i}@example.com', 'volunteer', 'x')
+         for i in range(1, users + 1)])
+    rng = random.Random(42)
+    first = date(2020, 1, 1)
+
+    def rows():
+        for _ in range(entries):
+            start = rng.randint(7, 16)
+            yield (rng.randint(1, users),
+                   (first + timedelta(days=rng.randint(0, 5 * 365))).isoformat(),
+                   rng.choice(EVENTS),
+                   f'{start:02d}:00', f'{start + 2:02d}:30', 2.5, '')
+    conn.executemany(
+        'INSERT INTO volunteer_entry (user_id, date, event, start_time, end_time, '
+        'total_hours, notes) VALUES (?, ?, ?, ?, ?, ?, ?)', rows())
+    conn.commit()
+    conn.close()
+
+
+def time_queries(conn, repeat):
+    results = {}
+    for name, (sql, params) in QUERIES.items():
+        samples = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            conn.execute(sql, params).fetchall()
+            samples.append((time.perf_counter() - t0) * 1000)
+        results[name] = round(statistics.median(samples), 3)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=300)
+    parser.add_argument('--entries', type=int, default=200_000)
+    parser.add_argument('--repeat', type=int, default=15)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='kiwanis-bench-')
+    path = os.path.join(workdir, 'volunteer.db')
+    seed(path, args.users, args.entries)
+
+    conn = sqlite3.connect(path)
+    before = time_queries(conn, args.repeat)
+    conn.close()
+
+    os.environ['FLASK_ENV'] = 'development'
+    os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+    from app import app
+    import migrations
+    with app.app_context():
+        t0 = time.perf_counter()
+        stats = migrations.convert_entry_types(batch_size=5000, echo=lambda msg: None)
+        convert_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        indexes = migrations.create_missing_indexes()
+        index_s = time.perf_counter() - t0
+
+    conn = sqlite3.connect(path)
+    conn.execute('ANALYZE')
+    after = time_queries(conn, args.repeat)
+    conn.close()
+
+    print(json.dumps({
+        'entries': args.entries,
+        'users': args.users,
+        'upgrade': {'rows': stats, 'convert_seconds': round(convert_s, 2),
+                    'indexes': indexes, 'index_seconds': round(index_s, 2)},
+        'median_ms_before': before,
+        'median_ms_after': after,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
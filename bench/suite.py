@@ -0,0 +1,214 @@
+"""
+Benchmark the volunteer hot paths at several database sizes.
+
+    python bench/suite.py --sizes 1000 100000 1000000 --out before.json
+
+Each size runs in a fresh interpreter against a new SQLite file, seeded by
+seeding.seed (the code behind ``flask seed-bench``). ProductionConfig is
+used, with the report and user caches off unless ``--cache`` is given.
+Every route is timed through the Flask test client:
+
+- login, POST /log, /, /summary, /report, /admin/entries (and searched)
+- every /report/export/* route, covering the full date range
+- POST /bulk-add-hours for 25 volunteers
+
+A route is run ``--repeat`` times, or for as long as ``--budget`` seconds
+allow (at least once). Prints JSON per size:
+
+- seed time and total entries
+- per route: runs, p50/p95/p99/max latency in ms, SQL statements per
+  request
+- peak_rss_mib: the highest RSS seen while that route ran, sampled every
+  10 ms
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+
+
+def rss_mib():
+    with open('/proc/self/statm') as statm:
+        return int(statm.read().split()[1]) * PAGE_SIZE / 2**20
+
+
+class PeakRSS:
+    """Samples this process's RSS in a thread while the block runs."""
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.peak = 0.0
+        self._done = threading.Event()
+
+    def _sample(self):
+        while not self._done.wait(self.interval):
+            self.peak = max(self.peak, rss_mib())
+
+    def __enter__(self):
+        self.peak = rss_mib()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._done.set()
+        self._thread.join()
+        self.peak = max(self.peak, rss_mib())
+
+
+def percentile(values, p):
+    return (statistics.quantiles(values, n=100, method='inclusive')[p - 1]
+            if len(values) > 1 else values[0])
+
+
+def routes(admin, volunteer_ids):
+    start = (date.today() - timedelta(days=3 * 365)).isoformat()
+    end = date.today().isoformat()
+    dates = f'?start_date={start}&end_date={end}'
+    rng = random.Random(1)
+    log = {'event': 'Food Drive', 'date': end, 'start': '09:00', 'end': '11:00', 'notes': ''}
+
+    def bulk():
+        return {'event': 'Service Day', 'date': end, 'start_time': '08:00',
+                'end_time': '12:00', 'notes': '',
+                'volunteers': [str(i) for i in rng.sample(volunteer_ids, 25)]}
+
+    return [
+        ('login',        'post', '/login', lambda: {'username': admin, 'password': 'bench'}),
+        ('log',          'post', '/log', lambda: log),
+        ('index',        'get',  '/', None),
+        ('summary',      'get',  '/summary', None),
+        ('report',       'get',  '/report' + dates, None),
+        ('admin_entries', 'get', '/admin/entries', None),
+        ('admin_search', 'get', '/admin/entries?q=pancake', None),
+        ('export_xlsx',  'get',  '/report/export/xlsx' + dates, None),
+        ('export_xlsx_totals', 'get', '/report/export/xlsx_totals' + dates, None),
+        ('export_xlsx_events', 'get', '/report/export/xlsx_events' + dates, None),
+        ('export_csv',   'get',  '/report/export/csv' + dates, None),
+        ('export_ndjson', 'get', '/report/export/ndjson' + dates, None),
+        ('bulk_add',     'post', '/bulk-add-hours', bulk),
+    ]
+
+
+def run_size(args):
+    """Runs inside the per-size interpreter; prints one JSON object."""
+    import config
+    from sqlalchemy import event, func, select
+
+    from app import create_app
+    from models import db, VolunteerEntry
+    import seeding
+
+    class BenchConfig(config.ProductionConfig):
+        SQLALCHEMY_DATABASE_URI = (
+            f"sqlite:///{tempfile.mkdtemp(prefix='kiwanis-bench-')}/bench.db")
+        MAIL_QUEUE_WORKERS = 0
+        if not args.cache:
+            REPORT_CACHE = ''
+            USER_CACHE_TTL = 0
+
+    app = create_app(BenchConfig)
+    users = args.users or max(100, args.run_size // 1000)
+    with app.app_context():
+        db.create_all()
+        t0 = time.perf_counter()
+        first_id = seeding.seed(users, args.run_size, password='bench')
+        seed_s = time.perf_counter() - t0
+        engine = db.engine
+
+    statements = []
+    event.listen(engine, 'before_cursor_execute',
+                 lambda conn, cursor, statement, *a: statements.append(statement))
+
+    client = app.test_client()
+    admin = f'bench{first_id}'
+    client.post('/login', data={'username': admin, 'password': 'bench'})
+    volunteer_ids = list(range(first_id + 1, first_id + users))
+    results = {}
+    for name, method, url, data in routes(admin, volunteer_ids):
+        timings, queries = [], []
+        deadline = time.perf_counter() + args.budget
+        with PeakRSS() as peak:
+            while len(timings) < args.repeat and (not timings or time.perf_counter() < deadline):
+                kwargs = {'data': data()} if data else {}
+                statements.clear()
+                t0 = time.perf_counter()
+                resp = getattr(client, method)(url, **kwargs)
+                resp.get_data()
+                timings.append(time.perf_counter() - t0)
+                resp.close()
+                queries.append(len(statements))
+                if resp.status_code >= 400:
+                    raise SystemExit(f'{name}: HTTP {resp.status_code}')
+        results[name] = {
+            'runs': len(timings),
+            'p50_ms': round(percentile(timings, 50) * 1000, 2),
+            'p95_ms': round(percentile(timings, 95) * 1000, 2),
+            'p99_ms': round(percentile(timings, 99) * 1000, 2),
+            'max_ms': round(max(timings) * 1000, 2),
+            'queries': statistics.median_low(queries),
+            'peak_rss_mib': round(peak.peak, 1),
+        }
+
+    with app.app_context():
+        total = db.session.scalar(select(func.count()).select_from(VolunteerEntry))
+    print(json.dumps({
+        'users': users,
+        'entries': total,
+        'seed_s': round(seed_s, 1),
+        'maxrss_mib': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'routes': results,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100_000, 1_000_000])
+    parser.add_argument('--users', type=int, default=0,
+                        help='volunteers per size [default: entries / 1000, at least 100]')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--budget', type=float, default=5.0,
+                        help='seconds per route before it stops repeating')
+    parser.add_argument('--cache', action='store_true', help='leave the report/user caches on')
+    parser.add_argument('--out', help='also write the JSON here')
+    parser.add_argument('--run-size', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_size:
+        return run_size(args)
+
+    commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                            capture_output=True, text=True).stdout.strip()
+    report = {'commit': commit, 'python': platform.python_version(),
+              'cache': args.cache, 'sizes': {}}
+    for size in args.sizes:
+        cmd = [sys.executable, __file__, '--run-size', str(size), '--users', str(args.users),
+               '--repeat', str(args.repeat), '--budget', str(args.budget)]
+        if args.cache:
+            cmd.append('--cache')
+        env = dict(os.environ, RENDER='true', MAIL_QUEUE_WORKERS='0')
+        out = subprocess.run(cmd, env=env, check=True, capture_output=True, text=True).stdout
+        report['sizes'][str(size)] = json.loads(out.strip().splitlines()[-1])
+    text = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + '\n')
+    print(text)
+
+
+if __name__ == '__main__':
+    main()
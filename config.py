@@ -5,6 +5,20 @@ BASE_DIR = pathlib.Path(__file__).parent.resolve()
 DATA_DIR = BASE_DIR / "data"
 DATA_DIR.mkdir(exist_ok=True)
 
+# Per-connection settings for a SQLite file shared by several gunicorn
+# workers (see dbtuning.py)
+SQLITE_TUNED_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous':  'NORMAL',
+    'busy_timeout': 10000,          # ms a writer waits for the write lock
+    'mmap_size':    256 * 2**20,
+    'cache_size':   -64 * 1024,     # KiB, so 64 MiB per connection
+}
+
+def _sqlite_pragmas(default):
+    tuned = os.environ.get('SQLITE_TUNED', default).lower() == 'true'
+    return SQLITE_TUNED_PRAGMAS if tuned else {}
+
 class BaseConfig:
     SECRET_KEY = os.environ.get("SECRET_KEY", "de6486517842123d4c3844bc5e38694c")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
@@ -18,20 +32,88 @@ class BaseConfig:
     MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER', MAIL_USERNAME)
     MAIL_SUPPRESS_SEND = os.environ.get('MAIL_SUPPRESS_SEND', 'false').lower() == 'true'
 
+    # How entry listings load VolunteerEntry.user: 'joined' or 'selectin'
+    ENTRY_USER_LOADING = os.environ.get('ENTRY_USER_LOADING', 'joined')
+
+    # Per-row error files from /import-hours, kept for a week
+    IMPORT_ERRORS_DIR = DATA_DIR / "import_errors"
+
+    # The offline tracker (volunteering_hours.py), read by `flask import-legacy-csv`
+    LEGACY_CSV = DATA_DIR / "volunteer_hours.csv"
+
+    # Outbound mail queue (mailqueue.py). Workers are threads started in the
+    # process that first queues mail; 0 leaves sending to `flask mail-worker`.
+    MAIL_QUEUE_WORKERS = int(os.environ.get('MAIL_QUEUE_WORKERS', 1))
+    MAIL_QUEUE_BATCH = 50             # messages sent per SMTP connection
+    MAIL_QUEUE_POLL = 15              # seconds between checks for due retries
+    MAIL_QUEUE_MAX_ATTEMPTS = 6       # then the message is marked dead
+    MAIL_QUEUE_BACKOFF = 30           # seconds before the first retry, doubling after
+    MAIL_QUEUE_BACKOFF_MAX = 3600
+    MAIL_QUEUE_LOCK_TIMEOUT = 600     # reclaim messages a crashed worker left "sending"
+
+    # Logged-in users kept in memory by the user loader (usercache.py). A
+    # change to a user replaces USER_CACHE_STAMP, and every worker sharing
+    # that file drops its cached users on its next request; workers on other
+    # hosts only see the change after USER_CACHE_TTL.
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 30))   # seconds; 0 = off
+    USER_CACHE_SIZE = 1024
+    USER_CACHE_STAMP = DATA_DIR / "user_cache.stamp"
+
+    # Event names for the event box's autocomplete (events.py), rebuilt this often
+    EVENT_INDEX_TTL = int(os.environ.get('EVENT_INDEX_TTL', 60))   # seconds
+
+    # Cached /report totals and XLSX exports (reportcache.py): 'memory' per
+    # process, 'file' shared by every worker through REPORT_CACHE_DIR, '' off
+    REPORT_CACHE = os.environ.get('REPORT_CACHE', 'memory')
+    REPORT_CACHE_DIR = DATA_DIR / "report_cache"
+    REPORT_CACHE_MAX_BYTES = int(os.environ.get('REPORT_CACHE_MAX_BYTES', 64 * 2**20))
+
+    # Request latency/size/SQL metrics served at /metrics (metrics.py). With
+    # several workers, METRICS_DIR must be a directory they share; empty
+    # keeps each process's numbers to itself.
+    METRICS = os.environ.get('METRICS', 'true').lower() == 'true'
+    METRICS_DIR = os.environ.get('METRICS_DIR', '')
+    METRICS_FLUSH_INTERVAL = 5        # seconds between a worker's writes to METRICS_DIR
+    # Let an unauthenticated scraper on this machine read /metrics. Off by
+    # default: a reverse proxy that doesn't send X-Forwarded-For makes every
+    # visitor look local.
+    METRICS_ALLOW_LOCAL = os.environ.get('METRICS_ALLOW_LOCAL', 'false').lower() == 'true'
+
+    # Slow-query log and N+1 detector (querydebug.py); development and tests
+    QUERY_DEBUG = False
+    SLOW_QUERY_MS = int(os.environ.get('SLOW_QUERY_MS', 100))
+    N_PLUS_ONE_THRESHOLD = int(os.environ.get('N_PLUS_ONE_THRESHOLD', 5))   # same statement
+
+    # Admin-requested cProfile captures of single requests (profiling.py)
+    PROFILING = os.environ.get('PROFILING', 'true').lower() == 'true'
+    PROFILE_DIR = DATA_DIR / "profiles"
+    PROFILE_KEEP = 20                 # newest captures kept
+    PROFILE_TOP = 40                  # functions listed in each summary
+
+    # SQLite pragmas run on every new connection; SQLITE_TUNED=true opts in
+    SQLITE_PRAGMAS = _sqlite_pragmas('false')
+
 class DevelopmentConfig(BaseConfig):
     SQLALCHEMY_DATABASE_URI = os.environ.get(
         "DATABASE_URL",
         f"sqlite:///{(DATA_DIR/'volunteer.db').as_posix()}"
     )
     DEBUG = True
+    QUERY_DEBUG = os.environ.get('QUERY_DEBUG', 'true').lower() == 'true'
 
 class TestingConfig(BaseConfig):
     # in‑memory DB or a throwaway file
     SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
     TESTING = True
+    MAIL_QUEUE_WORKERS = 0
+    USER_CACHE_TTL = 0
+    EVENT_INDEX_TTL = 0
+    REPORT_CACHE = ''
+    QUERY_DEBUG = True
     
 class ProductionConfig(BaseConfig):
     SQLALCHEMY_DATABASE_URI = os.environ.get(
         "DATABASE_URL", "sqlite:////data/volunteer.db"
     )
-    DEBUG = False
\ No newline at end of file
+    DEBUG = False
+    SQLITE_PRAGMAS = _sqlite_pragmas('true')
\ No newline at end of file
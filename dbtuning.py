@@ -0,0 +1,48 @@
+# dbtuning.py
+"""
+Per-connection SQLite settings, and fork safety for the engine.
+
+``SQLITE_PRAGMAS`` is run on every new SQLite connection. ProductionConfig
+uses the tuned set from config.py:
+
+- WAL, so readers never wait for a writer
+- busy_timeout, so concurrent writers queue instead of failing with
+  "database is locked"
+- synchronous=NORMAL, which is still durable across app crashes under WAL
+- a larger page cache and mmap window
+
+A forked child (a gunicorn worker under ``preload_app``, the mail or stress
+workers) drops the connection pool it inherited. Two processes then never
+share one SQLite connection.
+"""
+import os
+import weakref
+
+from sqlalchemy import event
+
+# Engines to reset in a forked child. One fork hook serves every app built
+# in this process; an engine drops out once its app is gone.
+_engines = weakref.WeakSet()
+
+
+def reset_after_fork():
+    """Drop the pool each configured engine inherited from the parent process."""
+    # close=False: the parent still owns those connections
+    for engine in list(_engines):
+        engine.dispose(close=False)
+
+
+os.register_at_fork(after_in_child=reset_after_fork)
+
+
+def configure(engine, pragmas):
+    """Apply ``pragmas`` to ``engine``'s new SQLite connections; reset its pool after fork."""
+    if engine.dialect.name == 'sqlite' and pragmas:
+        @event.listens_for(engine, 'connect')
+        def set_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name} = {value}')
+            cursor.close()
+
+    _engines.add(engine)
@@ -0,0 +1,227 @@
+# events.py
+"""
+Events as rows of ``event`` rather than free text repeated on every entry.
+
+Names are matched on :func:`normalize`, which ignores case and spacing, so
+"Pancake Breakfast" and "pancake breakfast " are one event. Spellings it
+can't catch ("Pancake Bkfst") are merged with ``flask backfill-events
+--merge``. A merged spelling keeps its row and points at the event it now
+means, so typing it again still lands there.
+
+Every route that writes entries runs the event names through :func:`intern`
+or :func:`assign`, which set ``event_id`` and replace the typed name with
+the event's own. ``flask backfill-events`` does the same, in batches, for
+entries logged before.
+
+``volunteer_entry.event`` stays as a denormalized copy of the event's name
+for the rollup, search and exports. Lookups by event go through
+:func:`find` and ``event_id``, so they match however the name is typed.
+
+:func:`suggest` serves autocomplete for the event box from an in-memory
+prefix index of event names. The index is rebuilt when this process adds an
+event, and at least every ``EVENT_INDEX_TTL`` seconds so that other workers'
+new events show up.
+"""
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+
+from flask import current_app
+from sqlalchemy import bindparam, func, or_, select, update
+from sqlalchemy.orm import aliased
+
+from models import db, Event, VolunteerEntry
+from rollups import dialect_insert
+import rollups
+
+SUGGESTIONS = 10
+
+_lock = threading.Lock()
+_index = {'keys': [], 'built_at': None}   # see _prefix_index()
+
+
+def normalize(name):
+    """The key an event name is matched on: case-folded, spaces collapsed."""
+    return ' '.join((name or '').split()).casefold()
+
+
+def _tidy(name):
+    return ' '.join((name or '').split())
+
+
+def _lookup(keys=None):
+    """``{key: (event_id, name)}`` for ``keys`` (or every event), following merges."""
+    target = aliased(Event)
+    query = (select(Event.key,
+                    func.coalesce(target.id, Event.id),
+                    func.coalesce(target.name, Event.name))
+             .outerjoin(target, Event.merged_into_id == target.id))
+    if keys is not None:
+        query = query.where(Event.key.in_(keys))
+    return {key: (event_id, name) for key, event_id, name in db.session.execute(query)}
+
+
+def names_by_id():
+    """``{event_id: name}`` for every event; a merged spelling has the name it now means."""
+    target = aliased(Event)
+    return dict(db.session.execute(
+        select(Event.id, func.coalesce(target.name, Event.name))
+        .outerjoin(target, Event.merged_into_id == target.id)).all())
+
+
+def intern_many(names):
+    """
+    ``{key: (event_id, name)}`` for every non-blank name in ``names``,
+    creating the events not seen before, named as first typed.
+    """
+    wanted = {}
+    for name in names:
+        key = normalize(name)
+        if key:
+            wanted.setdefault(key, _tidy(name))
+    if not wanted:
+        return {}
+    found = _lookup(list(wanted))
+    missing = [{'key': key, 'name': name} for key, name in wanted.items() if key not in found]
+    if missing:
+        # Another worker may be adding the same event right now
+        db.session.execute(dialect_insert()(Event).on_conflict_do_nothing(
+            index_elements=[Event.key]), missing)
+        found.update(_lookup([row['key'] for row in missing]))
+        _index['built_at'] = None
+    return found
+
+
+def find(name):
+    """``(event_id, name)`` for an event as typed, following merges; None if there is none."""
+    key = normalize(name)
+    return _lookup([key]).get(key) if key else None
+
+
+def intern(name):
+    """``(event_id, name)`` for an event as typed; ``(None, '')`` if it is blank."""
+    return intern_many([name]).get(normalize(name), (None, ''))
+
+
+def assign(rows):
+    """Set ``event_id`` and the event's own name on entry dicts bound for a bulk insert."""
+    found = intern_many(row.get('event') for row in rows)
+    for row in rows:
+        row['event_id'], row['event'] = found.get(normalize(row.get('event')), (None, ''))
+
+
+def merge(alias, target):
+    """Make the event typed as ``alias`` mean ``target``; False if they already match."""
+    found = intern_many([alias, target])
+    alias_id, target_id = found[normalize(alias)][0], found[normalize(target)][0]
+    if alias_id == target_id:
+        return False
+    # The alias, and every spelling already merged into it, now mean the target
+    db.session.execute(update(Event)
+                       .where(or_(Event.id == alias_id, Event.merged_into_id == alias_id))
+                       .values(merged_into_id=target_id))
+    _index['built_at'] = None
+    return True
+
+
+def backfill(merges=(), batch_size=1000, pause=0.0, echo=print):
+    """
+    Give every entry its ``event_id`` and its event's name.
+
+    Events are created for spellings not seen before, each named after the
+    spelling most entries use. ``merges`` are ``(alias, target)`` name
+    pairs applied first. Entries are then rewritten in batches of
+    ``batch_size``, one short transaction each, like migrations.py does.
+    Returns the counts of events created, merges and entries updated.
+    """
+    spellings = {}
+    for spelling, count in db.session.execute(
+            select(VolunteerEntry.event, func.count()).group_by(VolunteerEntry.event)):
+        if normalize(spelling):
+            spellings.setdefault(normalize(spelling), Counter())[_tidy(spelling)] += count
+    existing = db.session.scalar(select(func.count()).select_from(Event))
+    intern_many(counts.most_common(1)[0][0] for counts in spellings.values())
+    stats = {'events': db.session.scalar(select(func.count()).select_from(Event)) - existing,
+             'merged': 0, 'updated': 0}
+    for alias, target in merges:
+        if merge(alias, target):
+            stats['merged'] += 1
+            echo(f'  {alias!r} now counts as {target!r}')
+    db.session.commit()
+
+    events = _lookup()
+    table = VolunteerEntry.__table__
+    select_batch = (select(table.c.id, table.c.event, table.c.event_id)
+                    .where(table.c.id > bindparam('last_id'))
+                    .order_by(table.c.id)
+                    .limit(batch_size))
+    update_row = (table.update()
+                  .where(table.c.id == bindparam('_id'))
+                  .values(event=bindparam('new_event'), event_id=bindparam('new_event_id')))
+    last_id = 0
+    while True:
+        with db.engine.begin() as conn:
+            rows = conn.execute(select_batch, {'last_id': last_id}).fetchall()
+            if not rows:
+                break
+            pending = []
+            for entry_id, name, event_id in rows:
+                new_id, new_name = events.get(normalize(name), (None, name))
+                if (new_id, new_name) != (event_id, name):
+                    pending.append({'_id': entry_id, 'new_event': new_name,
+                                    'new_event_id': new_id})
+            if pending:
+                conn.execute(update_row, pending)
+        last_id = rows[-1][0]
+        stats['updated'] += len(pending)
+        if pause:
+            time.sleep(pause)
+
+    if stats['updated']:
+        # The rollup is keyed by event name, and names were just rewritten
+        rollups.rebuild()
+    return stats
+
+
+def _word_starts(key):
+    return [0] + [i + 1 for i, char in enumerate(key) if char == ' ']
+
+
+def _prefix_index():
+    """
+    ``[(suffix, 0 for the whole name or 1 for a later word, name)]``, sorted:
+    every event name keyed by each of its word starts, so one bisect finds
+    the names with a word beginning with a prefix.
+    """
+    ttl = current_app.config['EVENT_INDEX_TTL']
+    built_at = _index['built_at']
+    if built_at is not None and time.monotonic() - built_at < ttl:
+        return _index['keys']
+    with _lock:
+        names = db.session.scalars(select(Event.name).where(Event.merged_into_id.is_(None)))
+        keys = sorted((normalize(name)[i:], int(i > 0), name)
+                      for name in names for i in _word_starts(normalize(name)))
+        _index.update(keys=keys, built_at=time.monotonic())
+        return keys
+
+
+def suggest(prefix, limit=SUGGESTIONS):
+    """
+    Up to ``limit`` event names with a word starting with ``prefix``; names
+    that start with it come first.
+    """
+    prefix = normalize(prefix)
+    if not prefix:
+        return []
+    keys = _prefix_index()
+    matches = set()
+    i = bisect_left(keys, (prefix,))
+    while i < len(keys) and keys[i][0].startswith(prefix):
+        matches.add(keys[i][1:])
+        i += 1
+    names = []
+    for _, name in sorted(matches):
+        if name not in names:
+            names.append(name)
+    return names[:limit]
@@ -0,0 +1,169 @@
+# exports.py
+"""
+Streaming report exports.
+
+Rows come straight off the database cursor in ``yield_per`` batches and go
+into an openpyxl write-only workbook, which keeps finished rows on disk. The
+workbook is saved to an anonymous temp file that ``send_file`` streams back,
+so peak memory stays flat no matter how many rows an export covers.
+
+The CSV and NDJSON exports skip the workbook altogether: each chunk of rows
+is encoded and handed to the client as soon as it comes off the cursor.
+"""
+import csv
+import io
+import json
+import tempfile
+
+from flask import Response, send_file, stream_with_context
+from sqlalchemy import select
+
+from models import db, User, VolunteerEntry
+from utils import format_date, format_time
+import reportcache
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Rows fetched from the cursor per round trip
+FETCH_BATCH = 1000
+
+# Rows encoded per chunk of a streamed CSV/NDJSON response
+STREAM_CHUNK = 500
+
+ENTRY_HEADERS = ['Full Name', 'Date', 'Event', 'Start', 'End', 'Hours', 'Notes']
+TOTAL_HEADERS = ['Full Name', 'Total Hours']
+
+
+def entry_rows(start_date, end_date, blank_notes=None):
+    """
+    Yield one ``ENTRY_HEADERS`` row per entry in the date range, oldest first.
+
+    Only the needed columns are selected (joined to ``User`` for the name), and
+    the result is consumed in ``FETCH_BATCH`` chunks rather than loaded whole.
+    Ordering by ``(date, id)`` follows the date index, so the first rows arrive
+    without the database sorting the whole range first.
+    Missing notes are replaced by ``blank_notes``.
+    """
+    stmt = (select(User.full_name,
+                   VolunteerEntry.date,
+                   VolunteerEntry.event,
+                   VolunteerEntry.start_time,
+                   VolunteerEntry.end_time,
+                   VolunteerEntry.total_hours,
+                   VolunteerEntry.notes)
+            .join(User, VolunteerEntry.user_id == User.id)
+            .where(VolunteerEntry.date >= start_date)
+            .where(VolunteerEntry.date <= end_date)
+            .order_by(VolunteerEntry.date, VolunteerEntry.id)
+            .execution_options(yield_per=FETCH_BATCH))
+
+    for full, day, event, start, end, hours, notes in db.session.execute(stmt):
+        yield [full, format_date(day), event, format_time(start), format_time(end),
+               hours, notes if notes is not None else blank_notes]
+
+
+def write_xlsx(sheet_name, headers, rows):
+    """
+    Write ``rows`` to a single-sheet workbook and return it as a rewound
+    temp file. The header row is bold, as the old pandas writer made it.
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(sheet_name)
+    bold = Font(bold=True)
+    header = []
+    for title in headers:
+        cell = WriteOnlyCell(ws, value=title)
+        cell.font = bold
+        header.append(cell)
+    ws.append(header)
+    for row in rows:
+        ws.append(row)
+
+    spool = tempfile.TemporaryFile()
+    wb.save(spool)
+    spool.seek(0)
+    return spool
+
+
+def send_xlsx(sheet_name, headers, rows, filename):
+    """Build the workbook for ``rows`` and send it as a download."""
+    return send_file(
+        write_xlsx(sheet_name, headers, rows),
+        mimetype=XLSX_MIMETYPE,
+        as_attachment=True,
+        download_name=filename
+    )
+
+
+def send_cached_xlsx(kind, start_date, end_date, sheet_name, headers, rows, filename):
+    """
+    Like :func:`send_xlsx`, but sends the workbook cached for this report
+    and date range if there is one. ``rows`` is a callable, only called on a
+    miss. A workbook too big to cache is sent straight from its temp file.
+    """
+    if not reportcache.enabled():
+        return send_xlsx(sheet_name, headers, rows(), filename)
+    cache_key = reportcache.key(kind, start_date, end_date)
+    data = reportcache.get(cache_key)
+    if data is None:
+        spool = write_xlsx(sheet_name, headers, rows())
+        size = spool.seek(0, io.SEEK_END)
+        spool.seek(0)
+        if not reportcache.fits(size):
+            return send_file(spool, mimetype=XLSX_MIMETYPE, as_attachment=True,
+                             download_name=filename)
+        with spool:
+            data = spool.read()
+        reportcache.put(cache_key, data)
+    return send_file(io.BytesIO(data), mimetype=XLSX_MIMETYPE, as_attachment=True,
+                     download_name=filename)
+
+
+def _chunked(rows, encode):
+    """Join ``encode(row)`` strings into chunks of ``STREAM_CHUNK`` rows."""
+    chunk = []
+    for row in rows:
+        chunk.append(encode(row))
+        if len(chunk) >= STREAM_CHUNK:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
+
+
+def csv_chunks(headers, rows):
+    """Yield the header line, then the rows as CSV text in chunks."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+
+    def encode(row):
+        buf.seek(0)
+        buf.truncate()
+        writer.writerow(row)
+        return buf.getvalue()
+
+    yield encode(headers)
+    yield from _chunked(rows, encode)
+
+
+def ndjson_chunks(headers, rows):
+    """Yield one JSON object per row (keyed by header), newline-delimited."""
+    return _chunked(rows, lambda row: json.dumps(dict(zip(headers, row))) + '\n')
+
+
+def stream_download(chunks, mimetype, filename):
+    """
+    Send a generator of text chunks as an attachment without buffering it.
+
+    The request context is kept alive while the body streams, so the rows
+    can still be read through the request's database session.
+    """
+    return Response(
+        stream_with_context(chunks),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
@@ -0,0 +1,239 @@
+# fulltext.py
+"""
+Full-text search over entries' event and notes, on SQLite's FTS5.
+
+``volunteer_entry_fts`` is an external-content FTS5 table: it indexes
+``volunteer_entry.event``, ``notes`` and ``user_id`` without storing a copy
+of them. Triggers keep it in step with every insert, update and delete,
+including the bulk Core inserts of importer.py and seeding.py. ``user_id``
+is indexed so that a search limited to one volunteer is intersected inside
+the index instead of filtering every match.
+
+Matches are ranked by bm25, a hit in the event counting double one in the
+notes. Only the newest ``RANK_WINDOW`` matches are ranked; on a million
+entries that keeps even a word found in a quarter of them around 20 ms.
+Ranked pages are keyed on ``(score, id)`` like the date-ordered listings
+are on ``(date, id)``. Past the last ranked page, the older matches follow
+newest first, keyed on ``(date, id)`` behind the id the window stopped at.
+
+The table is created with ``volunteer_entry`` by ``db.create_all()`` and
+added to older databases by ``flask upgrade-db``; ``flask rebuild-search``
+rebuilds it. Other databases (or a SQLite built without FTS5) fall back to
+``LIKE`` filters in date order.
+"""
+import re
+
+from sqlalchemy import DDL, and_, event, literal_column, or_, select, table, column, text
+
+import events
+from models import db, VolunteerEntry
+from pagination import DEFAULT_PAGE_SIZE, KeysetPage, filter_entries, keyset_paginate
+
+TABLE = 'volunteer_entry_fts'
+RANK_WINDOW = 500
+
+_CREATE = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+    f"event, notes, user_id, content='volunteer_entry', content_rowid='id', "
+    f"tokenize='porter unicode61')",
+    f"CREATE TRIGGER IF NOT EXISTS {TABLE}_insert AFTER INSERT ON volunteer_entry BEGIN "
+    f"INSERT INTO {TABLE}(rowid, event, notes, user_id) "
+    f"VALUES (new.id, new.event, new.notes, new.user_id); END",
+    f"CREATE TRIGGER IF NOT EXISTS {TABLE}_delete AFTER DELETE ON volunteer_entry BEGIN "
+    f"INSERT INTO {TABLE}({TABLE}, rowid, event, notes, user_id) "
+    f"VALUES ('delete', old.id, old.event, old.notes, old.user_id); END",
+    f"CREATE TRIGGER IF NOT EXISTS {TABLE}_update "
+    f"AFTER UPDATE OF event, notes, user_id ON volunteer_entry BEGIN "
+    f"INSERT INTO {TABLE}({TABLE}, rowid, event, notes, user_id) "
+    f"VALUES ('delete', old.id, old.event, old.notes, old.user_id); "
+    f"INSERT INTO {TABLE}(rowid, event, notes, user_id) "
+    f"VALUES (new.id, new.event, new.notes, new.user_id); END",
+]
+
+_fts = table(TABLE, column('rowid'))
+_match = literal_column(TABLE).op('MATCH')
+# Lower is better; weights are event, notes, user_id
+_score = literal_column(f'bm25({TABLE}, 2.0, 1.0, 0.0)')
+
+
+def _fts5_compiled(ddl, target, bind, **kw):
+    return (bind.dialect.name == 'sqlite'
+            and bool(bind.exec_driver_sql(
+                "SELECT sqlite_compileoption_used('ENABLE_FTS5')").scalar()))
+
+
+for _statement in _CREATE:
+    event.listen(VolunteerEntry.__table__, 'after_create',
+                 DDL(_statement).execute_if(callable_=_fts5_compiled))
+event.listen(VolunteerEntry.__table__, 'before_drop',
+             DDL(f'DROP TABLE IF EXISTS {TABLE}').execute_if(dialect='sqlite'))
+
+
+def available():
+    """Whether this database has the FTS table."""
+    if db.engine.dialect.name != 'sqlite':
+        return False
+    return db.session.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {'name': TABLE}).first() is not None
+
+
+def install():
+    """Create the FTS table and its triggers if missing; True if it had to be built."""
+    if available():
+        return False
+    with db.engine.begin() as conn:
+        if not _fts5_compiled(None, None, conn):
+            raise RuntimeError('This SQLite was built without FTS5')
+        for statement in _CREATE:
+            conn.exec_driver_sql(statement)
+    rebuild()
+    return True
+
+
+def rebuild():
+    """Re-index every entry from scratch, then merge the index into one segment."""
+    with db.engine.begin() as conn:
+        conn.exec_driver_sql(f"INSERT INTO {TABLE}({TABLE}) VALUES ('rebuild')")
+        conn.exec_driver_sql(f"INSERT INTO {TABLE}({TABLE}) VALUES ('optimize')")
+
+
+def words(search):
+    return re.findall(r'\w+', search)
+
+
+def match_expression(search, user_id=None, event=None):
+    """
+    The FTS5 query for ``search``: every word must appear in the event or
+    the notes. The volunteer and event filters are added too, so that FTS5
+    narrows the matches itself; the SQL filters still make them exact.
+    """
+    terms = ' '.join(f'"{w}"' for w in words(search))
+    expression = f'{{event notes}} : ({terms})'
+    if user_id:
+        expression += f' AND user_id : "{int(user_id)}"'
+    if event and words(event):
+        expression += ' AND event : ' + '"' + ' '.join(words(event)) + '"'
+    return expression
+
+
+def _like(query, search):
+    for w in words(search):
+        pattern = f'%{w}%'
+        query = query.filter(or_(VolunteerEntry.event.ilike(pattern),
+                                 VolunteerEntry.notes.ilike(pattern)))
+    return query
+
+
+def encode_cursor(score, entry_id):
+    return f'{score!r}~{entry_id}'
+
+
+def decode_cursor(cursor):
+    """``'score~id'`` → ``(score, id)``; None if malformed."""
+    if not cursor:
+        return None
+    score, _, entry_id = cursor.rpartition('~')
+    try:
+        return float(score), int(entry_id)
+    except ValueError:
+        return None
+
+
+def _split_older_cursor(cursor):
+    """``'boundary:date~id'`` → ``(boundary, 'date~id' or None)``; None for a ranked cursor."""
+    boundary, sep, inner = (cursor or '').partition(':')
+    if not sep:
+        return None
+    try:
+        return int(boundary), inner or None
+    except ValueError:
+        return None
+
+
+# Sorts after every ranked row; "before" it is the last ranked page
+_AFTER_RANKED = encode_cursor(float('inf'), 0)
+
+
+def paginate(query, search, filters, after=None, before=None, per_page=DEFAULT_PAGE_SIZE):
+    """
+    One page of the entries of ``query`` matching ``search``, best first,
+    narrowed by the listing ``filters`` (see pagination.filter_entries).
+    Matches older than the ranked window come after it, newest first.
+    Returns a :class:`pagination.KeysetPage`.
+    """
+    if not words(search):
+        return keyset_paginate(filter_entries(query, **filters),
+                               after=after, before=before, per_page=per_page)
+    if not available():
+        return keyset_paginate(_like(filter_entries(query, **filters), search),
+                               after=after, before=before, per_page=per_page)
+
+    # FTS5 matches the event's own name, which a merged spelling doesn't share
+    event = filters.get('event') and events.find(filters['event'])
+    match = match_expression(search, filters.get('user_id'),
+                             event[1] if event else filters.get('event'))
+    matches = (filter_entries(select(VolunteerEntry.id), **filters)
+               .join_from(_fts, VolunteerEntry, VolunteerEntry.id == _fts.c.rowid)
+               .where(_match(match)))
+
+    older_after, older_before = _split_older_cursor(after), _split_older_cursor(before)
+    if older_after or older_before:
+        boundary, inner = older_after or older_before
+        page = keyset_paginate(
+            filter_entries(query, **filters)
+            .join(_fts, _fts.c.rowid == VolunteerEntry.id)
+            .filter(_match(match), VolunteerEntry.id < boundary),
+            after=inner if older_after else None,
+            before=inner if older_before else None,
+            per_page=per_page)
+        return KeysetPage(
+            page.entries,
+            prev_cursor=f'{boundary}:{page.prev_cursor}' if page.prev_cursor else _AFTER_RANKED,
+            next_cursor=f'{boundary}:{page.next_cursor}' if page.next_cursor else None,
+        )
+
+    def older_start():
+        """The cursor of the first page past the window, if any match is older than it."""
+        edge = db.session.execute(matches.order_by(_fts.c.rowid.desc())
+                                  .offset(RANK_WINDOW - 1).limit(2)).scalars().all()
+        return f'{edge[0]}:' if len(edge) == 2 else None
+
+    window = (matches.add_columns(_score.label('score'))
+              .order_by(_fts.c.rowid.desc())
+              .limit(RANK_WINDOW)
+              .subquery())
+    query = query.join(window, window.c.id == VolunteerEntry.id).add_columns(window.c.score)
+    score, id_col = window.c.score, VolunteerEntry.id
+    after_key, before_key = decode_cursor(after), decode_cursor(before)
+
+    if before_key:
+        s, i = before_key
+        rows = (query
+                .filter(or_(score < s, and_(score == s, id_col < i)))
+                .order_by(score.desc(), id_col.desc())
+                .limit(per_page + 1)
+                .all())
+        more_better = len(rows) > per_page
+        rows = list(reversed(rows[:per_page]))
+        if before == _AFTER_RANKED:
+            next_cursor = older_start()
+        else:
+            next_cursor = encode_cursor(rows[-1][1], rows[-1][0].id) if rows else None
+        return KeysetPage(
+            [entry for entry, _ in rows],
+            prev_cursor=encode_cursor(rows[0][1], rows[0][0].id) if more_better else None,
+            next_cursor=next_cursor,
+        )
+
+    if after_key:
+        s, i = after_key
+        query = query.filter(or_(score > s, and_(score == s, id_col > i)))
+    rows = query.order_by(score, id_col).limit(per_page + 1).all()
+    more = len(rows) > per_page
+    rows = rows[:per_page]
+    return KeysetPage(
+        [entry for entry, _ in rows],
+        prev_cursor=encode_cursor(rows[0][1], rows[0][0].id) if after_key and rows else None,
+        next_cursor=encode_cursor(rows[-1][1], rows[-1][0].id) if more else older_start(),
+    )
@@ -0,0 +1,59 @@
+# gunicorn.conf.py
+"""
+Gunicorn settings for ``gunicorn -c gunicorn.conf.py wsgi:app``.
+
+Tunable from the environment:
+
+- ``WEB_CONCURRENCY``: worker processes (default 2)
+- ``GUNICORN_WORKER_CLASS``: 'gthread' (default) or 'sync'
+- ``GUNICORN_THREADS``: threads per gthread worker (default 4), so a slow
+  export doesn't hold up logins queued behind it in the same worker
+- ``GUNICORN_PRELOAD``: 'true' (default) builds the app once in the master
+  before forking
+- ``GUNICORN_TIMEOUT``: seconds before a silent worker is restarted
+  (default 120; a large XLSX export takes a while)
+- ``PORT``: where to listen (default 5000)
+
+With preload, the master imports everything once and the workers share
+those pages copy-on-write. ``when_ready`` freezes the master's objects out
+of the garbage collector first; otherwise the first collection in each
+worker touches every object and copies those pages anyway.
+``post_fork`` gives each worker its own database pool and mail workers, so
+nothing opened in the master is shared across processes. Workers share
+``METRICS_DIR`` (default data/metrics), which is cleared on startup.
+"""
+import gc
+import os
+from pathlib import Path
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() == 'true'
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+accesslog = '-'
+
+# Each worker writes its request metrics here and /metrics adds them up
+os.environ.setdefault('METRICS_DIR', str(Path(__file__).resolve().parent / 'data' / 'metrics'))
+
+
+def on_starting(server):
+    import metrics
+
+    metrics.clear_dir(os.environ['METRICS_DIR'])
+
+
+def when_ready(server):
+    if server.cfg.preload_app:
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    import dbtuning
+    import mailqueue
+
+    # dbtuning's at-fork hook has normally done this already; a second
+    # dispose of a fresh pool is free
+    dbtuning.reset_after_fork()
+    mailqueue.reset_after_fork()
@@ -0,0 +1,271 @@
+# importer.py
+"""
+Bulk import of volunteer hours from CSV or XLSX sign-in sheets.
+
+Used by the ``/import-hours`` upload page and ``flask import-hours``. Files
+are parsed row by row (never loaded whole), volunteers are matched through
+one preloaded lookup of username, email and full name, and good rows are
+inserted in chunks, one short transaction per chunk. Rows that cannot be
+imported are written to an error CSV as they are found.
+
+``flask import-legacy-csv`` imports the old ``volunteer_hours.csv`` tracker
+the same way, with ``dedupe=True``: every row is stored with a digest of its
+content (``VolunteerEntry.source_hash``), and rows whose digest is already in
+the database are skipped, so the command can be re-run as the offline
+tracker keeps growing.
+"""
+import csv
+import hashlib
+import io
+import time as _time
+from datetime import date, datetime, time
+from functools import lru_cache
+
+from sqlalchemy import insert, select
+
+from models import db, User, VolunteerEntry
+from utils import hours_between, parse_date, parse_time
+import events
+import reportcache
+import rollups
+
+CHUNK_SIZE = 5000
+
+# Accepted header spellings (lower-cased) for each field. These cover our
+# own exports and the old volunteer_hours.csv tracker as well.
+HEADER_ALIASES = {
+    'volunteer': ('volunteer', 'username', 'email', 'full name', 'name', 'volunteer name'),
+    'date':      ('date',),
+    'event':     ('event', 'event/task', 'event / description'),
+    'start':     ('start', 'start time'),
+    'end':       ('end', 'end time'),
+    'hours':     ('hours', 'total hours'),
+    'notes':     ('notes',),
+}
+
+ERROR_HEADERS = ['Line', 'Error']
+
+AMBIGUOUS = object()
+
+
+class ImportRowError(ValueError):
+    """A single row that cannot be imported; the message goes in the error file."""
+
+
+def _key(value):
+    return ' '.join(str(value).split()).lower()
+
+
+def volunteer_lookup():
+    """
+    ``{normalized username/email/full name: (user_id, full_name)}`` from one
+    query. A full name shared by two volunteers maps to ``AMBIGUOUS``.
+    """
+    lookup, names = {}, {}
+    rows = db.session.execute(select(User.id, User.username, User.email, User.full_name))
+    for user_id, username, email, full_name in rows:
+        lookup[_key(username)] = (user_id, full_name)
+        lookup[_key(email)] = (user_id, full_name)
+        names.setdefault(_key(full_name), []).append((user_id, full_name))
+    for name, matches in names.items():
+        if name not in lookup:
+            lookup[name] = matches[0] if len(matches) == 1 else AMBIGUOUS
+    return lookup
+
+
+def _column_map(header):
+    """Map each field to its column index in ``header``; volunteer and date are required."""
+    positions = {}
+    for i, title in enumerate(header):
+        title = _key(title or '')
+        for field, aliases in HEADER_ALIASES.items():
+            if title in aliases and field not in positions:
+                positions[field] = i
+    missing = [f for f in ('volunteer', 'date') if f not in positions]
+    if missing:
+        raise ValueError(f"Missing required column(s): {', '.join(missing)}")
+    return positions
+
+
+def _csv_rows(stream):
+    yield from csv.reader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+
+
+def _xlsx_rows(stream):
+    from openpyxl import load_workbook
+
+    wb = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        yield from wb.worksheets[0].iter_rows(values_only=True)
+    finally:
+        wb.close()
+
+
+def read_rows(stream, filename):
+    """
+    Yield ``(line_number, {field: value})`` for every non-blank data row of a
+    CSV or XLSX file, streaming from ``stream``.
+    """
+    if filename.lower().endswith('.xlsx'):
+        rows = _xlsx_rows(stream)
+    elif filename.lower().endswith('.csv'):
+        rows = _csv_rows(stream)
+    else:
+        raise ValueError('Please upload a .csv or .xlsx file')
+
+    header = next(rows, None)
+    if header is None:
+        raise ValueError('The file is empty')
+    positions = _column_map(list(header))
+    for line, values in enumerate(rows, start=2):
+        if not any(v not in (None, '') for v in values):
+            continue
+        yield line, {field: values[i] if i < len(values) else None
+                     for field, i in positions.items()}
+
+
+# Sign-in sheets repeat the same few dates and times on every row, and
+# strptime is by far the slowest part of parsing one, so remember them.
+_parse_date = lru_cache(maxsize=4096)(parse_date)
+_parse_time = lru_cache(maxsize=4096)(parse_time)
+
+
+def _as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return _parse_date(str(value or ''))
+
+
+def _as_time(value):
+    if value in (None, ''):
+        return None
+    if isinstance(value, datetime):
+        return value.time()
+    if isinstance(value, time):
+        return value
+    return _parse_time(str(value))
+
+
+def parse_row(fields, lookup):
+    """Turn one row's fields into ``VolunteerEntry`` column values."""
+    who = _key(fields.get('volunteer') or '')
+    if not who:
+        raise ImportRowError('No volunteer given')
+    match = lookup.get(who)
+    if match is None:
+        raise ImportRowError(f'Unknown volunteer {fields["volunteer"]!r}')
+    if match is AMBIGUOUS:
+        raise ImportRowError(f'More than one volunteer is named {fields["volunteer"]!r}; '
+                             f'use their username or email')
+    user_id, full_name = match
+
+    try:
+        day   = _as_date(fields.get('date'))
+        start = _as_time(fields.get('start'))
+        end   = _as_time(fields.get('end'))
+    except ValueError:
+        raise ImportRowError('Date must be YYYY-MM-DD and times HH:MM')
+
+    if start and end:
+        hours = hours_between(start, end)
+    else:
+        try:
+            hours = round(float(fields.get('hours')), 2)
+        except (TypeError, ValueError):
+            raise ImportRowError('Give either start and end times or an hours total')
+
+    return dict(
+        user_id=user_id,
+        date=day,
+        name=full_name,
+        event=(str(fields.get('event') or '')).strip(),
+        start_time=start,
+        end_time=end,
+        total_hours=hours,
+        notes=(str(fields.get('notes') or '')).strip(),
+    )
+
+
+def row_hash(fields):
+    """A digest of one row's fields, ignoring case and spacing."""
+    content = '\x1f'.join(_key(fields.get(f) or '') for f in HEADER_ALIASES)
+    return hashlib.blake2b(content.encode(), digest_size=16).hexdigest()
+
+
+def _new_rows(chunk):
+    """The rows of ``chunk`` whose source_hash is neither stored nor earlier in ``chunk``."""
+    seen = set(db.session.scalars(
+        select(VolunteerEntry.source_hash)
+        .where(VolunteerEntry.source_hash.in_([row['source_hash'] for row in chunk]))))
+    fresh = []
+    for row in chunk:
+        if row['source_hash'] not in seen:
+            seen.add(row['source_hash'])
+            fresh.append(row)
+    return fresh
+
+
+def _flush(chunk, dedupe):
+    """Insert ``chunk`` in one transaction; returns how many rows went in."""
+    if dedupe:
+        chunk = _new_rows(chunk)
+    if chunk:
+        events.assign(chunk)
+        db.session.execute(insert(VolunteerEntry.__table__), chunk)
+        rollups.record_rows(chunk)
+        reportcache.bump()
+    db.session.commit()
+    return len(chunk)
+
+
+def import_file(stream, filename, error_out, chunk_size=CHUNK_SIZE, dedupe=False):
+    """
+    Import every row of ``stream`` (a binary file object named ``filename``).
+
+    Bad rows are written to ``error_out`` (a text file) as CSV with the line
+    number, the reason and the original row. With ``dedupe``, rows already
+    imported by an earlier deduplicating run (or repeated within this file)
+    are skipped. Returns ``{'imported': n, 'errors': n, 'duplicates': n}``.
+    Raises ValueError if the file as a whole can't be read (wrong type,
+    missing required columns).
+    """
+    lookup = volunteer_lookup()
+    writer = None
+    stats = {'imported': 0, 'errors': 0, 'duplicates': 0}
+    chunk = []
+
+    def flush():
+        imported = _flush(chunk, dedupe)
+        stats['imported'] += imported
+        stats['duplicates'] += len(chunk) - imported
+
+    for line, fields in read_rows(stream, filename):
+        try:
+            row = parse_row(fields, lookup)
+        except ImportRowError as exc:
+            if writer is None:
+                writer = csv.writer(error_out)
+                writer.writerow(ERROR_HEADERS + [f.title() for f in HEADER_ALIASES])
+            writer.writerow([line, str(exc)] + [fields.get(f, '') for f in HEADER_ALIASES])
+            stats['errors'] += 1
+            continue
+        if dedupe:
+            row['source_hash'] = row_hash(fields)
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            flush()
+            chunk = []
+
+    if chunk:
+        flush()
+    return stats
+
+
+def prune_error_files(directory, max_age_days=7):
+    """Delete error files older than ``max_age_days`` from ``directory``."""
+    cutoff = _time.time() - max_age_days * 86400
+    for path in directory.glob('*.csv'):
+        if path.stat().st_mtime < cutoff:
+            path.unlink(missing_ok=True)
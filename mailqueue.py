@@ -0,0 +1,255 @@
+# mailqueue.py
+"""
+Persistent outbound mail.
+
+Requests never talk to SMTP themselves: :func:`enqueue` stores the message in
+``outbound_mail`` and wakes the worker threads. A worker claims a batch of
+due messages and sends the whole batch over one SMTP connection. A message
+that fails is retried with exponential backoff. After
+``MAIL_QUEUE_MAX_ATTEMPTS`` tries, or on a permanent (5xx) refusal, it is
+left as ``dead`` so someone can look at it.
+
+The workers are daemon threads, started in whichever process first queues
+mail (``MAIL_QUEUE_WORKERS``). They can also run in their own process with
+``flask mail-worker``.
+"""
+import os
+import smtplib
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app
+from flask_mail import Message
+from sqlalchemy import and_, or_, select, update
+
+from models import db, OutboundMail
+
+PENDING, SENDING, SENT, DEAD = 'pending', 'sending', 'sent', 'dead'
+
+# Errors that mean the SMTP connection itself is gone, so the rest of the
+# batch can't go out over it either.
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+
+def _now():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def enqueue(subject, recipients, body, html=None, sender=None):
+    """
+    Queue a message, commit, and nudge the workers. Returns the queued row.
+
+    Nothing is sent from the calling request. The message goes out from a
+    worker thread, or from ``flask mail-worker``.
+    """
+    now = _now()
+    message = OutboundMail(
+        status=PENDING,
+        sender=sender or current_app.config.get('MAIL_DEFAULT_SENDER'),
+        recipients='\n'.join(recipients),
+        subject=subject,
+        body=body,
+        html=html,
+        attempts=0,
+        next_attempt_at=now,
+        created_at=now,
+    )
+    db.session.add(message)
+    db.session.commit()
+
+    if current_app.config['MAIL_QUEUE_WORKERS']:
+        start_workers(current_app._get_current_object())
+    wake()
+    return message
+
+
+def _claimable(now):
+    stale = now - timedelta(seconds=current_app.config['MAIL_QUEUE_LOCK_TIMEOUT'])
+    return or_(and_(OutboundMail.status == PENDING, OutboundMail.next_attempt_at <= now),
+               and_(OutboundMail.status == SENDING, OutboundMail.claimed_at < stale))
+
+
+def claim(limit):
+    """
+    Mark up to ``limit`` due messages as being sent by us and return them.
+
+    The claim is one UPDATE, so two workers never get the same message. Messages
+    stuck in ``sending`` past the lock timeout are claimed again.
+    """
+    now = _now()
+    token = uuid.uuid4().hex
+    due = (select(OutboundMail.id)
+           .where(_claimable(now))
+           .order_by(OutboundMail.next_attempt_at, OutboundMail.id)
+           .limit(limit))
+    db.session.execute(
+        update(OutboundMail)
+        .where(OutboundMail.id.in_(due.scalar_subquery()))
+        .where(_claimable(now))
+        .values(status=SENDING, claimed_by=token, claimed_at=now)
+        .execution_options(synchronize_session=False))
+    db.session.commit()
+    return (OutboundMail.query
+            .filter_by(claimed_by=token)
+            .order_by(OutboundMail.id)
+            .all())
+
+
+def _message(row):
+    return Message(subject=row.subject,
+                   recipients=row.recipients.splitlines(),
+                   body=row.body,
+                   html=row.html,
+                   sender=row.sender)
+
+
+def _permanent(exc):
+    return (isinstance(exc, smtplib.SMTPRecipientsRefused)
+            or (isinstance(exc, smtplib.SMTPResponseException) and exc.smtp_code >= 500))
+
+
+def _record(row, exc, now):
+    """Mark one claimed message sent, due for a retry, or dead."""
+    config = current_app.config
+    row.attempts += 1
+    row.claimed_by = row.claimed_at = None
+    if exc is None:
+        row.status, row.sent_at, row.last_error = SENT, now, None
+        return SENT
+    row.last_error = f'{type(exc).__name__}: {exc}'[:500]
+    if _permanent(exc) or row.attempts >= config['MAIL_QUEUE_MAX_ATTEMPTS']:
+        row.status = DEAD
+        current_app.logger.error('[mail] giving up on message %s: %s', row.id, row.last_error)
+        return DEAD
+    delay = min(config['MAIL_QUEUE_BACKOFF'] * 2 ** (row.attempts - 1),
+                config['MAIL_QUEUE_BACKOFF_MAX'])
+    row.status, row.next_attempt_at = PENDING, now + timedelta(seconds=delay)
+    return PENDING
+
+
+def send_batch(batch):
+    """
+    Send claimed messages over a single SMTP connection and record the outcome
+    of each. Returns ``{'sent': n, 'retry': n, 'dead': n}``.
+    """
+    outcomes = {}
+    try:
+        with current_app.extensions['mail'].connect() as conn:
+            for row in batch:
+                try:
+                    conn.send(_message(row))
+                except Exception as exc:
+                    outcomes[row.id] = exc
+                    if isinstance(exc, CONNECTION_ERRORS):
+                        raise
+                else:
+                    outcomes[row.id] = None
+    except Exception as exc:
+        # Couldn't connect, or lost the connection part way: whatever wasn't
+        # tried yet is retried with the rest
+        current_app.logger.warning('[mail] SMTP connection failed: %s', exc)
+        for row in batch:
+            outcomes.setdefault(row.id, exc)
+
+    now = _now()
+    stats = {'sent': 0, 'retry': 0, 'dead': 0}
+    for row in batch:
+        status = _record(row, outcomes[row.id], now)
+        stats[{SENT: 'sent', PENDING: 'retry', DEAD: 'dead'}[status]] += 1
+    db.session.commit()
+    return stats
+
+
+def drain(batch_size=None):
+    """Send everything that is due now, one batch at a time, and total up the outcomes."""
+    batch_size = batch_size or current_app.config['MAIL_QUEUE_BATCH']
+    totals = {'sent': 0, 'retry': 0, 'dead': 0}
+    while True:
+        batch = claim(batch_size)
+        if not batch:
+            return totals
+        for key, n in send_batch(batch).items():
+            totals[key] += n
+
+
+# ——— Worker threads ———
+
+_wakeup = threading.Condition()
+
+
+def wake():
+    """Tell idle workers there is mail to send, instead of waiting for the next poll."""
+    with _wakeup:
+        _wakeup.notify_all()
+
+
+class MailWorkerPool:
+    """``workers`` daemon threads, each draining the queue in its own app context."""
+
+    def __init__(self, app, workers):
+        self.app = app
+        self.pid = os.getpid()
+        self._stopping = threading.Event()
+        self._threads = [threading.Thread(target=self._run, name=f'mail-worker-{i}', daemon=True)
+                         for i in range(workers)]
+
+    def start(self):
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stopping.set()
+        wake()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                with self.app.app_context():
+                    drain()
+                    db.session.remove()
+            except Exception:
+                self.app.logger.exception('[mail] worker failed')
+            with _wakeup:
+                if not self._stopping.is_set():
+                    _wakeup.wait(self.app.config['MAIL_QUEUE_POLL'])
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def start_workers(app, workers=None):
+    """
+    Start this process's worker pool if it isn't running yet. A process forked
+    from one that had a pool gets a fresh one, because threads don't survive a fork.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool.pid != os.getpid():
+            _pool = MailWorkerPool(app, workers or app.config['MAIL_QUEUE_WORKERS']).start()
+        return _pool
+
+
+def reset_after_fork():
+    """
+    Forget the parent's pool and locks in a freshly forked child. The
+    parent's threads don't exist here, and a lock one of them held at fork
+    time would never be released.
+    """
+    global _pool, _pool_lock, _wakeup
+    _pool = None
+    _pool_lock = threading.Lock()
+    _wakeup = threading.Condition()
+
+
+def stop_workers(timeout=None):
+    """Stop this process's worker pool, if any."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool.pid == os.getpid():
+            _pool.stop(timeout)
+        _pool = None
@@ -0,0 +1,289 @@
+# metrics.py
+"""
+Request metrics in Prometheus text format, served at ``/metrics``.
+
+The hooks :func:`init_app` installs record the following for every
+request, labelled by endpoint, method and status:
+
+- latency, up to the last byte of a streamed export
+- response size
+- SQL statements and the time spent in them, from engine events
+
+plus the user cache's hits and misses (see usercache.py).
+
+Each process adds its numbers up in memory. If ``METRICS_DIR`` is set,
+it also writes them to its own ``<pid>.json`` there, at most every
+``METRICS_FLUSH_INTERVAL`` seconds. :func:`render` sums every file, so
+whichever gunicorn worker answers the scrape reports all of them. Each
+file has one writer and is replaced atomically, so processes need no
+locking. Files of workers that have exited stay, so counters never go
+backwards. gunicorn's ``on_starting`` clears them for a fresh run.
+"""
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+
+from flask import current_app, g, has_request_context, request
+from flask_login import current_user
+from sqlalchemy import event
+
+import usercache
+from models import db
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 2**20, 4 * 2**20, 16 * 2**20,
+                64 * 2**20)
+
+# A series is one flat list of numbers, so merging processes is elementwise
+# addition: these slots, then a count per latency bucket, then per size bucket
+COUNT, LATENCY_SUM, SIZE_COUNT, SIZE_SUM, SQL_COUNT, SQL_SECONDS = range(6)
+LATENCY_AT = 6
+SIZE_AT = LATENCY_AT + len(LATENCY_BUCKETS) + 1
+WIDTH = SIZE_AT + len(SIZE_BUCKETS) + 1
+
+# Unlabelled counters kept by other modules; see _counters()
+COUNTERS = {
+    'kiwanis_user_cache_hits_total': 'Logged-in users served from the user cache.',
+    'kiwanis_user_cache_misses_total': 'Logged-in users the user cache read from the database.',
+}
+
+_lock = threading.Lock()
+_series = {}          # (endpoint, method, status) -> list of WIDTH numbers
+_directory = None     # where flush() writes, once an app has set it
+_flush_interval = 5
+_last_flush = 0.0
+
+
+def _reset():
+    """A forked child starts from zero; the parent's numbers are the parent's to report."""
+    global _lock, _last_flush
+    _lock = threading.Lock()
+    _series.clear()
+    _last_flush = 0.0
+
+
+os.register_at_fork(after_in_child=_reset)
+
+
+def record(endpoint, method, status, seconds, size, sql_count, sql_seconds):
+    """Count one finished request."""
+    key = (endpoint, method, str(status))
+    with _lock:
+        row = _series.get(key)
+        if row is None:
+            row = _series[key] = [0] * WIDTH
+        row[COUNT] += 1
+        row[LATENCY_SUM] += seconds
+        row[LATENCY_AT + bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        if size is not None:
+            row[SIZE_COUNT] += 1
+            row[SIZE_SUM] += size
+            row[SIZE_AT + bisect_left(SIZE_BUCKETS, size)] += 1
+        row[SQL_COUNT] += sql_count
+        row[SQL_SECONDS] += sql_seconds
+    if _directory and time.monotonic() - _last_flush >= _flush_interval:
+        flush()
+
+
+def flush():
+    """Write this process's numbers to its file under ``METRICS_DIR``."""
+    global _last_flush
+    if not _directory:
+        return
+    _last_flush = time.monotonic()
+    with _lock:
+        snapshot = {'\t'.join(key): list(row) for key, row in _series.items()}
+    snapshot[''] = _counters()
+    directory = Path(_directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'w') as out:
+        json.dump(snapshot, out)
+    os.replace(tmp, directory / f'{os.getpid()}.json')
+
+
+atexit.register(flush)
+
+
+def clear_dir(directory):
+    """Forget every process's numbers in ``directory``; for a fresh server start."""
+    for path in Path(directory).glob('*.json'):
+        path.unlink(missing_ok=True)
+
+
+def reset():
+    """Forget this process's numbers."""
+    with _lock:
+        _series.clear()
+
+
+def _counters():
+    """This process's plain counters, by metric name."""
+    stats = usercache.stats()
+    return {'kiwanis_user_cache_hits_total': stats['hits'],
+            'kiwanis_user_cache_misses_total': stats['misses']}
+
+
+def collect():
+    """
+    ``({(endpoint, method, status): row}, {counter name: value})``, each
+    summed over every process.
+    """
+    if not _directory:
+        with _lock:
+            return {key: list(row) for key, row in _series.items()}, _counters()
+    flush()
+    totals, counters = {}, {}
+    for path in Path(_directory).glob('*.json'):
+        try:
+            snapshot = json.loads(path.read_text())
+        except (FileNotFoundError, ValueError):
+            continue   # a worker replacing its file right now
+        for name, value in snapshot.pop('', {}).items():
+            counters[name] = counters.get(name, 0) + value
+        for key, row in snapshot.items():
+            key = tuple(key.split('\t'))
+            total = totals.setdefault(key, [0] * WIDTH)
+            for i, value in enumerate(row):
+                total[i] += value
+    return totals, counters
+
+
+def _histogram(lines, name, help_text, series, buckets, at, count, total):
+    lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+    for labels, row in series:
+        cumulative = 0
+        for i, bound in enumerate(buckets):
+            cumulative += row[at + i]
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {row[count]}')
+        lines.append(f'{name}_sum{{{labels}}} {row[total]}')
+        lines.append(f'{name}_count{{{labels}}} {row[count]}')
+
+
+def _counter(lines, name, help_text, series, slot):
+    lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+    lines += [f'{name}{{{labels}}} {row[slot]}' for labels, row in series]
+
+
+def render():
+    """Every metric, in Prometheus text exposition format."""
+    totals, counters = collect()
+    series = [(f'endpoint="{endpoint}",method="{method}",status="{status}"', row)
+              for (endpoint, method, status), row in sorted(totals.items())]
+    lines = []
+    _histogram(lines, 'kiwanis_http_request_duration_seconds',
+               'Time from the start of a request to the last byte of its response.',
+               series, LATENCY_BUCKETS, LATENCY_AT, COUNT, LATENCY_SUM)
+    _histogram(lines, 'kiwanis_http_response_size_bytes',
+               'Response body size.',
+               [(labels, row) for labels, row in series if row[SIZE_COUNT]],
+               SIZE_BUCKETS, SIZE_AT, SIZE_COUNT, SIZE_SUM)
+    _counter(lines, 'kiwanis_sql_statements_total',
+             'SQL statements executed while serving requests.', series, SQL_COUNT)
+    _counter(lines, 'kiwanis_sql_duration_seconds_total',
+             'Time spent executing those statements.', series, SQL_SECONDS)
+    for name, help_text in COUNTERS.items():
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter',
+                  f'{name} {counters.get(name, 0)}']
+    return '\n'.join(lines) + '\n'
+
+
+# ——— Request and engine hooks ———
+
+class _Counted:
+    """A streamed response body that tallies its bytes as they go out."""
+
+    def __init__(self, chunks, tally):
+        self.chunks = chunks
+        self.tally = tally
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            self.tally[0] += len(chunk)
+            yield chunk
+
+    def close(self):
+        close = getattr(self.chunks, 'close', None)
+        if close:
+            close()
+
+
+def _start():
+    g.metrics = [time.perf_counter(), 0, 0.0]   # start, SQL statements, SQL seconds
+
+
+def _finish(response):
+    tally = g.get('metrics')
+    if tally is None:
+        return response
+    endpoint, method, status = (request.endpoint or 'unmatched', request.method,
+                                response.status_code)
+    size = [response.content_length]
+
+    def done():
+        record(endpoint, method, status, time.perf_counter() - tally[0], size[0],
+               tally[1], tally[2])
+
+    if response.direct_passthrough and size[0] is not None:
+        # A file the server sends as is; its close callbacks never run
+        done()
+        return response
+    if size[0] is None and response.is_streamed:
+        size[0] = 0
+        response.response = _Counted(response.response, size)
+        # An unsized file (a spooled workbook) goes through iteration instead,
+        # so it gets counted and closed like any other stream
+        response.direct_passthrough = False
+    # On close, so streamed exports count until their last byte
+    response.call_on_close(done)
+    return response
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'metrics' in g:
+        context.metrics_tally = g.metrics
+        context.metrics_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    tally = getattr(context, 'metrics_tally', None)
+    if tally is not None:
+        tally[1] += 1
+        tally[2] += time.perf_counter() - context.metrics_start
+
+
+def init_app(app):
+    """Record metrics for ``app``'s requests, if ``METRICS`` is on."""
+    global _directory, _flush_interval
+    if not app.config['METRICS']:
+        return
+    _directory = app.config['METRICS_DIR'] or None
+    _flush_interval = app.config['METRICS_FLUSH_INTERVAL']
+    app.before_request(_start)
+    app.after_request(_finish)
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(db.engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+def allowed():
+    """
+    Whether this request may read /metrics: by an admin, or, with
+    ``METRICS_ALLOW_LOCAL``, from this machine. Behind a reverse proxy on
+    the same host every visitor comes from 127.0.0.1, so a forwarded
+    request never counts as local.
+    """
+    if (current_app.config['METRICS_ALLOW_LOCAL']
+            and request.remote_addr in ('127.0.0.1', '::1')
+            and 'X-Forwarded-For' not in request.headers
+            and 'Forwarded' not in request.headers):
+        return True
+    return current_user.is_authenticated and current_user.role == 'admin'
@@ -0,0 +1,142 @@
+# migrations.py
+"""
+In-place upgrades for an existing SQLite database, run by ``flask upgrade-db``.
+
+Every step is idempotent, so the command is safe to re-run. Rows are
+rewritten in small batches, each in its own short transaction, so the app
+can keep serving (and writing) while an upgrade runs.
+"""
+import time
+from datetime import datetime
+
+from sqlalchemy import bindparam, inspect, text
+
+from models import db, VolunteerEntry
+import reportcache
+
+DATE_FORMATS = ('%Y-%m-%d', '%m/%d/%Y', '%Y/%m/%d')
+TIME_FORMATS = ('%H:%M', '%H:%M:%S', '%H:%M:%S.%f', '%I:%M %p', '%I:%M%p')
+
+
+def _parse(raw, formats):
+    """First successful strptime of ``raw`` over ``formats``, or None."""
+    if raw is None:
+        return None
+    raw = str(raw).strip()
+    for fmt in formats:
+        try:
+            return datetime.strptime(raw, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def _typed_row(row):
+    """
+    Convert one legacy ``(id, date, start, end)`` string row.
+
+    Returns ``(values, changed, cleared)``: the typed values, whether the stored
+    text differs from SQLAlchemy's canonical SQLite format, and whether any
+    non-empty value was unparseable (and is therefore being set to NULL).
+    """
+    entry_id, raw_date, raw_start, raw_end = row
+    d = _parse(raw_date, DATE_FORMATS)
+    s = _parse(raw_start, TIME_FORMATS)
+    e = _parse(raw_end, TIME_FORMATS)
+    values = {
+        '_id':        entry_id,
+        'new_date':   d.date() if d else None,
+        'new_start':  s.time() if s else None,
+        'new_end':    e.time() if e else None,
+    }
+    canonical = (
+        values['new_date'].isoformat() if d else None,
+        values['new_start'].strftime('%H:%M:%S.%f') if s else None,
+        values['new_end'].strftime('%H:%M:%S.%f') if e else None,
+    )
+    changed = canonical != (raw_date, raw_start, raw_end)
+    cleared = any(raw not in (None, '') and parsed is None
+                  for raw, parsed in ((raw_date, d), (raw_start, s), (raw_end, e)))
+    return values, changed, cleared
+
+
+def convert_entry_types(batch_size=1000, pause=0.0, echo=print):
+    """
+    Rewrite ``volunteer_entry.date/start_time/end_time`` into the storage
+    format of the ``Date``/``Time`` column types.
+
+    SQLite keeps dates and times as text whatever the declared type, so the
+    declared column types are left alone (changing them would mean rebuilding
+    the table under one long write lock). What matters is that every stored
+    value parses as a real date/time and sorts correctly; values that cannot
+    be parsed are set to NULL and reported.
+    """
+    table = VolunteerEntry.__table__
+    select_batch = text(
+        'SELECT id, date, start_time, end_time FROM volunteer_entry '
+        'WHERE id > :last_id ORDER BY id LIMIT :limit'
+    )
+    update_row = (table.update()
+                  .where(table.c.id == bindparam('_id'))
+                  .values(date=bindparam('new_date', type_=table.c.date.type),
+                          start_time=bindparam('new_start', type_=table.c.start_time.type),
+                          end_time=bindparam('new_end', type_=table.c.end_time.type)))
+
+    stats = {'scanned': 0, 'updated': 0, 'cleared': 0}
+    last_id = 0
+    while True:
+        with db.engine.begin() as conn:
+            rows = conn.execute(select_batch,
+                                {'last_id': last_id, 'limit': batch_size}).fetchall()
+            if not rows:
+                break
+            pending = []
+            for row in rows:
+                values, changed, cleared = _typed_row(row)
+                if changed:
+                    pending.append(values)
+                if cleared:
+                    stats['cleared'] += 1
+                    echo(f'  entry {row[0]}: unparseable date/time {tuple(row[1:])!r} set to NULL')
+            if pending:
+                conn.execute(update_row, pending)
+                # Reports built from the old values are stale
+                reportcache.bump(conn)
+        last_id = rows[-1][0]
+        stats['scanned'] += len(rows)
+        stats['updated'] += len(pending)
+        if pause:
+            time.sleep(pause)
+    return stats
+
+
+def add_missing_columns():
+    """
+    Add any nullable column declared on the models that its table lacks
+    (SQLite can only ADD COLUMN, so NOT NULL columns need a real migration).
+    """
+    added = []
+    for table in db.metadata.sorted_tables:
+        existing = {c['name'] for c in inspect(db.engine).get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            if not column.nullable:
+                raise RuntimeError(f'Cannot add NOT NULL column {table.name}.{column.name}')
+            ddl = column.type.compile(dialect=db.engine.dialect)
+            with db.engine.begin() as conn:
+                conn.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {ddl}'))
+            added.append(f'{table.name}.{column.name}')
+    return added
+
+
+def create_missing_indexes():
+    """Create any index declared on the models that the database lacks."""
+    created = []
+    for table in db.metadata.sorted_tables:
+        existing = {ix['name'] for ix in inspect(db.engine).get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(db.engine)
+                created.append(index.name)
+    return created
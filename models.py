@@ -36,15 +36,84 @@ class User(UserMixin, db.Model):
             return None
         return User.query.get(user_id)
 
+class Event(db.Model):
+    """
+    One event, however it was typed: entries point at it by ``event_id``.
+    ``key`` is the normalized name (see events.normalize); a spelling merged
+    into another event keeps its row, pointing at the event it now means.
+    """
+    __tablename__ = 'event'
+    id             = db.Column(db.Integer, primary_key=True)
+    key            = db.Column(db.String(200), unique=True, nullable=False)
+    name           = db.Column(db.String(200), nullable=False)
+    merged_into_id = db.Column(db.Integer, db.ForeignKey('event.id'))
+
+
 class VolunteerEntry(db.Model):
     __tablename__ = 'volunteer_entry'
+    __table_args__ = (
+        db.Index('ix_volunteer_entry_date',         'date'),
+        db.Index('ix_volunteer_entry_user_id_date', 'user_id', 'date'),
+        db.Index('ix_volunteer_entry_event_date',   'event', 'date'),
+        db.Index('ix_volunteer_entry_event_id_date', 'event_id', 'date'),
+        db.Index('ix_volunteer_entry_source_hash',  'source_hash', unique=True),
+        # Covers reports.event_totals: a date range read from the index alone
+        db.Index('ix_volunteer_entry_date_event_id', 'date', 'event_id', 'user_id', 'total_hours'),
+    )
     id          = db.Column(db.Integer, primary_key=True)
     user_id     = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     user        = db.relationship('User', backref=db.backref('entries', lazy=True))
-    date        = db.Column(db.String(10))
+    date        = db.Column(db.Date)
     name        = db.Column(db.String(100))
+    # A denormalized copy of Event.name, kept for the rollup, search and
+    # exports; look entries up by event_id
     event       = db.Column(db.String(200))
-    start_time  = db.Column(db.String(5))
-    end_time    = db.Column(db.String(5))
+    event_id    = db.Column(db.Integer, db.ForeignKey('event.id'))
+    start_time  = db.Column(db.Time)
+    end_time    = db.Column(db.Time)
     total_hours = db.Column(db.Float)
     notes       = db.Column(db.String(300))
+    source_hash = db.Column(db.String(32))   # set by deduplicating imports; see importer.py
+
+
+class HoursRollup(db.Model):
+    """Summed hours per volunteer, event and day, kept in step with entries."""
+    __tablename__ = 'hours_rollup'
+    __table_args__ = (
+        db.Index('ix_hours_rollup_date_user_id_hours', 'date', 'user_id', 'hours'),
+    )
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    event   = db.Column(db.String(200), primary_key=True)
+    date    = db.Column(db.Date, primary_key=True)
+    hours   = db.Column(db.Float, nullable=False, default=0)
+    entries = db.Column(db.Integer, nullable=False, default=0)
+
+
+class CacheGeneration(db.Model):
+    """A counter bumped by every write that can change a cached report; see reportcache.py."""
+    __tablename__ = 'cache_generation'
+    name       = db.Column(db.String(50), primary_key=True)
+    value      = db.Column(db.BigInteger, nullable=False)
+    changed_at = db.Column(db.DateTime)
+
+
+class OutboundMail(db.Model):
+    """An email waiting to go out (or sent, or given up on); see mailqueue.py."""
+    __tablename__ = 'outbound_mail'
+    __table_args__ = (
+        db.Index('ix_outbound_mail_status_next_attempt_at', 'status', 'next_attempt_at'),
+    )
+    id              = db.Column(db.Integer, primary_key=True)
+    status          = db.Column(db.String(10), nullable=False, default='pending')
+    sender          = db.Column(db.String(150))
+    recipients      = db.Column(db.Text, nullable=False)   # one address per line
+    subject         = db.Column(db.String(300), nullable=False)
+    body            = db.Column(db.Text)
+    html            = db.Column(db.Text)
+    attempts        = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False)
+    claimed_by      = db.Column(db.String(32))
+    claimed_at      = db.Column(db.DateTime)
+    last_error      = db.Column(db.String(500))
+    created_at      = db.Column(db.DateTime, nullable=False)
+    sent_at         = db.Column(db.DateTime)
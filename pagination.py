@@ -0,0 +1,120 @@
+# pagination.py
+from datetime import date
+
+from sqlalchemy import and_, false, or_
+
+import events
+from models import VolunteerEntry
+from utils import parse_date
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE     = 500
+
+
+class KeysetPage:
+    """One page of entries plus the cursors needed to move either way."""
+
+    def __init__(self, entries, prev_cursor=None, next_cursor=None):
+        self.entries     = entries
+        self.prev_cursor = prev_cursor
+        self.next_cursor = next_cursor
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+def page_size_arg(args):
+    """Read ``per_page`` from the query string, clamped to a sane range."""
+    try:
+        size = int(args.get('per_page', DEFAULT_PAGE_SIZE))
+    except (TypeError, ValueError):
+        size = DEFAULT_PAGE_SIZE
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def date_arg(args, key):
+    """Optional 'YYYY-MM-DD' query arg → date; blanks and junk become None."""
+    try:
+        return parse_date(args.get(key))
+    except ValueError:
+        return None
+
+
+def encode_cursor(entry):
+    return f'{entry.date}~{entry.id}'
+
+
+def decode_cursor(cursor):
+    """Turn ``'YYYY-MM-DD~id'`` back into ``(date, id)``; None if malformed."""
+    if not cursor:
+        return None
+    day, _, entry_id = cursor.rpartition('~')
+    try:
+        return date.fromisoformat(day), int(entry_id)
+    except ValueError:
+        return None
+
+
+def filter_entries(query, user_id=None, event=None, start_date=None, end_date=None):
+    """
+    Apply the listing filters shared by the admin and volunteer pages.
+    ``event`` is matched like any typed name (see events.normalize), so it
+    finds the event's entries however either was spelled.
+    """
+    if user_id:
+        query = query.filter(VolunteerEntry.user_id == user_id)
+    if event:
+        found = events.find(event)
+        query = query.filter(VolunteerEntry.event_id == found[0] if found else false())
+    if start_date:
+        query = query.filter(VolunteerEntry.date >= start_date)
+    if end_date:
+        query = query.filter(VolunteerEntry.date <= end_date)
+    return query
+
+
+def keyset_paginate(query, after=None, before=None, per_page=DEFAULT_PAGE_SIZE):
+    """
+    Page through ``query`` newest first, keyed on ``(date, id)``.
+
+    Rather than OFFSET, each page seeks straight past the last row of the
+    previous one, so page 1,000 costs the same as page 1. ``after`` moves
+    forward (older entries) and ``before`` moves back (newer entries); both
+    are cursors produced by :func:`encode_cursor`.
+    """
+    date_col, id_col = VolunteerEntry.date, VolunteerEntry.id
+    after_key, before_key = decode_cursor(after), decode_cursor(before)
+
+    if before_key:
+        d, i = before_key
+        rows = (query
+                .filter(or_(date_col > d, and_(date_col == d, id_col > i)))
+                .order_by(date_col.asc(), id_col.asc())
+                .limit(per_page + 1)
+                .all())
+        more_newer = len(rows) > per_page
+        entries = list(reversed(rows[:per_page]))
+        return KeysetPage(
+            entries,
+            prev_cursor=encode_cursor(entries[0]) if more_newer else None,
+            next_cursor=encode_cursor(entries[-1]) if entries else None,
+        )
+
+    if after_key:
+        d, i = after_key
+        query = query.filter(or_(date_col < d, and_(date_col == d, id_col < i)))
+    rows = (query
+            .order_by(date_col.desc(), id_col.desc())
+            .limit(per_page + 1)
+            .all())
+    entries = rows[:per_page]
+    return KeysetPage(
+        entries,
+        prev_cursor=encode_cursor(entries[0]) if after_key and entries else None,
+        next_cursor=encode_cursor(entries[-1]) if len(rows) > per_page else None,
+    )
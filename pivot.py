@@ -0,0 +1,187 @@
+# pivot.py
+"""
+Pivot reports: hours, entries or distinct volunteers by any one or two of
+volunteer, event, role and date (per day, week, month, quarter or year).
+
+Every entry in range is read by one query. It is grouped by date, which
+follows ``ix_volunteer_entry_date_event_id``, so each date is sent once;
+the other columns a pivot needs come back per date as one comma-separated
+string (``group_concat`` on SQLite, ``string_agg`` on Postgres). A million
+rows fetched as Python tuples would alone take longer than the whole
+report. Hours travel as whole seconds, which SQLite formats far faster
+than floats.
+
+numpy parses the strings and pandas does the grouping, on integer codes;
+labels are only looked up for the cells that come out. Like the export
+machinery, this module is only imported by the first pivot report.
+"""
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Integer, String, cast, func, select
+
+from models import db, User, VolunteerEntry
+from utils import ROLE_LEVEL
+import events
+
+DIMENSIONS = {
+    'volunteer': 'Volunteer',
+    'event':     'Event',
+    'role':      'Role',
+    'date':      'Date',
+}
+
+# Labels that sort in date order
+GRANULARITIES = {
+    'day':     date.isoformat,
+    'week':    lambda d: '{0}-W{1:02d}'.format(*d.isocalendar()),
+    'month':   lambda d: d.strftime('%Y-%m'),
+    'quarter': lambda d: f'{d.year}-Q{(d.month + 2) // 3}',
+    'year':    lambda d: str(d.year),
+}
+
+MEASURES = {
+    'hours':      'Total Hours',
+    'entries':    'Entries',
+    'volunteers': 'Volunteers',
+}
+
+_AGGREGATES = {'hours': 'sum', 'entries': 'size', 'volunteers': 'nunique'}
+
+NO_EVENT = '(no event)'
+TOTAL = 'Total'
+
+
+def check(rows, columns=None, granularity='month', measure='hours'):
+    """Raise ValueError, with a message for the user, unless this pivot can be run."""
+    if rows not in DIMENSIONS:
+        raise ValueError(f'Rows must be one of: {", ".join(DIMENSIONS)}')
+    if columns and columns not in DIMENSIONS:
+        raise ValueError(f'Columns must be one of: {", ".join(DIMENSIONS)}')
+    if columns == rows:
+        raise ValueError('Rows and columns must be different')
+    if granularity not in GRANULARITIES:
+        raise ValueError(f'Granularity must be one of: {", ".join(GRANULARITIES)}')
+    if measure not in MEASURES:
+        raise ValueError(f'Measure must be one of: {", ".join(MEASURES)}')
+
+
+def _read(start_date, end_date, packed):
+    """
+    ``(dates, counts, {name: array})``: the distinct entry dates in range,
+    how many entries fall on each, and the ``packed`` columns of those
+    entries as int64 arrays, in the same order.
+    """
+    entry = VolunteerEntry
+    query = (select(entry.date, func.count(),
+                    *(func.aggregate_strings(cast(column, String), ',')
+                      for column in packed.values()))
+             .where(entry.date.is_not(None)))
+    if start_date:
+        query = query.where(entry.date >= start_date)
+    if end_date:
+        query = query.where(entry.date <= end_date)
+    result = db.session.execute(query.group_by(entry.date)).all()
+
+    dates = [row[0] for row in result]
+    counts = np.array([row[1] for row in result], dtype=np.int64)
+    arrays = {}
+    for i, name in enumerate(packed, start=2):
+        joined = ','.join(row[i] for row in result)
+        arrays[name] = (np.fromstring(joined, dtype=np.int64, sep=',') if joined
+                        else np.empty(0, dtype=np.int64))
+    return dates, counts, arrays
+
+
+def _codes(values, labels_by_key, sort_key=None):
+    """
+    ``(codes, labels)``: each of ``values`` looked up in ``labels_by_key``
+    and numbered by its label's place in the sorted labels. Keys sharing a
+    label (two volunteers with one name) get one code, as in
+    reports.volunteer_totals.
+    """
+    labels = sorted(set(labels_by_key.values()), key=sort_key)
+    number = {label: i for i, label in enumerate(labels)}
+    code_by_key = np.array([number[label] for label in labels_by_key.values()], dtype=np.int64)
+    return code_by_key[pd.Index(list(labels_by_key)).get_indexer(values)], labels
+
+
+def _dimension(name, granularity, dates, counts, arrays, users):
+    """``(codes, labels)`` of dimension ``name`` for every entry read."""
+    if name == 'date':
+        periods = pd.Index([GRANULARITIES[granularity](d) for d in dates], dtype=object)
+        codes, labels = pd.factorize(periods, sort=True)
+        return np.repeat(codes, counts), labels.tolist()
+    if name == 'volunteer':
+        return _codes(arrays['user_id'], {uid: full for uid, full, _ in users})
+    if name == 'role':
+        return _codes(arrays['user_id'], {uid: role for uid, _, role in users},
+                      sort_key=lambda role: (ROLE_LEVEL.get(role, 0), role))
+    return _codes(arrays['event_id'], {0: NO_EVENT, **events.names_by_id()})
+
+
+def _present(measure, values):
+    """Aggregated ``values`` as a list of plain numbers, hours rounded to 2 places."""
+    values = np.asarray(values)
+    if measure == 'hours':
+        return np.round(values / 3600, 2).tolist()
+    return values.astype(np.int64).tolist()
+
+
+def pivot(rows, columns=None, granularity='month', measure='hours',
+          start_date=None, end_date=None):
+    """
+    The pivot of ``measure`` by ``rows`` (and ``columns``, if given) for
+    entries dated in the range, as a JSON-ready dict: ``headers``, one list
+    per row label under ``rows``, and the ``totals`` row. With columns
+    there is a Total column too. Totals of distinct volunteers count each
+    volunteer once, not once per cell.
+    """
+    check(rows, columns, granularity, measure)
+    dimensions = [rows] + ([columns] if columns else [])
+    entry = VolunteerEntry
+    packed = {}
+    if measure == 'volunteers' or {'volunteer', 'role'} & set(dimensions):
+        packed['user_id'] = entry.user_id
+    if 'event' in dimensions:
+        packed['event_id'] = func.coalesce(entry.event_id, 0)
+    if measure == 'hours':
+        packed['seconds'] = cast(func.round(func.coalesce(entry.total_hours, 0) * 3600), Integer)
+    dates, counts, arrays = _read(start_date, end_date, packed)
+
+    users = []
+    if 'user_id' in packed:
+        users = db.session.execute(select(User.id, User.full_name, User.role)).all()
+    if measure == 'entries':
+        values = np.ones(int(counts.sum()), dtype=np.int8)
+    else:
+        values = arrays['seconds' if measure == 'hours' else 'user_id']
+    frame = pd.DataFrame({'value': values})
+    labels = {}
+    for name in dimensions:
+        frame[name], labels[name] = _dimension(name, granularity, dates, counts, arrays, users)
+
+    aggregate = _AGGREGATES[measure]
+    by_row = frame.groupby(rows, sort=True)['value'].agg(aggregate)
+    grand = frame['value'].agg(aggregate) if len(frame) else 0
+    row_labels = [labels[rows][code] for code in by_row.index]
+
+    if not columns:
+        return {
+            'headers': [DIMENSIONS[rows], MEASURES[measure]],
+            'rows': [[label, value] for label, value in zip(row_labels, _present(measure, by_row))],
+            'totals': [TOTAL] + _present(measure, [grand]),
+        }
+
+    cells = (frame.groupby([rows, columns], sort=True)['value'].agg(aggregate)
+             .unstack(fill_value=0)
+             .reindex(index=by_row.index, fill_value=0))
+    by_column = frame.groupby(columns, sort=True)['value'].agg(aggregate)
+    body = np.column_stack([cells.to_numpy(), by_row.to_numpy()]) if len(cells) else []
+    return {
+        'headers': ([DIMENSIONS[rows]] + [labels[columns][code] for code in cells.columns]
+                    + [TOTAL]),
+        'rows': [[label] + _present(measure, values) for label, values in zip(row_labels, body)],
+        'totals': [TOTAL] + _present(measure, list(by_column) + [grand]),
+    }
@@ -0,0 +1,135 @@
+# profiling.py
+"""
+Profile a single request on demand, in production, with cProfile.
+
+An admin adds ``?profile=1`` to a URL (or sends ``X-Profile: 1``). That one
+request runs under cProfile from just before its view until its response is
+closed, so a streamed export is profiled to its last row. Anyone else
+asking gets a 403 from ``role_required('admin')``.
+
+Each capture is stored in ``PROFILE_DIR`` as two files:
+
+- ``<id>.pstats``, for ``python -m pstats`` or snakeviz
+- ``<id>.txt``, the top ``PROFILE_TOP`` functions by cumulative time
+
+Only the newest ``PROFILE_KEEP`` captures are kept. The response carries the
+capture's id in ``X-Profile-Id``; admins can download either file from
+``/admin/profiles/<id>.<ext>``. One request per process is profiled at a
+time; a second one meanwhile runs normally with ``X-Profile-Id: busy``.
+"""
+import cProfile
+import io
+import pstats
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+from flask import current_app, g, request
+from flask_login import current_user
+
+from utils import role_required
+
+_busy = threading.Lock()
+
+
+def requested():
+    return request.args.get('profile') == '1' or request.headers.get('X-Profile') == '1'
+
+
+@role_required('admin')
+def _start():
+    if not _busy.acquire(blocking=False):
+        g.profile_id = 'busy'
+        return
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    endpoint = (request.endpoint or 'unmatched').replace('.', '_')
+    g.profile_id = f'{stamp}-{endpoint}-{uuid.uuid4().hex[:8]}'
+    g.profile_user = current_user.username   # before the view; /logout forgets it
+    g.profile_started = time.perf_counter()
+    g.profiler = cProfile.Profile()
+    g.profiler.enable()
+
+
+def _before():
+    if requested():
+        _start()
+
+
+def _capture():
+    """Take the running capture off ``g``, with what save() needs to know."""
+    capture = {'profiler': g.profiler,
+               'profile_id': g.profile_id,
+               'started': g.profile_started,
+               'heading': f'{request.method} {request.full_path.rstrip("?")}\n'
+                          f'user: {g.profile_user}  status: {g.get("profile_status")}',
+               'directory': Path(current_app.config['PROFILE_DIR']),
+               'top': current_app.config['PROFILE_TOP'],
+               'keep': current_app.config['PROFILE_KEEP']}
+    del g.profiler
+    return capture
+
+
+def _after(response):
+    if 'profile_id' in g:
+        response.headers['X-Profile-Id'] = g.profile_id
+        g.profile_status = response.status_code
+        if 'profiler' in g and response.is_streamed and not response.direct_passthrough:
+            # Flask tears down before a generator streams; keep profiling to the last chunk
+            # If this fails, the capture stays on g and teardown releases it
+            capture = _capture()
+            response.call_on_close(lambda: _stop(capture))
+    return response
+
+
+def _teardown(exc=None):
+    if 'profiler' in g:
+        _stop()
+
+
+def _stop(capture=None):
+    """
+    Save ``capture`` (by default, the one still on ``g``) and free the
+    process's profiling slot, whatever fails on the way.
+    """
+    try:
+        _finish(**(capture or _capture()))
+    finally:
+        if capture is None and 'profiler' in g:
+            g.pop('profiler').disable()   # _capture() failed
+        _busy.release()
+
+
+def _finish(profiler, profile_id, started, heading, directory, top, keep):
+    profiler.disable()
+    elapsed = time.perf_counter() - started
+    save(profiler, directory, profile_id, f'{heading}  wall time: {elapsed * 1000:.1f} ms', top)
+    prune(directory, keep)
+
+
+def save(profiler, directory, profile_id, heading, top):
+    """Write the capture's .pstats, and its ``top`` functions with ``heading`` as .txt."""
+    directory.mkdir(parents=True, exist_ok=True)
+    profiler.dump_stats(directory / f'{profile_id}.pstats')
+    out = io.StringIO()
+    out.write(heading + '\n\n')
+    pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(top)
+    (directory / f'{profile_id}.txt').write_text(out.getvalue())
+
+
+def prune(directory, keep):
+    """Delete all but the newest ``keep`` captures in ``directory``."""
+    captures = sorted(directory.glob('*.pstats'), key=lambda p: p.stat().st_mtime, reverse=True)
+    for old in captures[keep:]:
+        old.unlink(missing_ok=True)
+        old.with_suffix('.txt').unlink(missing_ok=True)
+
+
+def init_app(app):
+    """Let admins profile ``app``'s requests, if ``PROFILING`` is on."""
+    if not app.config['PROFILING']:
+        return
+    app.before_request(_before)
+    app.after_request(_after)
+    app.teardown_request(_teardown)
@@ -0,0 +1,99 @@
+# querydebug.py
+"""
+Development and test aids for SQL, on when ``QUERY_DEBUG`` is set.
+
+- **Slow queries.** A statement taking longer than ``SLOW_QUERY_MS`` is
+  logged with its parameters, its time and the database's query plan
+  (``EXPLAIN QUERY PLAN`` on SQLite).
+- **N+1 queries.** A request that runs the same parameterized statement
+  more than ``N_PLUS_ONE_THRESHOLD`` times is logged. The usual cause is
+  touching ``entry.user`` per row without loading users with the entries.
+  The request is also added to :data:`problems`, which the test suite
+  checks after every test (see test/conftest.py), so a new N+1 fails the
+  build.
+"""
+import time
+from collections import Counter
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+from models import db
+
+EXPLAIN = {
+    'sqlite':     'EXPLAIN QUERY PLAN ',
+    'postgresql': 'EXPLAIN ',
+}
+
+# (endpoint, statement, times) for every N+1 seen since the last take_problems()
+problems = []
+
+
+def take_problems():
+    """The N+1s recorded so far, forgetting them."""
+    found = problems[:]
+    del problems[:]
+    return found
+
+
+def _explain(conn, statement, parameters):
+    prefix = EXPLAIN.get(conn.dialect.name)
+    if prefix is None:
+        return None
+    # The raw DBAPI connection, so this doesn't come back through the events
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        # SQLite's plan rows end with the step's text; Postgres's are only that
+        return '\n'.join(f'    {row[-1]}' for row in cursor.fetchall())
+    except Exception as exc:
+        return f'    (no plan: {exc})'
+    finally:
+        cursor.close()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context.querydebug_start = time.perf_counter()
+    if has_request_context() and 'query_counts' in g:
+        g.query_counts[statement] += 1
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed_ms = (time.perf_counter() - context.querydebug_start) * 1000
+    if elapsed_ms < current_app.config['SLOW_QUERY_MS']:
+        return
+    plan = None if executemany else _explain(conn, statement, parameters)
+    current_app.logger.warning('[SQL] slow query (%.1f ms): %s\n  params: %r\n  plan:\n%s',
+                               elapsed_ms, statement, parameters, plan or '    (none)')
+
+
+def _start():
+    g.query_counts = Counter()
+
+
+def _check(exc=None):
+    counts = g.get('query_counts')
+    if not counts:
+        return
+    threshold = current_app.config['N_PLUS_ONE_THRESHOLD']
+    reported = g.setdefault('query_reported', set())
+    for statement, times in counts.items():
+        if times > threshold and statement not in reported:
+            reported.add(statement)
+            endpoint = request.endpoint or request.path
+            problems.append((endpoint, statement, times))
+            current_app.logger.warning('[SQL] possible N+1 in %s: ran %d times: %s',
+                                       endpoint, times, statement)
+
+
+def init_app(app):
+    """Watch ``app``'s queries, if ``QUERY_DEBUG`` is on."""
+    if not app.config['QUERY_DEBUG']:
+        return
+    app.before_request(_start)
+    # Flask tears a streamed request down twice: when the view returns and
+    # again after the last chunk, so statements run while streaming count too
+    app.teardown_request(_check)
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(db.engine, 'after_cursor_execute', _after_cursor_execute)
@@ -0,0 +1,277 @@
+# reportcache.py
+"""
+Cache for date-range reports and their XLSX exports.
+
+Entries are keyed by ``(kind, start, end)`` plus the current write
+generation. The generation is a counter in ``cache_generation`` that every
+route writing entries (or volunteer names) bumps with :func:`bump` inside its
+own transaction. After a write, every older entry is unreachable and gets
+pruned, so a stale report is never served.
+
+The same generation validates HTTP caches: :func:`conditional` gives the
+report pages and exports an ETag and Last-Modified, and answers a matching
+conditional GET with 304 before any report is computed.
+
+``REPORT_CACHE`` picks the store. 'memory' is an LRU per process. 'file'
+keeps entries under ``REPORT_CACHE_DIR``, where all gunicorn workers share
+them. An empty value turns caching off. Either store is bounded by
+``REPORT_CACHE_MAX_BYTES``.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import wraps
+from pathlib import Path
+
+from flask import Response, current_app, g, has_request_context, make_response, request
+from flask_login import current_user
+from sqlalchemy import select
+
+from models import db, CacheGeneration
+from rollups import dialect_insert
+
+GENERATION = 'reports'
+
+# Entries larger than this share of the budget would only push everything
+# else out, so they aren't cached
+MAX_ITEM_SHARE = 4
+
+
+def bump(conn=None):
+    """
+    Make every cached report stale. Call before committing a write, on the
+    write's own ``conn`` if it isn't made through the session.
+    """
+    # Seeded from the clock so a recreated database doesn't count up
+    # through generations a file cache already holds entries for
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    stmt = dialect_insert()(CacheGeneration).values(name=GENERATION,
+                                                    value=time.time_ns() // 1000,
+                                                    changed_at=now)
+    (conn or db.session).execute(stmt.on_conflict_do_update(
+        index_elements=[CacheGeneration.name],
+        set_={'value': CacheGeneration.value + 1, 'changed_at': now}))
+    if has_request_context():
+        g.pop('report_generation', None)
+
+
+def last_change():
+    """
+    ``(generation, changed_at)`` of the latest write, or ``(0, None)`` before
+    any. Read once per request.
+    """
+    if has_request_context() and 'report_generation' in g:
+        return g.report_generation
+    row = db.session.execute(
+        select(CacheGeneration.value, CacheGeneration.changed_at)
+        .where(CacheGeneration.name == GENERATION)).first()
+    change = tuple(row) if row else (0, None)
+    if has_request_context():
+        g.report_generation = change
+    return change
+
+
+def generation():
+    return last_change()[0]
+
+
+class MemoryStore:
+    """An LRU of byte strings bounded by their total size."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._generation = None
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+            return data
+
+    def put(self, key, data):
+        with self._lock:
+            if self._generation is not None and key[0] < self._generation:
+                return   # computed before a write that has since landed
+            if key[0] != self._generation:
+                self._entries.clear()
+                self._size, self._generation = 0, key[0]
+            old = self._entries.pop(key, None)
+            self._size -= len(old or b'')
+            self._entries[key] = data
+            self._size += len(data)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+
+class FileStore:
+    """
+    One file per entry under ``directory``, named for its key. Reads refresh
+    the file's mtime. Writes prune older generations, then the least
+    recently read files until the directory fits ``max_bytes``.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+
+    def _path(self, key):
+        return self.directory / ('-'.join(map(str, key)) + '.bin')
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass   # evicted by another worker meanwhile
+        return data
+
+    def put(self, key, data):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as out:
+            out.write(data)
+        os.replace(tmp, self._path(key))
+        self._prune(key[0])
+
+    def _prune(self, current):
+        files = []
+        for path in self.directory.glob('*.bin'):
+            try:
+                stat = path.stat()
+                if int(path.name.split('-', 1)[0]) < current:
+                    path.unlink()
+                    continue
+            except (FileNotFoundError, ValueError):
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+
+STORES = {
+    'memory': lambda config: MemoryStore(config['REPORT_CACHE_MAX_BYTES']),
+    'file':   lambda config: FileStore(config['REPORT_CACHE_DIR'],
+                                       config['REPORT_CACHE_MAX_BYTES']),
+}
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def _store():
+    config = current_app.config
+    backend = config['REPORT_CACHE']
+    if not backend:
+        return None
+    if backend not in STORES:
+        raise ValueError(f'Unknown REPORT_CACHE {backend!r}; expected one of {sorted(STORES)}')
+    settings = (backend, str(config['REPORT_CACHE_DIR']), config['REPORT_CACHE_MAX_BYTES'])
+    with _stores_lock:
+        if settings not in _stores:
+            _stores[settings] = STORES[backend](config)
+        return _stores[settings]
+
+
+def enabled():
+    return _store() is not None
+
+
+def key(kind, start_date, end_date):
+    """The cache key for a report as of the current write generation."""
+    return (generation(), kind, start_date, end_date)
+
+
+def get(cache_key):
+    """Cached bytes for ``cache_key``, or None."""
+    store = _store()
+    return store.get(cache_key) if store else None
+
+
+def fits(size):
+    """Whether ``size`` bytes are worth caching at all."""
+    store = _store()
+    return bool(store) and size <= store.max_bytes // MAX_ITEM_SHARE
+
+
+def put(cache_key, data):
+    if fits(len(data)):
+        _store().put(cache_key, data)
+
+
+def cached_json(kind, start_date, end_date, compute):
+    """``compute()`` for this report, or its cached copy (round-tripped through JSON)."""
+    if not enabled():
+        return compute()
+    cache_key = key(kind, start_date, end_date)
+    data = get(cache_key)
+    if data is not None:
+        return json.loads(data)
+    result = compute()
+    put(cache_key, json.dumps(result).encode())
+    return result
+
+
+# ——— Conditional GET ———
+
+def _not_modified(etag, last_modified, per_user):
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    # Last-Modified doesn't say whose page it was, so per-user pages rely on the ETag
+    since = request.if_modified_since
+    return bool(not per_user and since and last_modified and last_modified <= since)
+
+
+def conditional(*params, per_user=False):
+    """
+    Decorate a GET view whose body only changes with the write generation.
+
+    The ETag hashes the endpoint, the generation and the query ``params``
+    (plus the user, for ``per_user`` pages); Last-Modified is the time of the
+    latest write. A request that still matches gets a 304 without the view
+    running. Put it below the login/role decorators.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(*args, **kwargs)
+
+            gen, changed_at = last_change()
+            parts = [request.endpoint, str(gen)] + [request.args.get(p, '') for p in params]
+            if per_user:
+                parts += [str(current_user.id), current_user.role]
+            etag = hashlib.sha1('\0'.join(parts).encode()).hexdigest()
+            last_modified = (changed_at.replace(microsecond=0, tzinfo=timezone.utc)
+                             if changed_at else None)
+
+            if _not_modified(etag, last_modified, per_user):
+                response = Response(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            if last_modified:
+                response.last_modified = last_modified
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapper
+    return decorator
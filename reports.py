@@ -0,0 +1,86 @@
+# reports.py
+from flask import current_app
+from sqlalchemy import distinct, func, select
+from sqlalchemy.orm import joinedload, selectinload
+
+from models import db, Event, HoursRollup, User, VolunteerEntry
+
+
+USER_LOADERS = {
+    'joined':   joinedload,
+    'selectin': selectinload,
+}
+
+
+def with_user(query):
+    """
+    Eager-load ``VolunteerEntry.user`` on an entry query.
+
+    The strategy comes from ``ENTRY_USER_LOADING``: 'joined' adds a JOIN to
+    the same SELECT, 'selectin' issues one extra ``IN`` query per batch of
+    entries. Either way, listing N entries no longer costs N user selects.
+    """
+    strategy = current_app.config.get('ENTRY_USER_LOADING', 'joined')
+    try:
+        loader = USER_LOADERS[strategy]
+    except KeyError:
+        raise ValueError(f'Unknown ENTRY_USER_LOADING {strategy!r}; '
+                         f'expected one of {sorted(USER_LOADERS)}')
+    return query.options(loader(VolunteerEntry.user))
+
+
+def volunteer_totals(start_date=None, end_date=None, user_id=None):
+    """
+    Total hours per volunteer as ``{full_name: hours}``, ordered by name.
+
+    Reads the ``hours_rollup`` table (one row per volunteer, event and day)
+    grouped by ``user_id`` and joined to ``User``, so a year-long report costs
+    O(volunteers × days) no matter how many entries were logged.
+    """
+    query = (db.session.query(User.full_name,
+                              func.sum(HoursRollup.hours))
+             .join(User, HoursRollup.user_id == User.id))
+
+    if start_date:
+        query = query.filter(HoursRollup.date >= start_date)
+    if end_date:
+        query = query.filter(HoursRollup.date <= end_date)
+    if user_id is not None:
+        query = query.filter(HoursRollup.user_id == user_id)
+
+    query = (query.group_by(HoursRollup.user_id, User.full_name)
+             .order_by(User.full_name, HoursRollup.user_id))
+
+    # Two volunteers can share a full name; the old loop merged them, so do we.
+    totals = {}
+    for full, hours in query:
+        totals[full] = round(totals.get(full, 0) + (hours or 0), 2)
+    return totals
+
+
+def event_totals(start_date=None, end_date=None):
+    """
+    ``[[event name, hours, entries, volunteers]]`` per event, most hours first.
+
+    Entries are grouped on the integer ``event_id`` and the names joined on
+    afterwards, one row per event, so no event name is compared along the
+    way. Entries not yet linked to an event (see ``flask backfill-events``)
+    are counted under "(no event)".
+    """
+    per_event = select(VolunteerEntry.event_id,
+                       func.sum(VolunteerEntry.total_hours).label('hours'),
+                       func.count().label('entries'),
+                       func.count(distinct(VolunteerEntry.user_id)).label('volunteers'))
+    if start_date:
+        per_event = per_event.where(VolunteerEntry.date >= start_date)
+    if end_date:
+        per_event = per_event.where(VolunteerEntry.date <= end_date)
+    per_event = per_event.group_by(VolunteerEntry.event_id).subquery()
+
+    rows = db.session.execute(
+        select(Event.name, per_event.c.hours, per_event.c.entries, per_event.c.volunteers)
+        .select_from(per_event)
+        .outerjoin(Event, Event.id == per_event.c.event_id)
+        .order_by(per_event.c.hours.desc(), Event.name))
+    return [[name or '(no event)', round(hours or 0, 2), entries, volunteers]
+            for name, hours, entries, volunteers in rows]
@@ -0,0 +1,146 @@
+# rollups.py
+"""
+Keep ``hours_rollup`` (hours and entry counts per volunteer/event/day) in
+step with ``volunteer_entry``.
+
+Every route that writes entries calls in here before it commits, so the
+rollup changes land in the same transaction as the entries themselves.
+Entries without a date never reach a date-range report and are left out.
+``flask rebuild-rollups`` recomputes the table from scratch or checks it.
+"""
+import importlib
+
+from sqlalchemy import delete, func, insert, select, tuple_
+
+from models import db, HoursRollup, VolunteerEntry
+
+# Imported on first use, so a SQLite app never loads the Postgres dialect
+UPSERT_DIALECTS = {
+    'sqlite':     'sqlalchemy.dialects.sqlite',
+    'postgresql': 'sqlalchemy.dialects.postgresql',
+}
+
+
+def dialect_insert():
+    """The ``insert`` with ``on_conflict_do_update`` for the session's database."""
+    name = db.session.get_bind().dialect.name
+    return importlib.import_module(UPSERT_DIALECTS[name]).insert
+
+
+def _key(user_id, event, day):
+    return user_id, event or '', day
+
+
+def _apply(deltas):
+    """
+    Add ``{(user_id, event, date): [hours, count]}`` to the rollup in one
+    upsert, then drop any bucket whose entry count fell to zero.
+    """
+    deltas = {key: d for key, d in deltas.items() if key[2] is not None}
+    if not deltas:
+        return
+
+    stmt = dialect_insert()(HoursRollup)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[HoursRollup.user_id, HoursRollup.event, HoursRollup.date],
+        set_={
+            'hours':   func.round(HoursRollup.hours + stmt.excluded.hours, 2),
+            'entries': HoursRollup.entries + stmt.excluded.entries,
+        },
+    )
+    db.session.execute(stmt, [
+        {'user_id': user_id, 'event': event, 'date': day,
+         'hours': round(hours, 2), 'entries': count}
+        for (user_id, event, day), (hours, count) in deltas.items()
+    ])
+
+    shrunk = [key for key, (_, count) in deltas.items() if count < 0]
+    if shrunk:
+        db.session.execute(
+            delete(HoursRollup)
+            .where(tuple_(HoursRollup.user_id, HoursRollup.event, HoursRollup.date).in_(shrunk))
+            .where(HoursRollup.entries <= 0))
+
+
+def _add(deltas, user_id, event, day, hours, sign):
+    bucket = deltas.setdefault(_key(user_id, event, day), [0.0, 0])
+    bucket[0] += sign * (hours or 0)
+    bucket[1] += sign
+
+
+def record(*entries):
+    """Count newly added entries."""
+    deltas = {}
+    for e in entries:
+        _add(deltas, e.user_id, e.event, e.date, e.total_hours, +1)
+    _apply(deltas)
+
+
+def retract(*entries):
+    """
+    Uncount entries about to be deleted or edited.
+
+    For an edit, call this before changing the entry and :func:`record`
+    afterwards, so the old bucket loses what the new one gains.
+    """
+    deltas = {}
+    for e in entries:
+        _add(deltas, e.user_id, e.event, e.date, e.total_hours, -1)
+    _apply(deltas)
+
+
+def record_rows(rows):
+    """Count entries inserted in bulk from plain ``VolunteerEntry`` column dicts."""
+    deltas = {}
+    for row in rows:
+        _add(deltas, row['user_id'], row.get('event'), row.get('date'),
+             row.get('total_hours'), +1)
+    _apply(deltas)
+
+
+def retract_user(user_id):
+    """Drop every bucket of a volunteer whose entries are all being deleted."""
+    db.session.execute(delete(HoursRollup).where(HoursRollup.user_id == user_id))
+
+
+def _grouped_entries():
+    """The rollup as it should be, computed straight from volunteer_entry."""
+    event = func.coalesce(VolunteerEntry.event, '')
+    return (select(VolunteerEntry.user_id,
+                   event,
+                   VolunteerEntry.date,
+                   func.round(func.coalesce(func.sum(VolunteerEntry.total_hours), 0), 2),
+                   func.count())
+            .where(VolunteerEntry.date.is_not(None))
+            .group_by(VolunteerEntry.user_id, event, VolunteerEntry.date))
+
+
+def rebuild():
+    """
+    Recompute the whole rollup from volunteer_entry in one transaction,
+    which also makes every cached report stale.
+    """
+    import reportcache  # it imports this module for dialect_insert()
+
+    db.session.execute(delete(HoursRollup))
+    db.session.execute(
+        insert(HoursRollup).from_select(
+            ['user_id', 'event', 'date', 'hours', 'entries'], _grouped_entries()))
+    reportcache.bump()
+    db.session.commit()
+    return db.session.scalar(select(func.count()).select_from(HoursRollup))
+
+
+def verify():
+    """
+    Compare the rollup against volunteer_entry.
+
+    Returns a list of ``(key, expected, actual)`` for every bucket that
+    differs, where expected/actual are ``(hours, entries)`` or None.
+    """
+    expected = {(u, e, d): (h, n) for u, e, d, h, n in db.session.execute(_grouped_entries())}
+    actual = {(r.user_id, r.event, r.date): (round(r.hours, 2), r.entries)
+              for r in HoursRollup.query}
+    return [(key, expected.get(key), actual.get(key))
+            for key in sorted(expected.keys() | actual.keys(), key=repr)
+            if expected.get(key) != actual.get(key)]
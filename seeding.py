@@ -0,0 +1,111 @@
+# seeding.py
+"""
+Synthetic volunteers and hours for benchmarks (``flask seed-bench``).
+
+The data is shaped like the real thing:
+
+- a few dozen recurring events
+- volunteers who log a lot more than others
+- shifts of 15 minutes to 6 hours starting between 7:00 and 17:45
+- three years of dates
+- notes on about one entry in five
+
+Entries are inserted in chunks with Core, like the importer does. The rollup
+is then rebuilt once at the end. Everyone shares one password hash, so
+seeding a million volunteers doesn't hash a million passwords.
+"""
+import random
+from datetime import date, time, timedelta
+from itertools import accumulate
+
+from sqlalchemy import func, insert, select
+from werkzeug.security import generate_password_hash
+
+from models import db, User, VolunteerEntry
+import events
+import rollups
+
+CHUNK_SIZE = 5000
+DAYS = 3 * 365
+
+FIRST_NAMES = ['Ava', 'Ben', 'Carmen', 'Dmitri', 'Elena', 'Farid', 'Grace', 'Hiro', 'Isla',
+               'Jamal', 'Kofi', 'Lena', 'Mateo', 'Nadia', 'Owen', 'Priya', 'Quinn', 'Rosa',
+               'Sam', 'Tariq', 'Uma', 'Victor', 'Wen', 'Ximena', 'Yusuf', 'Zoe']
+LAST_NAMES = ['Anderson', 'Brooks', 'Chen', 'Diaz', 'Evans', 'Fischer', 'Garcia', 'Hughes',
+              'Ibrahim', 'Jensen', 'Kim', 'Lopez', 'Murphy', 'Nguyen', "O'Brien", 'Patel',
+              'Rossi', 'Schmidt', 'Tanaka', 'Walker']
+EVENTS = ['Pancake Breakfast', 'Food Drive', 'Park Cleanup', 'Reading Buddies',
+          'Coat Drive', 'Holiday Toy Drive', 'Peanut Day', 'Key Club Meeting',
+          'Terrific Kids Assembly', 'Highway Cleanup', 'Blood Drive', 'Bike Rodeo',
+          'Senior Center Visit', 'Backpack Program', 'Golf Outing', 'Fish Fry',
+          'Community Garden', 'Book Fair', 'Scholarship Committee', 'Board Meeting',
+          'Christmas Tree Sale', 'Easter Egg Hunt', 'Fourth of July Parade',
+          'Habitat Build', 'Soup Kitchen', 'Eyeglass Collection', 'Swim Lessons',
+          'Trivia Night', 'Coffee with Cops', 'Shoe Drive']
+NOTES = ['Set up and tear down', 'Brought supplies', 'Drove the van', 'Ran the kitchen',
+         'Greeted guests', 'Handled the cash box', 'Led the youth group']
+
+
+def _users(rng, count, first_id, password_hash):
+    reporters = max(1, count // 100)
+    for user_id in range(first_id, first_id + count):
+        role = ('admin' if user_id == first_id else
+                'reporter' if user_id <= first_id + reporters else 'volunteer')
+        yield {'id': user_id,
+               'full_name': f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+               'username': f'bench{user_id}',
+               'email': f'bench{user_id}@example.com',
+               'role': role,
+               'password_hash': password_hash}
+
+
+def _entries(rng, count, user_ids, event_ids):
+    # Some volunteers show up far more often than others
+    cum_weights = list(accumulate(rng.paretovariate(1.5) for _ in user_ids))
+    event_weights = list(accumulate(1 / (rank + 1) for rank in range(len(EVENTS))))
+    first_day = date.today() - timedelta(days=DAYS)
+    for _ in range(count):
+        start = rng.randrange(7 * 4, 18 * 4)            # quarter hours
+        end = min(start + rng.randint(1, 24), 24 * 4 - 1)
+        event = rng.choices(EVENTS, cum_weights=event_weights)[0]
+        yield {'user_id': rng.choices(user_ids, cum_weights=cum_weights)[0],
+               'date': first_day + timedelta(days=rng.randrange(DAYS)),
+               'event': event,
+               'event_id': event_ids[event],
+               'start_time': time(start // 4, start % 4 * 15),
+               'end_time': time(end // 4, end % 4 * 15),
+               'total_hours': (end - start) / 4,
+               'notes': rng.choice(NOTES) if rng.random() < 0.2 else ''}
+
+
+def _insert(table, rows, chunk_size):
+    """Insert ``rows`` (dicts) into ``table``, one transaction per chunk."""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            db.session.execute(insert(table), chunk)
+            db.session.commit()
+            chunk = []
+    if chunk:
+        db.session.execute(insert(table), chunk)
+        db.session.commit()
+
+
+def seed(users, entries, password, random_seed=0, chunk_size=CHUNK_SIZE):
+    """
+    Add ``users`` volunteers (the first is an admin, one in a hundred are
+    reporters) and ``entries`` hours spread among them. Returns the first new
+    user id; usernames are ``bench<id>``.
+    """
+    rng = random.Random(random_seed)
+    first_id = (db.session.scalar(select(func.max(User.id))) or 0) + 1
+    password_hash = generate_password_hash(password)
+
+    _insert(User.__table__, _users(rng, users, first_id, password_hash), chunk_size)
+    user_ids = list(range(first_id, first_id + users))
+    event_ids = {name: event_id for event_id, name in events.intern_many(EVENTS).values()}
+    _insert(VolunteerEntry.__table__, _entries(rng, entries, user_ids, event_ids), chunk_size)
+
+    rollups.rebuild()
+    return first_id
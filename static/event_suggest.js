@@ -0,0 +1,20 @@
+// Autocomplete for event boxes: <input data-suggest="/events/suggest" list="...">
+// fills its <datalist> with the matching event names as the user types.
+document.querySelectorAll('input[data-suggest]').forEach(function (input) {
+  var list = document.getElementById(input.getAttribute('list'));
+  var timer;
+  input.addEventListener('input', function () {
+    clearTimeout(timer);
+    timer = setTimeout(function () {
+      fetch(input.dataset.suggest + '?q=' + encodeURIComponent(input.value))
+        .then(function (response) { return response.json(); })
+        .then(function (names) {
+          list.replaceChildren.apply(list, names.map(function (name) {
+            var option = document.createElement('option');
+            option.value = name;
+            return option;
+          }));
+        });
+    }, 150);
+  });
+});
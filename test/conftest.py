@@ -1,10 +1,118 @@
+import os
+os.environ.setdefault("FLASK_ENV", "testing")
+
+from contextlib import contextmanager
+from datetime import date as _date, time
+
 import pytest
-from app import app, db
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
+
+import querydebug
+import reportcache
+import rollups
+import usercache
+from app import create_app
+from models import db, User, VolunteerEntry
+
+# One cheap hash shared by every test user, so fixtures don't pay for scrypt.
+PASSWORD_HASH = generate_password_hash('pw', method='pbkdf2:sha256:1')
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'allow_n_plus_one: the test means to repeat a query')
+
+
+@pytest.fixture(autouse=True)
+def no_n_plus_one(request):
+    """Fail any test during which a request ran the same statement too often."""
+    querydebug.take_problems()
+    yield
+    found = querydebug.take_problems()
+    if found and not request.node.get_closest_marker('allow_n_plus_one'):
+        pytest.fail('N+1 queries:\n' + '\n'.join(
+            f'  {endpoint}: {times}x {statement}' for endpoint, statement, times in found))
 
 @pytest.fixture
-def client(tmp_path):
-    app.config.from_object("config.TestingConfig")
+def app(tmp_path):
+    """A fresh app per test, with its own in-memory database."""
+    app = create_app("config.TestingConfig")
+    app.config['IMPORT_ERRORS_DIR'] = tmp_path / 'import_errors'
+    app.config['USER_CACHE_STAMP'] = tmp_path / 'user_cache.stamp'
+    usercache.clear()   # ids are reused by every test's fresh database
     with app.app_context():
         db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
     with app.test_client() as client:
         yield client
+
+
+@pytest.fixture
+def make_user(app, client):
+    """Create a user (password 'pw') and return its id."""
+    def _make(username, role='volunteer', full_name=None):
+        with app.app_context():
+            user = User(full_name=full_name or username.title(),
+                        username=username,
+                        email=f'{username}@example.com',
+                        role=role,
+                        password_hash=PASSWORD_HASH)
+            db.session.add(user)
+            db.session.commit()
+            return user.id
+    return _make
+
+
+@pytest.fixture
+def make_entries(app):
+    """Insert ``count`` entries for ``user_id`` and return nothing."""
+    def _make(user_id, count, date='2024-05-01', hours=1.5, event='Pancake Breakfast'):
+        with app.app_context():
+            entries = [
+                VolunteerEntry(user_id=user_id, date=_date.fromisoformat(date),
+                               event=event, start_time=time(8), end_time=time(9, 30),
+                               total_hours=hours, notes='')
+                for _ in range(count)
+            ]
+            db.session.add_all(entries)
+            rollups.record(*entries)
+            reportcache.bump()
+            db.session.commit()
+    return _make
+
+
+def login(client, username):
+    return client.post('/login', data={'username': username, 'password': 'pw'})
+
+
+@pytest.fixture
+def count_queries(app):
+    """
+    Context manager that counts SQL statements sent to the engine::
+
+        with count_queries() as queries:
+            client.get('/report')
+        assert len(queries) == 2
+    """
+    @contextmanager
+    def _count():
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+    return _count
@@ -0,0 +1,36 @@
+from conftest import login
+from models import VolunteerEntry
+
+
+def _bulk_form(volunteers):
+    return {'event': 'Service Day', 'date': '2024-06-01', 'start_time': '08:00',
+            'end_time': '12:00', 'notes': '', 'volunteers': volunteers}
+
+
+def test_bulk_add_reports_unknown_ids(app, client, make_user):
+    make_user('rita', role='reporter')
+    alice, bob = make_user('alice'), make_user('bob')
+    login(client, 'rita')
+
+    resp = client.post('/bulk-add-hours', data=_bulk_form([str(alice), '999', 'x', str(bob)]),
+                       follow_redirects=True)
+
+    html = resp.get_data(as_text=True)
+    assert 'Skipped unknown volunteer IDs: 999, x' in html
+    with app.app_context():
+        rows = VolunteerEntry.query.order_by(VolunteerEntry.user_id).all()
+        assert [(e.user_id, e.name, e.total_hours) for e in rows] == [
+            (alice, 'Alice', 4.0), (bob, 'Bob', 4.0)]
+
+
+def test_bulk_add_statement_count_is_flat(client, make_user, count_queries):
+    make_user('rita', role='reporter')
+    ids = [str(make_user(f'vol{i}')) for i in range(40)]
+    login(client, 'rita')
+    client.post('/bulk-add-hours', data=_bulk_form(ids[:1]))   # creates the event
+
+    with count_queries() as few:
+        client.post('/bulk-add-hours', data=_bulk_form(ids[:2]))
+    with count_queries() as many:
+        client.post('/bulk-add-hours', data=_bulk_form(ids))
+    assert len(few) == len(many)
@@ -0,0 +1,95 @@
+import pytest
+
+from conftest import login
+
+ARGS = '?start_date=2024-01-01&end_date=2024-12-31'
+
+
+def get(client, url, **headers):
+    """GET ``url`` and read the body, so streamed exports finish."""
+    response = client.get(url, headers={k.replace('_', '-'): v for k, v in headers.items()})
+    response.get_data()
+    return response
+
+
+@pytest.mark.parametrize('url', ['/report/export/xlsx', '/report/export/xlsx_totals',
+                                 '/report/export/xlsx_events', '/report/export/csv',
+                                 '/report/export/ndjson', '/report', '/report/pivot',
+                                 '/report/export/xlsx_pivot'])
+def test_unchanged_report_gets_304_without_running(
+        client, make_user, make_entries, count_queries, url):
+    make_user('rita', role='reporter')
+    alice = make_user('alice')
+    make_entries(alice, 3)
+    login(client, 'rita')
+
+    first = get(client, url + ARGS)
+    etag = first.headers['ETag']
+    assert first.status_code == 200 and first.headers['Last-Modified']
+
+    with count_queries() as queries:
+        again = get(client, url + ARGS, If_None_Match=etag)
+    assert again.status_code == 304 and again.get_data() == b''
+    # user loader + write generation only
+    assert len(queries) == 2
+
+    # Another range is a different resource
+    other = get(client, url + '?start_date=2023-01-01&end_date=2023-12-31',
+                If_None_Match=etag)
+    assert other.status_code == 200
+
+    make_entries(alice, 1)
+    changed = get(client, url + ARGS, If_None_Match=etag)
+    assert changed.status_code == 200 and changed.headers['ETag'] != etag
+
+
+def test_report_get_runs_the_report(client, make_user, make_entries):
+    make_user('rita', role='reporter')
+    make_entries(make_user('alice', full_name='Alice Smith'), 2, hours=1.5)
+    login(client, 'rita')
+
+    html = client.get('/report' + ARGS).get_data(as_text=True)
+    assert 'Alice Smith' in html and '3.0' in html
+    assert 'Alice Smith' not in client.get('/report').get_data(as_text=True)
+
+
+def test_summary_validator_is_per_user(client, make_user, make_entries):
+    for name in ('ann', 'bob'):
+        make_entries(make_user(name), 1)
+    login(client, 'ann')
+    ann = client.get('/summary')
+    assert client.get('/summary', headers={'If-None-Match': ann.headers['ETag']}).status_code == 304
+
+    login(client, 'bob')
+    assert client.get('/summary', headers={'If-None-Match': ann.headers['ETag']}).status_code == 200
+    # Last-Modified alone can't tell ann's page from bob's
+    assert client.get('/summary', headers={
+        'If-Modified-Since': ann.headers['Last-Modified']}).status_code == 200
+
+
+def test_if_modified_since_is_honoured_for_exports(client, make_user, make_entries):
+    make_user('rita', role='reporter')
+    make_entries(make_user('alice'), 1)
+    login(client, 'rita')
+
+    first = get(client, '/report/export/csv' + ARGS)
+    again = get(client, '/report/export/csv' + ARGS,
+                If_Modified_Since=first.headers['Last-Modified'])
+    assert again.status_code == 304
+
+
+def test_event_report_page_validator_is_per_user(client, make_user, make_entries):
+    make_user('rita', role='reporter', full_name='Rita Reed')
+    make_user('ray', role='reporter', full_name='Ray Ruiz')
+    make_entries(make_user('alice'), 1)
+    login(client, 'rita')
+    rita = client.get('/report/events' + ARGS)
+    assert client.get('/report/events' + ARGS,
+                      headers={'If-None-Match': rita.headers['ETag']}).status_code == 304
+
+    # The page carries the signed-in user's name and menu, so ray never gets rita's
+    login(client, 'ray')
+    assert client.get('/report/events' + ARGS,
+                      headers={'If-None-Match': rita.headers['ETag']}).status_code == 200
+    assert client.get('/report/events' + ARGS, headers={
+        'If-Modified-Since': rita.headers['Last-Modified']}).status_code == 200
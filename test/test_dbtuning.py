@@ -0,0 +1,49 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from sqlalchemy import create_engine, text
+
+import dbtuning
+from config import SQLITE_TUNED_PRAGMAS
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_tuned_pragmas_are_set_on_every_connection(tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path}/tuned.db')
+    dbtuning.configure(engine, SQLITE_TUNED_PRAGMAS)
+    with engine.connect() as conn:
+        pragma = lambda name: conn.execute(text(f'PRAGMA {name}')).scalar()
+        assert pragma('journal_mode') == 'wal'
+        assert pragma('synchronous') == 1   # NORMAL
+        assert pragma('busy_timeout') == 10000
+        assert pragma('cache_size') == -65536
+
+
+def test_forked_child_gets_a_fresh_pool(tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path}/fork.db')
+    dbtuning.configure(engine, {})
+    with engine.connect() as conn:
+        conn.execute(text('SELECT 1'))
+    parent_pool = engine.pool
+
+    pid = os.fork()
+    if pid == 0:
+        os._exit(0 if engine.pool is not parent_pool else 1)
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert engine.pool is parent_pool
+
+
+def test_mixed_load_across_workers_never_fails():
+    out = subprocess.run(
+        [sys.executable, str(ROOT / 'bench' / 'concurrency.py'), '--modes', 'tuned',
+         '--workers', '3', '--seconds', '2', '--entries', '2000'],
+        check=True, capture_output=True, text=True, timeout=120).stdout
+    result = json.loads(out)['tuned']
+    assert result['journal_mode'] == 'wal'
+    assert result['failures'] == {}
+    assert result['reads_per_s'] > 0 and result['writes_per_s'] > 0
@@ -0,0 +1,62 @@
+import rollups
+from conftest import login
+from models import db, Event, VolunteerEntry
+
+
+def _log(client, event, start='08:00', end='10:00'):
+    return client.post('/log', data={'date': '2024-05-01', 'event': event, 'start': start,
+                                     'end': end, 'notes': ''})
+
+
+def test_entries_share_one_event_however_typed(app, client, make_user):
+    make_user('rita', role='reporter')
+    login(client, 'rita')
+    _log(client, 'Pancake Breakfast')
+    _log(client, '  pancake   BREAKFAST ', end='09:00')
+    _log(client, 'Food Drive')
+
+    with app.app_context():
+        entries = VolunteerEntry.query.order_by(VolunteerEntry.id).all()
+        assert [e.event for e in entries] == ['Pancake Breakfast'] * 2 + ['Food Drive']
+        assert entries[0].event_id == entries[1].event_id != entries[2].event_id
+        assert Event.query.count() == 2
+
+    assert client.get('/events/suggest?q=pan').get_json() == ['Pancake Breakfast']
+    assert client.get('/events/suggest?q=BREAK').get_json() == ['Pancake Breakfast']
+    assert client.get('/events/suggest?q=d').get_json() == ['Food Drive']
+    assert client.get('/events/suggest?q=').get_json() == []
+
+    html = client.get('/report/events?start_date=2024-05-01&end_date=2024-05-31') \
+        .get_data(as_text=True)
+    assert html.index('Pancake Breakfast') < html.index('Food Drive')
+    assert '<td>3.0</td>' in html and '<td>2</td>' in html
+
+
+def test_backfill_links_and_merges_old_entries(app, client, make_user, make_entries):
+    alice = make_user('alice')
+    make_entries(alice, 3, event='Pancake Breakfast')
+    make_entries(alice, 1, event='pancake  breakfast')
+    make_entries(alice, 2, event='Pancake Bkfst')
+    make_entries(alice, 1, event='')
+    runner = app.test_cli_runner()
+
+    result = runner.invoke(args=['backfill-events', '--merge', 'Pancake Bkfst=Pancake Breakfast',
+                                 '--batch-size', '2', '--pause', '0'])
+    assert 'Created 2 events, merged 1, updated 6 entries.' in result.output
+    with app.app_context():
+        linked = VolunteerEntry.query.filter(VolunteerEntry.event != '').all()
+        assert {(e.event, e.event_id) for e in linked} == {
+            ('Pancake Breakfast', Event.query.filter_by(key='pancake breakfast').one().id)}
+        assert VolunteerEntry.query.filter_by(event='').one().event_id is None
+        assert rollups.verify() == []
+
+    result = runner.invoke(args=['backfill-events', '--pause', '0'])
+    assert 'Created 0 events, merged 0, updated 0 entries.' in result.output
+
+    # The merged spelling still means the event it was merged into
+    login(client, 'alice')
+    _log(client, 'pancake bkfst')
+    with app.app_context():
+        assert set(db.session.scalars(db.select(VolunteerEntry.event))) == {
+            'Pancake Breakfast', ''}
+    assert client.get('/events/suggest?q=pancake').get_json() == ['Pancake Breakfast']
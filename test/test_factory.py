@@ -0,0 +1,36 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from app import create_app
+from config import TestingConfig
+from models import db, User
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_apps_are_independent(app):
+    other = create_app(TestingConfig)
+    assert other is not app
+    with other.app_context():
+        db.create_all()
+        db.session.add(User(full_name='Ann', username='ann', email='ann@example.com',
+                            password_hash='x'))
+        db.session.commit()
+    with app.app_context():
+        assert User.query.count() == 0
+    assert sorted(other.view_functions) == sorted(app.view_functions)
+    assert 'init-db' in other.cli.commands
+
+
+def test_startup_leaves_export_machinery_unloaded():
+    code = ('import sys; from app import app; '
+            'import json; print(json.dumps(sorted(m for m in '
+            '("exports", "openpyxl", "pandas", "sqlalchemy.dialects.postgresql") '
+            'if m in sys.modules)))')
+    env = dict(os.environ, FLASK_ENV='testing')
+    out = subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env,
+                         check=True, capture_output=True, text=True).stdout
+    assert json.loads(out) == []
@@ -0,0 +1,107 @@
+import re
+from datetime import date
+
+import fulltext
+from conftest import login
+from models import db, VolunteerEntry
+
+
+def _add(app, user_id, event, notes, day='2024-05-01'):
+    with app.app_context():
+        entry = VolunteerEntry(user_id=user_id, date=date.fromisoformat(day), event=event,
+                               total_hours=1.0, notes=notes)
+        db.session.add(entry)
+        db.session.commit()
+        return entry.id
+
+
+def _notes(html):
+    return re.findall(r'<td>(n\d+)[^<]*</td>', html)
+
+
+def _link(html, label):
+    match = re.search(r'href="([^"#]+)">\s*' + label, html)
+    return match.group(1).replace('&amp;', '&') if match else None
+
+
+def test_search_is_ranked_and_kept_in_sync(app, client, make_user):
+    make_user('root', role='admin')
+    alice = make_user('alice')
+    in_notes = _add(app, alice, 'Food Drive', 'n1 sorted pancake mix')
+    in_event = _add(app, alice, 'Pancake Breakfast', 'n2 setup crew')
+    unrelated = _add(app, alice, 'Park Cleanup', 'n3 raked leaves')
+    login(client, 'root')
+
+    def search(q):
+        return _notes(client.get(f'/admin/entries?q={q}').get_data(as_text=True))
+
+    assert search('pancake') == ['n2', 'n1']        # an event hit outranks a notes hit
+    assert search('pancakes crew') == ['n2']        # every word, stemmed
+    assert search('breakfast&user_id=999') == []
+
+    with app.app_context():
+        db.session.get(VolunteerEntry, unrelated).notes = 'n3 flipped pancakes'
+        db.session.get(VolunteerEntry, in_notes).event = 'Pancake Breakfast'
+        db.session.commit()
+    assert search('pancake') == ['n1', 'n2', 'n3']
+    assert search('raked') == []
+
+    client.post(f'/entry/{in_event}/delete')
+    assert search('pancake') == ['n1', 'n3']
+
+
+def test_search_pages_and_stays_within_the_volunteer(app, client, make_user):
+    alice, bob = make_user('alice'), make_user('bob')
+    for i in range(7):
+        _add(app, alice, 'Food Drive', f'n{i} canned goods')
+    _add(app, bob, 'Food Drive', 'n9 canned goods')
+    login(client, 'alice')
+
+    first = client.get('/?q=canned&per_page=3').get_data(as_text=True)
+    second = client.get(_link(first, 'Older →')).get_data(as_text=True)
+    third = client.get(_link(second, 'Older →')).get_data(as_text=True)
+    found = _notes(first) + _notes(second) + _notes(third)
+    assert sorted(found) == [f'n{i}' for i in range(7)]
+    assert 'q=canned' in _link(second, '← Newer') and _link(third, 'Older →') is None
+    back = client.get(_link(third, '← Newer')).get_data(as_text=True)
+    assert _notes(back) == _notes(second)
+
+
+def test_rebuild_restores_the_index(app, make_user):
+    alice = make_user('alice')
+    _add(app, alice, 'Coat Drive', 'n1 sorted coats')
+    with app.app_context():
+        with db.engine.begin() as conn:
+            conn.exec_driver_sql(f'DROP TABLE {fulltext.TABLE}')
+        assert fulltext.install()
+        assert not fulltext.install()
+    result = app.test_cli_runner().invoke(args=['rebuild-search'])
+    assert 'Rebuilt the full-text search index' in result.output
+    with app.app_context():
+        page = fulltext.paginate(VolunteerEntry.query, 'coats', {})
+        assert [e.notes for e in page.entries] == ['n1 sorted coats']
+
+
+def test_matches_past_the_ranked_window_follow_by_date(app, client, make_user, monkeypatch):
+    monkeypatch.setattr(fulltext, 'RANK_WINDOW', 5)
+    alice = make_user('alice')
+    for i in range(12):
+        _add(app, alice, 'Food Drive', f'n{i} canned goods', day=f'2024-05-{28 - i:02d}')
+    _add(app, alice, 'Food Drive', 'n99 raked leaves')
+    login(client, 'alice')
+
+    pages = [client.get('/?q=canned&per_page=3').get_data(as_text=True)]
+    while _link(pages[-1], 'Older →'):
+        pages.append(client.get(_link(pages[-1], 'Older →')).get_data(as_text=True))
+    found = [n for html in pages for n in _notes(html)]
+    assert sorted(found) == sorted(f'n{i}' for i in range(12))
+    # The newest five are ranked; the other seven follow, newest first
+    assert sorted(found[:5]) == ['n10', 'n11', 'n7', 'n8', 'n9']
+    assert found[5:] == [f'n{i}' for i in range(7)]
+
+    back = []
+    html = pages[-1]
+    while _link(html, '← Newer'):
+        html = client.get(_link(html, '← Newer')).get_data(as_text=True)
+        back = _notes(html) + back
+    assert back + _notes(pages[-1]) == found
@@ -0,0 +1,88 @@
+import csv
+import io
+
+from conftest import login
+from models import HoursRollup, VolunteerEntry
+
+
+def test_csv_upload_imports_good_rows_and_returns_errors(app, client, make_user):
+    make_user('rita', role='reporter')
+    alice = make_user('alice', full_name='Alice Smith')
+    make_user('al1', full_name='Al Jones')
+    make_user('al2', full_name='Al Jones')
+    login(client, 'rita')
+    sheet = (
+        'Volunteer,Date,Event,Start,End,Hours,Notes\n'
+        'alice,2024-05-01,Food Drive,08:00,10:00,,setup\n'
+        '  alice SMITH ,2024-05-02,Food Drive,,,1.5,\n'
+        'alice@example.com,2024-05-03,Food Drive,09:00,09:30,,\n'
+        'Al Jones,2024-05-01,Food Drive,08:00,10:00,,\n'
+        'nobody,2024-05-01,Food Drive,08:00,10:00,,\n'
+        'alice,May 1st,Food Drive,08:00,10:00,,\n'
+    )
+
+    resp = client.post('/import-hours', data={
+        'file': (io.BytesIO(sheet.encode()), 'signin.csv')})
+    html = resp.get_data(as_text=True)
+
+    assert 'Imported 3 entries.' in html
+    assert '3 rows could not be imported' in html
+    with app.app_context():
+        assert sorted(e.total_hours for e in VolunteerEntry.query) == [0.5, 1.5, 2.0]
+        assert {e.user_id for e in VolunteerEntry.query} == {alice}
+        assert sum(r.entries for r in HoursRollup.query) == 3
+
+    token = html.split('/import-hours/errors/')[1].split('.csv')[0]
+    errors = list(csv.reader(io.StringIO(
+        client.get(f'/import-hours/errors/{token}.csv').get_data(as_text=True))))
+    assert [row[0] for row in errors[1:]] == ['5', '6', '7']
+    assert 'More than one volunteer' in errors[1][1]
+    assert client.get('/import-hours/errors/..%2Fvolunteer.csv').status_code == 404
+
+
+def test_xlsx_export_imports_back(app, client, make_user, make_entries):
+    make_user('rita', role='reporter')
+    make_entries(make_user('alice', full_name='Alice Smith'), 3, hours=1.5)
+    login(client, 'rita')
+    export = client.get('/report/export/xlsx?start_date=2024-01-01&end_date=2024-12-31')
+
+    resp = client.post('/import-hours', data={
+        'file': (io.BytesIO(export.get_data()), 'report.xlsx')}, follow_redirects=True)
+
+    assert 'Imported 3 entries.' in resp.get_data(as_text=True)
+    with app.app_context():
+        assert VolunteerEntry.query.count() == 6
+
+
+def test_upload_without_required_columns_is_rejected(client, make_user):
+    make_user('rita', role='reporter')
+    login(client, 'rita')
+    resp = client.post('/import-hours', data={
+        'file': (io.BytesIO(b'Event,Hours\nFood Drive,2\n'), 'signin.csv')},
+        follow_redirects=True)
+    assert 'Missing required column(s): volunteer, date' in resp.get_data(as_text=True)
+
+
+def test_legacy_csv_import_skips_rows_already_imported(app, make_user, tmp_path):
+    make_user('alice', full_name='Alice Smith')
+    legacy = tmp_path / 'volunteer_hours.csv'
+    app.config['LEGACY_CSV'] = legacy
+    header = 'Date,Volunteer Name,Event,Start Time,End Time,Total Hours,Notes\n'
+    row = '2024-05-01,Alice Smith,Food Drive,08:00,10:00,2.0,\n'
+    legacy.write_text(header + row + '2024-05-02,alice  smith,Food Drive,09:00,10:00,1.0,x\n'
+                      + row.upper() + '2024-05-01,Nobody,Food Drive,08:00,10:00,2.0,\n')
+    runner = app.test_cli_runner()
+
+    result = runner.invoke(args=['import-legacy-csv', '--chunk-size', '2'])
+    assert 'Imported 2 entries.' in result.output
+    assert 'Skipped 1 rows imported before.' in result.output
+    assert '1 rows could not be imported' in result.output
+
+    with legacy.open('a') as f:
+        f.write('2024-05-03,Alice Smith,Food Drive,08:00,09:00,1.0,\n')
+    result = runner.invoke(args=['import-legacy-csv', str(legacy)])
+    assert 'Imported 1 entries.' in result.output
+    assert 'Skipped 3 rows imported before.' in result.output
+    with app.app_context():
+        assert sorted(e.total_hours for e in VolunteerEntry.query) == [1.0, 1.0, 2.0]
+        assert sum(r.hours for r in HoursRollup.query) == 4.0
@@ -0,0 +1,172 @@
+import socketserver
+import threading
+import time
+from datetime import timedelta
+
+import pytest
+
+import mailqueue
+from models import db, OutboundMail
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    """
+    A local SMTP server that accepts mail into ``messages``, in the spirit of
+    aiosmtpd's Sink handler. Addresses in ``refuse`` get a 550; while
+    ``drop`` is set, connections are closed straight after the greeting.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), SMTPHandler)
+        self.messages = []
+        self.connections = 0
+        self.refuse = set()
+        self.drop = False
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        server = self.server
+        server.connections += 1
+        self.reply('220 sink ready')
+        if server.drop:
+            return
+        rcpt = []
+        for raw in self.rfile:
+            command = raw.decode().strip()
+            verb = command[:4].upper()
+            if verb in ('EHLO', 'HELO'):
+                self.reply('250 sink')
+            elif verb == 'MAIL':
+                rcpt = []
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                address = command.split(':', 1)[1].strip('<> ')
+                if address in server.refuse:
+                    self.reply('550 no such user')
+                else:
+                    rcpt.append(address)
+                    self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 go ahead')
+                lines = []
+                for data in self.rfile:
+                    if data == b'.\r\n':
+                        break
+                    lines.append(data)
+                server.messages.append((rcpt, b''.join(lines)))
+                self.reply('250 queued')
+            elif verb == 'QUIT':
+                self.reply('221 bye')
+                return
+            else:
+                self.reply('250 OK')
+
+
+@pytest.fixture
+def smtp(app, client, monkeypatch):
+    sink = SMTPSink()
+    threading.Thread(target=sink.serve_forever, daemon=True).start()
+    state = app.extensions['mail']
+    monkeypatch.setattr(state, 'server', '127.0.0.1')
+    monkeypatch.setattr(state, 'port', sink.server_address[1])
+    monkeypatch.setattr(state, 'use_tls', False)
+    monkeypatch.setattr(state, 'use_ssl', False)
+    monkeypatch.setattr(state, 'username', None)
+    monkeypatch.setattr(state, 'suppress', False)
+    monkeypatch.setitem(app.config, 'MAIL_DEFAULT_SENDER', 'noreply@example.com')
+    yield sink
+    sink.shutdown()
+    sink.server_close()
+
+
+def queue(app, *addresses):
+    with app.app_context():
+        for address in addresses:
+            mailqueue.enqueue('Hello', [address], 'Hi there')
+
+
+def statuses(app):
+    with app.app_context():
+        return [m.status for m in OutboundMail.query.order_by(OutboundMail.id)]
+
+
+def test_forgot_password_only_enqueues(app, client, smtp, make_user):
+    make_user('ann')
+    resp = client.post('/forgot-password', data={'email': 'ann@example.com'})
+    assert resp.status_code == 302
+    assert smtp.connections == 0
+    assert statuses(app) == ['pending']
+
+    with app.app_context():
+        assert mailqueue.drain() == {'sent': 1, 'retry': 0, 'dead': 0}
+    rcpt, data = smtp.messages[0]
+    assert rcpt == ['ann@example.com']
+    assert b'/reset-password/' in data
+
+
+def test_drain_sends_a_batch_over_one_connection(app, smtp):
+    queue(app, 'a@example.com', 'b@example.com', 'c@example.com')
+    with app.app_context():
+        assert mailqueue.drain() == {'sent': 3, 'retry': 0, 'dead': 0}
+        assert mailqueue.drain() == {'sent': 0, 'retry': 0, 'dead': 0}
+    assert smtp.connections == 1
+    assert [rcpt for rcpt, _ in smtp.messages] == [['a@example.com'], ['b@example.com'],
+                                                  ['c@example.com']]
+    assert statuses(app) == ['sent'] * 3
+
+
+def make_due():
+    OutboundMail.query.update({'next_attempt_at': mailqueue._now() - timedelta(seconds=1)})
+    db.session.commit()
+
+
+def test_failures_back_off_then_dead_letter(app, smtp):
+    app.config['MAIL_QUEUE_MAX_ATTEMPTS'] = 3
+    smtp.refuse.add('gone@example.com')
+    smtp.drop = True
+    queue(app, 'a@example.com', 'gone@example.com', 'b@example.com')
+
+    with app.app_context():
+        assert mailqueue.drain() == {'sent': 0, 'retry': 3, 'dead': 0}
+        row = db.session.get(OutboundMail, 1)
+        assert row.attempts == 1 and 'SMTPServerDisconnected' in row.last_error
+        assert row.next_attempt_at > mailqueue._now() + timedelta(seconds=25)
+        # Not due again until the backoff has passed
+        assert mailqueue.drain() == {'sent': 0, 'retry': 0, 'dead': 0}
+
+        # A refused recipient is dead at once; the others get through
+        smtp.drop = False
+        make_due()
+        assert mailqueue.drain() == {'sent': 2, 'retry': 0, 'dead': 1}
+    assert statuses(app) == ['sent', 'dead', 'sent']
+
+
+def test_gives_up_after_max_attempts(app, smtp):
+    app.config['MAIL_QUEUE_MAX_ATTEMPTS'] = 2
+    smtp.drop = True
+    queue(app, 'a@example.com')
+    with app.app_context():
+        assert mailqueue.drain()['retry'] == 1
+        make_due()
+        assert mailqueue.drain()['dead'] == 1
+    assert statuses(app) == ['dead']
+
+
+def test_worker_pool_sends_in_the_background(app, smtp):
+    queue(app, 'a@example.com', 'b@example.com')
+    # One thread: the in-memory test database is a single shared connection
+    pool = mailqueue.start_workers(app, 1)
+    try:
+        deadline = time.monotonic() + 5
+        while len(smtp.messages) < 2 and time.monotonic() < deadline:
+            time.sleep(0.02)
+    finally:
+        mailqueue.stop_workers(timeout=5)
+    assert not any(t.is_alive() for t in pool._threads)
+    assert len(smtp.messages) == 2
@@ -0,0 +1,112 @@
+import os
+import re
+
+import pytest
+
+import metrics
+from conftest import login
+
+
+@pytest.fixture
+def fresh(app):
+    app.config['METRICS_ALLOW_LOCAL'] = True   # scrape() comes from 127.0.0.1
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+def sample(text, name, **labels):
+    """The value of the series ``name`` with (at least) ``labels``."""
+    for line in text.splitlines():
+        match = re.fullmatch(rf'{name}\{{(.*)\}} (\S+)', line)
+        if match and all(f'{k}="{v}"' in match.group(1) for k, v in labels.items()):
+            return float(match.group(2))
+    return None
+
+
+def scrape(client):
+    with client.get('/metrics') as response:
+        assert response.status_code == 200
+        return response.get_data(as_text=True)
+
+
+def test_requests_are_timed_sized_and_counted(fresh, client, make_user, make_entries):
+    make_user('rita', role='reporter')
+    make_entries(make_user('alice'), 3)
+    login(client, 'rita')
+    for _ in range(2):
+        with client.get('/summary') as response:
+            body = response.get_data()
+    with client.get('/report/export/csv?start_date=2024-01-01&end_date=2024-12-31') as export:
+        csv = export.get_data()
+    with client.get('/report/export/xlsx?start_date=2024-01-01&end_date=2024-12-31') as export:
+        xlsx = export.get_data()
+
+    text = scrape(client)
+    summary = {'endpoint': 'summary', 'method': 'GET', 'status': '200'}
+    assert sample(text, 'kiwanis_http_request_duration_seconds_count', **summary) == 2
+    assert sample(text, 'kiwanis_http_request_duration_seconds_bucket',
+                  le='+Inf', **summary) == 2
+    assert sample(text, 'kiwanis_http_response_size_bytes_sum', **summary) == 2 * len(body)
+    # user loader + write generation + summary query, per request
+    assert sample(text, 'kiwanis_sql_statements_total', **summary) == 6
+    assert sample(text, 'kiwanis_sql_duration_seconds_total', **summary) > 0
+
+    # A streamed export is measured up to its last byte
+    assert sample(text, 'kiwanis_http_response_size_bytes_sum',
+                  endpoint='export_csv') == len(csv)
+    assert sample(text, 'kiwanis_sql_statements_total', endpoint='export_csv') == 3
+    # So is a workbook sent as a file
+    assert sample(text, 'kiwanis_http_response_size_bytes_sum',
+                  endpoint='export_xlsx') == len(xlsx)
+
+
+def test_user_cache_hits_and_misses_are_exported(fresh, app, client, make_user):
+    app.config['USER_CACHE_TTL'] = 60
+    make_user('vera')
+    login(client, 'vera')
+    for _ in range(3):
+        client.get('/')
+    text = scrape(client)
+    # The first page loads vera from the database; the next two find her cached
+    assert re.search(r'^kiwanis_user_cache_misses_total 1$', text, re.M)
+    assert re.search(r'^kiwanis_user_cache_hits_total 2$', text, re.M)
+
+
+def test_only_localhost_and_admins_may_scrape(fresh, app, client, make_user):
+    remote = {'REMOTE_ADDR': '203.0.113.9'}
+    assert client.get('/metrics', environ_base=remote).status_code == 403
+    # A visitor relayed by a proxy on this machine isn't local
+    assert client.get('/metrics', headers={'X-Forwarded-For': '203.0.113.9'}).status_code == 403
+    assert client.get('/metrics', headers={'Forwarded': 'for=203.0.113.9'}).status_code == 403
+    app.config['METRICS_ALLOW_LOCAL'] = False
+    assert client.get('/metrics').status_code == 403
+    make_user('vera')
+    login(client, 'vera')
+    assert client.get('/metrics', environ_base=remote).status_code == 403
+    make_user('root', role='admin')
+    login(client, 'root')
+    assert client.get('/metrics', environ_base=remote).status_code == 200
+
+
+def test_workers_are_added_up_through_the_directory(fresh, app, client, tmp_path,
+                                                    monkeypatch):
+    monkeypatch.setattr(metrics, '_directory', str(tmp_path))
+    with client.get('/login'):
+        pass
+
+    pid = os.fork()
+    if pid == 0:
+        # A second worker: starts from zero, serves two requests, exits
+        with app.test_client() as child:
+            for _ in range(2):
+                with child.get('/login'):
+                    pass
+        metrics.flush()
+        os._exit(0)
+    os.waitpid(pid, 0)
+
+    text = scrape(client)
+    assert len(list(tmp_path.glob('*.json'))) == 2
+    assert sample(text, 'kiwanis_http_request_duration_seconds_count',
+                  endpoint='login') == 3
@@ -0,0 +1,52 @@
+from datetime import date, time
+
+from sqlalchemy import text
+
+import migrations
+import reportcache
+from models import db, VolunteerEntry
+
+
+def test_convert_entry_types_rewrites_legacy_strings(app, client, make_user):
+    uid = make_user('alice')
+    legacy = [
+        ('2024-05-01', '08:00', '09:30'),
+        ('5/2/2024',   '1:00 PM', '14:15:00'),
+        ('someday',    '08:00', 'late'),
+        ('2024-05-03', '10:00:00.000000', '11:00:00.000000'),
+    ]
+    with app.app_context():
+        for d, s, e in legacy:
+            db.session.execute(text(
+                'INSERT INTO volunteer_entry (user_id, date, start_time, end_time, total_hours) '
+                'VALUES (:u, :d, :s, :e, 1)'), {'u': uid, 'd': d, 's': s, 'e': e})
+        db.session.commit()
+
+        before = reportcache.generation()
+        stats = migrations.convert_entry_types(batch_size=2, echo=lambda msg: None)
+        assert stats == {'scanned': 4, 'updated': 3, 'cleared': 1}
+        assert reportcache.generation() > before   # cached reports saw the old dates
+
+        rows = [(e.date, e.start_time, e.end_time)
+                for e in VolunteerEntry.query.order_by(VolunteerEntry.id)]
+        assert rows == [
+            (date(2024, 5, 1), time(8), time(9, 30)),
+            (date(2024, 5, 2), time(13), time(14, 15)),
+            (None, time(8), None),
+            (date(2024, 5, 3), time(10), time(11)),
+        ]
+        # Second run has nothing left to do
+        assert migrations.convert_entry_types(echo=lambda msg: None)['updated'] == 0
+
+
+def test_add_missing_columns_adds_nullable_columns(app, client):
+    with app.app_context():
+        db.session.execute(text('DROP TABLE cache_generation'))
+        db.session.execute(text(
+            'CREATE TABLE cache_generation (name VARCHAR(50) PRIMARY KEY, value BIGINT NOT NULL)'))
+        db.session.commit()
+
+        assert migrations.add_missing_columns() == ['cache_generation.changed_at']
+        assert migrations.add_missing_columns() == []
+        columns = db.session.execute(text('PRAGMA table_info(cache_generation)')).all()
+        assert 'changed_at' in [c.name for c in columns]
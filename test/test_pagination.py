@@ -0,0 +1,62 @@
+import re
+
+from conftest import login
+
+
+def _dates(html):
+    return re.findall(r'<td>(\d{4}-\d{2}-\d{2})</td>', html)
+
+
+def _link(html, label):
+    match = re.search(r'href="([^"#]+)">\s*' + label, html)
+    return match.group(1).replace('&amp;', '&') if match else None
+
+
+def test_index_walks_pages_forward_and_back(client, make_user, make_entries):
+    uid = make_user('alice')
+    for day in range(1, 8):
+        make_entries(uid, 1, date=f'2024-05-0{day}')
+    make_entries(uid, 1, date='2024-05-07')
+    login(client, 'alice')
+
+    first = client.get('/?per_page=3').get_data(as_text=True)
+    assert _dates(first) == ['2024-05-07', '2024-05-07', '2024-05-06']
+    assert _link(first, '← Newer') is None
+
+    second = client.get(_link(first, 'Older →')).get_data(as_text=True)
+    assert _dates(second) == ['2024-05-05', '2024-05-04', '2024-05-03']
+
+    third = client.get(_link(second, 'Older →')).get_data(as_text=True)
+    assert _dates(third) == ['2024-05-02', '2024-05-01']
+    assert _link(third, 'Older →') is None
+
+    back = client.get(_link(third, '← Newer')).get_data(as_text=True)
+    assert _dates(back) == _dates(second)
+    assert _dates(client.get(_link(back, '← Newer')).get_data(as_text=True)) == _dates(first)
+
+
+def test_admin_entries_filters_and_page_cost(app, client, make_user, make_entries,
+                                             count_queries):
+    make_user('root', role='admin')
+    alice, bob = make_user('alice'), make_user('bob')
+    make_entries(alice, 30, date='2024-03-01', event='Food Drive')
+    make_entries(bob, 30, date='2024-04-01', event='Pancake Breakfast')
+    app.test_cli_runner().invoke(args=['backfill-events', '--pause', '0'])
+    login(client, 'root')
+
+    html = client.get(f'/admin/entries?user_id={bob}&start_date=2024-04-01'
+                      '&event=Pancake+Breakfast&per_page=10').get_data(as_text=True)
+    assert _dates(html) == ['2024-04-01'] * 10
+    assert f'user_id={bob}' in _link(html, 'Older →')
+
+    # The event box matches however the name is typed
+    html = client.get('/admin/entries?event=pancake++breakfast+&per_page=100').get_data(as_text=True)
+    assert _dates(html) == ['2024-04-01'] * 30
+    assert _dates(client.get('/admin/entries?event=Bake+Sale').get_data(as_text=True)) == []
+
+    with count_queries() as small:
+        client.get('/admin/entries?per_page=10')
+    make_entries(alice, 200, date='2023-01-01')
+    with count_queries() as large:
+        client.get('/admin/entries?per_page=10')
+    assert len(small) == len(large)
@@ -0,0 +1,97 @@
+import io
+
+import events
+from conftest import login
+
+
+def _entries(app, make_user, make_entries):
+    make_user('rita', role='reporter')
+    alice = make_user('alice', full_name='Alice Smith')
+    bob = make_user('bob', role='reporter', full_name='Bob Jones')
+    make_entries(alice, 2, date='2024-05-01', hours=2.0, event='Food Drive')
+    make_entries(alice, 1, date='2024-06-03', hours=1.5)
+    make_entries(bob, 1, date='2024-06-10', hours=3.0, event='food  drive')
+    make_entries(bob, 1, date='2023-12-31', hours=9.0)
+    with app.app_context():
+        events.backfill(pause=0, echo=lambda message: None)
+
+
+def _pivot(client, **args):
+    args = {'start_date': '2024-01-01', 'end_date': '2024-12-31', **args}
+    return client.get('/report/pivot.json', query_string=args)
+
+
+def test_pivot_by_any_two_dimensions(app, client, make_user, make_entries):
+    _entries(app, make_user, make_entries)
+    login(client, 'rita')
+
+    assert _pivot(client).get_json() == {
+        'headers': ['Volunteer', '2024-05', '2024-06', 'Total'],
+        'rows': [['Alice Smith', 4.0, 1.5, 5.5], ['Bob Jones', 0.0, 3.0, 3.0]],
+        'totals': ['Total', 4.0, 4.5, 8.5],
+    }
+    by_quarter = _pivot(client, rows='event', columns='date', granularity='quarter').get_json()
+    assert by_quarter['headers'] == ['Event', '2024-Q2', 'Total']
+    assert by_quarter['rows'] == [['Food Drive', 7.0, 7.0], ['Pancake Breakfast', 1.5, 1.5]]
+    assert _pivot(client, rows='role', columns='', measure='entries').get_json() == {
+        'headers': ['Role', 'Entries'],
+        'rows': [['volunteer', 3], ['reporter', 1]],
+        'totals': ['Total', 4],
+    }
+    # Alice worked both events but counts once in the total
+    assert _pivot(client, rows='event', columns='role', measure='volunteers').get_json() == {
+        'headers': ['Event', 'volunteer', 'reporter', 'Total'],
+        'rows': [['Food Drive', 1, 1, 2], ['Pancake Breakfast', 1, 0, 1]],
+        'totals': ['Total', 1, 1, 2],
+    }
+    assert _pivot(client, start_date='2025-01-01', end_date='').get_json() == {
+        'headers': ['Volunteer', 'Total'], 'rows': [], 'totals': ['Total', 0.0]}
+
+    bad = _pivot(client, rows='event', columns='event')
+    assert bad.status_code == 400 and 'different' in bad.get_json()['error']
+    assert _pivot(client, measure='bogus').status_code == 400
+
+
+def test_pivot_page_and_export_show_the_same_table(app, client, make_user, make_entries):
+    from openpyxl import load_workbook
+
+    _entries(app, make_user, make_entries)
+    login(client, 'alice')
+    assert client.get('/report/pivot').status_code == 403
+
+    login(client, 'rita')
+    args = '?rows=event&columns=date&granularity=year&start_date=2024-01-01'
+    html = client.get('/report/pivot' + args).get_data(as_text=True)
+    assert '<td>Food Drive</td>' in html and '<td>7.0</td>' in html
+    assert 'export/xlsx_pivot?rows=event' in html
+
+    resp = client.get('/report/export/xlsx_pivot' + args)
+    assert resp.headers['Content-Disposition'].endswith('pivot_hours_by_event_and_date.xlsx')
+    sheet = load_workbook(io.BytesIO(resp.get_data()))['Pivot']
+    assert list(sheet.iter_rows(values_only=True)) == [
+        ('Event', '2024', 'Total'),
+        ('Food Drive', 7.0, 7.0),
+        ('Pancake Breakfast', 1.5, 1.5),
+        ('Total', 8.5, 8.5),
+    ]
+
+    assert 'Rows must be one of' in client.get('/report/pivot?rows=weekday',
+                                              follow_redirects=True).get_data(as_text=True)
+
+
+def test_pivot_page_validator_is_per_user(app, client, make_user, make_entries):
+    _entries(app, make_user, make_entries)
+    login(client, 'rita')
+    rita = client.get('/report/pivot')
+    data = client.get('/report/pivot.json')
+    assert client.get('/report/pivot',
+                      headers={'If-None-Match': rita.headers['ETag']}).status_code == 304
+
+    # The page carries the signed-in user's name and menu; the data alone doesn't
+    login(client, 'bob')
+    assert client.get('/report/pivot',
+                      headers={'If-None-Match': rita.headers['ETag']}).status_code == 200
+    assert client.get('/report/pivot', headers={
+        'If-Modified-Since': rita.headers['Last-Modified']}).status_code == 200
+    assert client.get('/report/pivot.json',
+                      headers={'If-None-Match': data.headers['ETag']}).status_code == 304
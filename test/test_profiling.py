@@ -0,0 +1,70 @@
+import pytest
+
+from conftest import login
+
+
+@pytest.fixture
+def profiles(app, tmp_path):
+    app.config['PROFILE_DIR'] = tmp_path / 'profiles'
+    return tmp_path / 'profiles'
+
+
+def test_admin_can_profile_a_request(client, make_user, make_entries, profiles):
+    root = make_user('root', role='admin')
+    make_entries(root, 3)
+    login(client, 'root')
+
+    plain = client.get('/summary')
+    assert 'X-Profile-Id' not in plain.headers and not profiles.exists()
+
+    with client.get('/report/export/csv?start_date=2024-01-01&end_date=2024-12-31&profile=1') \
+            as response:
+        response.get_data()
+    profile_id = response.headers['X-Profile-Id']
+    assert 'export_csv' in profile_id
+    assert sorted(p.suffix for p in profiles.iterdir()) == ['.pstats', '.txt']
+
+    summary = client.get(f'/admin/profiles/{profile_id}.txt').get_data(as_text=True)
+    assert summary.startswith('GET /report/export/csv?')
+    assert 'user: root  status: 200' in summary
+    assert 'cumulative' in summary and 'csv_chunks' in summary
+    dump = client.get(f'/admin/profiles/{profile_id}.pstats')
+    assert dump.status_code == 200 and dump.headers['Content-Disposition'].startswith('attachment')
+
+    # A workbook is sent as a file, not a generator; it is captured too
+    with client.get('/report/export/xlsx?start_date=2024-01-01&end_date=2024-12-31',
+                    headers={'X-Profile': '1'}) as response:
+        response.get_data()
+    assert (profiles / f'{response.headers["X-Profile-Id"]}.txt').exists()
+
+
+def test_profiling_is_admin_only(client, make_user, profiles):
+    make_user('rita', role='reporter')
+    login(client, 'rita')
+    assert client.get('/summary?profile=1').status_code == 403
+    assert client.get('/summary', headers={'X-Profile': '1'}).status_code == 403
+    assert client.get('/admin/profiles/x.txt').status_code == 403
+    assert not profiles.exists()
+
+
+def test_only_the_newest_captures_are_kept(app, client, make_user, profiles):
+    app.config['PROFILE_KEEP'] = 2
+    make_user('root', role='admin')
+    login(client, 'root')
+    ids = [client.get('/', headers={'X-Profile': '1'}).headers['X-Profile-Id']
+           for _ in range(3)]
+    kept = sorted(p.name for p in profiles.iterdir())
+    assert len(kept) == 4 and not any(name.startswith(ids[0]) for name in kept)
+
+
+def test_profiling_a_logout_records_who_it_was(client, make_user, profiles):
+    make_user('root', role='admin')
+    login(client, 'root')
+    response = client.get('/logout?profile=1')
+    assert response.status_code == 302
+    profile_id = response.headers['X-Profile-Id']
+    assert 'user: root  status: 302' in (profiles / f'{profile_id}.txt').read_text()
+
+    # The slot was freed for the next capture
+    login(client, 'root')
+    assert client.get('/?profile=1').headers['X-Profile-Id'] != 'busy'
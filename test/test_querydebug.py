@@ -0,0 +1,41 @@
+import logging
+
+import pytest
+
+import querydebug
+from conftest import login
+from models import VolunteerEntry
+from reports import with_user
+
+
+@pytest.mark.allow_n_plus_one
+def test_per_row_user_loading_is_flagged(client, app, make_user, make_entries):
+    def names():
+        # The pattern to catch: one user SELECT per entry
+        return ', '.join(e.user.full_name for e in VolunteerEntry.query)
+
+    def names_joined():
+        return ', '.join(e.user.full_name for e in with_user(VolunteerEntry.query))
+
+    app.add_url_rule('/names', view_func=names)
+    app.add_url_rule('/names-joined', view_func=names_joined)
+    for i in range(8):
+        make_entries(make_user(f'vol{i}'), 1)
+
+    assert client.get('/names').status_code == 200
+    [(endpoint, statement, times)] = querydebug.take_problems()
+    assert endpoint == 'names'
+    assert statement.startswith('SELECT user.id') and times == 8
+
+    assert client.get('/names-joined').status_code == 200
+    assert querydebug.take_problems() == []
+
+
+def test_slow_queries_are_logged_with_their_plan(client, app, make_user, caplog):
+    app.config['SLOW_QUERY_MS'] = 0
+    make_user('ann')
+    with caplog.at_level(logging.WARNING):
+        login(client, 'ann')
+    [message] = [r.getMessage() for r in caplog.records if 'user.username = ?' in r.getMessage()]
+    assert 'slow query' in message and "params: ('ann', 1, 0)" in message
+    assert 'SEARCH user USING INDEX' in message
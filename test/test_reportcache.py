@@ -0,0 +1,114 @@
+import os
+from datetime import date
+
+import pytest
+
+import reportcache
+from conftest import login
+from models import db, HoursRollup, VolunteerEntry
+
+FORM = {'start_date': '2024-01-01', 'end_date': '2024-12-31'}
+ARGS = '?start_date=2024-01-01&end_date=2024-12-31'
+
+
+@pytest.fixture(params=['memory', 'file'])
+def cached(app, request, client, tmp_path):
+    app.config['REPORT_CACHE'] = request.param
+    app.config['REPORT_CACHE_DIR'] = tmp_path / 'report_cache'
+    return client
+
+
+def test_report_is_served_from_cache_until_an_entry_changes(
+        cached, make_user, make_entries, count_queries):
+    make_user('rita', role='reporter')
+    alice = make_user('alice', full_name='Alice Smith')
+    make_entries(alice, 2, hours=1.5)
+    login(cached, 'rita')
+
+    cached.post('/report', data=FORM)
+    with count_queries() as queries:
+        html = cached.post('/report', data=FORM).get_data(as_text=True)
+    assert 'Alice Smith' in html and '3.0' in html
+    # user loader + write generation; no totals query
+    assert len(queries) == 2
+
+    login(cached, 'alice')
+    cached.post('/log', data={'event': 'Car Wash', 'date': '2024-06-01',
+                              'start': '08:00', 'end': '12:00', 'notes': ''})
+    login(cached, 'rita')
+    assert '7.0' in cached.post('/report', data=FORM).get_data(as_text=True)
+
+
+@pytest.mark.parametrize('url', ['/report/export/xlsx', '/report/export/xlsx_totals',
+                                 '/report/export/xlsx_events'])
+def test_exports_are_cached_until_an_entry_changes(
+        app, cached, make_user, make_entries, count_queries, url):
+    make_user('root', role='admin')
+    make_entries(make_user('alice'), 3)
+    login(cached, 'root')
+
+    first = cached.get(url + ARGS).get_data()
+    with count_queries() as queries:
+        again = cached.get(url + ARGS).get_data()
+    assert again == first
+    assert len(queries) == 2
+
+    with app.app_context():
+        entry_id = db.session.scalar(db.select(VolunteerEntry.id))
+    assert cached.post(f'/entry/{entry_id}/delete').status_code == 302
+    assert cached.get(url + ARGS).get_data() != first
+
+
+def test_rebuilding_the_rollup_makes_cached_reports_stale(app, cached, make_user, make_entries):
+    make_user('rita', role='reporter')
+    make_entries(make_user('alice', full_name='Alice Smith'), 2, hours=1.5)
+    # Drift: the rollup lost an hour without anything bumping the generation
+    with app.app_context():
+        db.session.get(HoursRollup, (2, 'Pancake Breakfast', date(2024, 5, 1))).hours = 2.0
+        db.session.commit()
+    login(cached, 'rita')
+
+    first = cached.get('/report' + ARGS)
+    etag = first.headers['ETag']
+    assert '2.0' in first.get_data(as_text=True)
+    assert cached.get('/report' + ARGS, headers={'If-None-Match': etag}).status_code == 304
+
+    result = app.test_cli_runner().invoke(args=['rebuild-rollups'])
+    assert result.exit_code == 0
+
+    again = cached.get('/report' + ARGS, headers={'If-None-Match': etag})
+    assert again.status_code == 200 and again.headers['ETag'] != etag
+    assert '3.0' in again.get_data(as_text=True)
+
+
+def test_file_store_is_shared_and_bounded(tmp_path):
+    worker_a = reportcache.FileStore(tmp_path, max_bytes=100)
+    worker_b = reportcache.FileStore(tmp_path, max_bytes=100)
+
+    worker_a.put((1, 'totals', '2024-01-01', '2024-12-31'), b'x' * 40)
+    assert worker_b.get((1, 'totals', '2024-01-01', '2024-12-31')) == b'x' * 40
+
+    worker_b.put((1, 'xlsx', '2024-01-01', '2024-12-31'), b'y' * 40)
+    os.utime(tmp_path / '1-xlsx-2024-01-01-2024-12-31.bin', (0, 0))   # least recently read
+    worker_a.put((1, 'xlsx_events', '2024-01-01', '2024-12-31'), b'z' * 40)
+    assert worker_a.get((1, 'xlsx', '2024-01-01', '2024-12-31')) is None
+    assert worker_a.get((1, 'totals', '2024-01-01', '2024-12-31')) == b'x' * 40
+
+    # A newer generation drops everything older
+    worker_b.put((2, 'totals', '2024-01-01', '2024-12-31'), b'n')
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['2-totals-2024-01-01-2024-12-31.bin']
+
+
+def test_memory_store_evicts_least_recently_used():
+    store = reportcache.MemoryStore(max_bytes=100)
+    store.put((1, 'a', None, None), b'a' * 40)
+    store.put((1, 'b', None, None), b'b' * 40)
+    store.get((1, 'a', None, None))
+    store.put((1, 'c', None, None), b'c' * 40)
+    assert store.get((1, 'b', None, None)) is None
+    assert store.get((1, 'a', None, None)) == b'a' * 40
+
+    # Results computed before a write are dropped, not cached
+    store.put((2, 'a', None, None), b'new')
+    store.put((1, 'c', None, None), b'old')
+    assert store.get((1, 'c', None, None)) is None
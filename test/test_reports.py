@@ -0,0 +1,128 @@
+import io
+
+import pytest
+
+from conftest import login
+
+
+def test_report_totals_are_grouped_per_volunteer(client, make_user, make_entries):
+    make_user('rita', role='reporter')
+    alice = make_user('alice', full_name='Alice Smith')
+    bob = make_user('bob', full_name='Bob Jones')
+    make_entries(alice, 3, hours=2.0)
+    make_entries(bob, 2, hours=1.5)
+    make_entries(bob, 1, date='2023-01-01', hours=9.0)
+    login(client, 'rita')
+
+    resp = client.post('/report', data={'start_date': '2024-01-01',
+                                        'end_date': '2024-12-31'})
+    html = resp.get_data(as_text=True)
+    assert resp.status_code == 200
+    assert 'Alice Smith' in html and '6.0' in html
+    assert 'Bob Jones' in html and '3.0' in html
+    assert '12.0' not in html
+
+
+def test_report_query_count_is_independent_of_entry_count(
+        client, make_user, make_entries, count_queries):
+    make_user('rita', role='reporter')
+    volunteers = [make_user(f'vol{i}') for i in range(3)]
+    login(client, 'rita')
+    form = {'start_date': '2024-01-01', 'end_date': '2024-12-31'}
+    args = '?start_date=2024-01-01&end_date=2024-12-31'
+
+    for uid in volunteers:
+        make_entries(uid, 1)
+    with count_queries() as few_report:
+        client.post('/report', data=form)
+    with count_queries() as few_export:
+        client.get('/report/export/xlsx_totals' + args)
+    with count_queries() as few_summary:
+        client.get('/summary')
+
+    for uid in volunteers:
+        make_entries(uid, 40)
+    with count_queries() as many_report:
+        client.post('/report', data=form)
+    with count_queries() as many_export:
+        resp = client.get('/report/export/xlsx_totals' + args)
+    with count_queries() as many_summary:
+        client.get('/summary')
+
+    assert resp.status_code == 200
+    # user loader (+ write generation for the conditional GETs) + the totals
+    assert len(many_report) == len(few_report) == 2
+    assert len(many_export) == len(few_export) == 3
+    assert len(many_summary) == len(few_summary) == 3
+
+
+@pytest.mark.parametrize('strategy, expected', [('joined', 3), ('selectin', 4)])
+def test_admin_entries_do_not_load_users_per_row(
+        app, client, make_user, make_entries, count_queries, strategy, expected):
+    app.config['ENTRY_USER_LOADING'] = strategy
+    make_user('root', role='admin')
+    for i in range(25):
+        make_entries(make_user(f'vol{i}'), 2)
+    login(client, 'root')
+
+    with count_queries() as queries:
+        resp = client.get('/admin/entries')
+
+    assert resp.status_code == 200
+    # user loader + volunteer filter dropdown + the page (+ selectin batch)
+    assert len(queries) == expected
+
+
+@pytest.mark.parametrize('url', ['/report/export/xlsx', '/report/export/xlsx_events'])
+def test_entry_exports_run_one_query(client, make_user, make_entries, count_queries, url):
+    make_user('rita', role='reporter')
+    for i in range(25):
+        make_entries(make_user(f'vol{i}'), 2)
+    login(client, 'rita')
+
+    with count_queries() as queries:
+        resp = client.get(url + '?start_date=2024-01-01&end_date=2024-12-31')
+
+    assert resp.status_code == 200
+    # user loader + write generation + the rows
+    assert len(queries) == 3
+
+
+def test_events_export_streams_rows_into_workbook(client, make_user, make_entries):
+    from openpyxl import load_workbook
+
+    make_user('rita', role='reporter')
+    make_entries(make_user('alice', full_name='Alice Smith'), 3, hours=2.0)
+    login(client, 'rita')
+
+    resp = client.get('/report/export/xlsx_events?start_date=2024-01-01&end_date=2024-12-31')
+    sheet = load_workbook(io.BytesIO(resp.get_data()))['Events']
+    rows = list(sheet.iter_rows(values_only=True))
+
+    assert resp.headers['Content-Disposition'].endswith('events_2024-01-01_to_2024-12-31.xlsx')
+    assert rows[0] == ('Full Name', 'Date', 'Event', 'Start', 'End', 'Hours', 'Notes')
+    assert rows[1:] == [('Alice Smith', '2024-05-01', 'Pancake Breakfast',
+                         '08:00', '09:30', 2.0, None)] * 3
+
+
+def test_csv_and_ndjson_exports_stream_entry_rows(client, make_user, make_entries):
+    import csv
+    import json
+
+    make_user('rita', role='reporter')
+    make_entries(make_user('alice', full_name='Alice Smith'), 2, hours=2.0)
+    login(client, 'rita')
+    args = '?start_date=2024-01-01&end_date=2024-12-31'
+
+    resp = client.get('/report/export/csv' + args)
+    assert resp.is_streamed
+    assert resp.mimetype == 'text/csv'
+    rows = list(csv.reader(io.StringIO(resp.get_data(as_text=True))))
+    assert rows == [['Full Name', 'Date', 'Event', 'Start', 'End', 'Hours', 'Notes']] + [
+        ['Alice Smith', '2024-05-01', 'Pancake Breakfast', '08:00', '09:30', '2.0', '']] * 2
+
+    resp = client.get('/report/export/ndjson' + args)
+    assert resp.mimetype == 'application/x-ndjson'
+    records = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+    assert len(records) == 2
+    assert records[0]['Full Name'] == 'Alice Smith' and records[0]['Hours'] == 2.0
@@ -0,0 +1,52 @@
+from datetime import date
+
+import rollups
+from conftest import login
+from models import db, HoursRollup, VolunteerEntry
+
+
+def _rollup(app):
+    with app.app_context():
+        assert rollups.verify() == []
+        return {(r.user_id, r.event, r.date): (r.hours, r.entries)
+                for r in HoursRollup.query}
+
+
+def test_write_routes_keep_rollup_in_step(app, client, make_user):
+    root = make_user('root', role='admin')
+    alice = make_user('alice')
+    login(client, 'root')
+    may1, may2 = date(2024, 5, 1), date(2024, 5, 2)
+
+    client.post('/log', data={'event': 'Food Drive', 'date': '2024-05-01',
+                              'start': '08:00', 'end': '10:30', 'notes': ''})
+    client.post('/bulk-add-hours', data={'event': 'Food Drive', 'date': '2024-05-01',
+                                         'start_time': '09:00', 'end_time': '10:00',
+                                         'volunteers': [str(root), str(alice)]})
+    assert _rollup(app) == {(root, 'Food Drive', may1): (3.5, 2),
+                         (alice, 'Food Drive', may1): (1.0, 1)}
+
+    with app.app_context():
+        first = VolunteerEntry.query.order_by(VolunteerEntry.id).first().id
+    client.post(f'/entry/{first}/edit', data={'event': 'Park Cleanup', 'date': '2024-05-02',
+                                              'start': '08:00', 'end': '09:00', 'notes': ''})
+    assert _rollup(app) == {(root, 'Food Drive', may1): (1.0, 1),
+                         (root, 'Park Cleanup', may2): (1.0, 1),
+                         (alice, 'Food Drive', may1): (1.0, 1)}
+
+    client.post(f'/entry/{first}/delete')
+    client.post(f'/admin/users/{alice}/delete')
+    assert _rollup(app) == {(root, 'Food Drive', may1): (1.0, 1)}
+
+
+def test_rebuild_backfills_and_verify_spots_drift(app, client, make_user, make_entries):
+    alice = make_user('alice')
+    make_entries(alice, 3, hours=2.0)
+    with app.app_context():
+        db.session.query(HoursRollup).delete()
+        db.session.commit()
+        assert len(rollups.verify()) == 1
+
+        assert rollups.rebuild() == 1
+        assert rollups.verify() == []
+        assert HoursRollup.query.one().hours == 6.0
@@ -0,0 +1,48 @@
+from collections import Counter
+
+import re
+
+import rollups
+from models import db, User, VolunteerEntry
+
+
+def test_seed_bench_adds_consistent_data(app):
+    result = app.test_cli_runner().invoke(args=['seed-bench', '--users', '120',
+                                                '--entries', '2000'])
+    assert result.exit_code == 0, result.output
+    password = re.search(r"Log in as bench1 \(admin\) with password '([^']+)'",
+                         result.output).group(1)
+
+    with app.app_context():
+        roles = Counter(role for (role,) in db.session.query(User.role))
+        assert roles == {'admin': 1, 'reporter': 1, 'volunteer': 118}
+        assert VolunteerEntry.query.count() == 2000
+        assert rollups.verify() == []
+        assert db.session.get(User, 1).check_password(password)
+
+    # Same seed, same data: a second run only shifts the user ids
+    result = app.test_cli_runner().invoke(args=['seed-bench', '--users', '120',
+                                                '--entries', '2000'])
+    assert 'Log in as bench121 (admin)' in result.output
+    assert password not in result.output   # a new random password each run
+    with app.app_context():
+        first, second = (
+            [(e.user_id - offset, e.date, e.event, e.total_hours)
+             for e in VolunteerEntry.query.filter(VolunteerEntry.id.between(lo, lo + 1999))
+                                          .order_by(VolunteerEntry.id)]
+            for lo, offset in ((1, 0), (2001, 120)))
+        assert first == second
+
+
+def test_seed_bench_refuses_a_production_database_with_hours(app, make_user, make_entries):
+    make_entries(make_user('alice'), 1)
+    app.testing = False
+    runner = app.test_cli_runner()
+
+    result = runner.invoke(args=['seed-bench', '--users', '5', '--entries', '10'])
+    assert result.exit_code != 0 and 'pass --force' in result.output
+    with app.app_context():
+        assert User.query.count() == 1 and VolunteerEntry.query.count() == 1
+
+    result = runner.invoke(args=['seed-bench', '--users', '5', '--entries', '10', '--force'])
+    assert result.exit_code == 0, result.output
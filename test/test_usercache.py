@@ -0,0 +1,87 @@
+import os
+
+import pytest
+
+import usercache
+from conftest import login
+from models import db, User
+
+
+@pytest.fixture
+def cached(app, client):
+    app.config['USER_CACHE_TTL'] = 60
+    return client
+
+
+def user_selects(queries):
+    return [q for q in queries if q.startswith('SELECT user.id')]
+
+
+def test_user_is_loaded_once_per_ttl(cached, make_user, count_queries):
+    make_user('ann')
+    login(cached, 'ann')
+
+    cached.get('/summary')
+    with count_queries() as queries:
+        assert cached.get('/summary').status_code == 200
+        assert cached.get('/').status_code == 200
+
+    assert user_selects(queries) == []
+    assert usercache.stats()['hits'] >= 2
+    assert usercache.stats()['misses'] == 1
+
+
+def test_role_change_applies_on_the_next_request(app, cached, make_user):
+    make_user('root', role='admin')
+    ann = make_user('ann')
+    login(cached, 'ann')
+    assert cached.get('/report').status_code == 403
+
+    with app.test_client() as admin:
+        login(admin, 'root')
+        admin.post(f'/admin/users/{ann}/edit', data={
+            'full_name': 'Ann', 'email': 'ann@example.com', 'role': 'reporter'})
+
+    assert cached.get('/report').status_code == 200
+
+
+def test_change_in_another_worker_applies_on_the_next_request(app, cached, make_user):
+    ann = make_user('ann')
+    login(cached, 'ann')
+    assert cached.get('/report').status_code == 403   # now cached
+
+    # Another worker promotes Ann: its commit lands, and its invalidate()
+    # replaces the stamp file this worker checks
+    with app.app_context():
+        db.session.get(User, ann).role = 'reporter'
+        db.session.commit()
+    assert cached.get('/report').status_code == 403   # nothing told us yet
+    stamp = app.config['USER_CACHE_STAMP']
+    stamp.with_suffix('.tmp').write_text(f'{ann}\n')
+    os.replace(stamp.with_suffix('.tmp'), stamp)
+
+    assert cached.get('/report').status_code == 200
+
+
+def test_cached_user_can_still_be_changed(app, cached, make_user):
+    ann = make_user('ann')
+    login(cached, 'ann')
+    cached.get('/summary')   # now cached
+
+    cached.post('/change-password', data={'old_password': 'pw', 'new_password': 'new',
+                                          'confirm_password': 'new'})
+    cached.post('/profile', data={'full_name': 'Ann Lee', 'email': 'ann@example.com'})
+
+    with app.app_context():
+        user = db.session.get(User, ann)
+        assert user.check_password('new') and user.full_name == 'Ann Lee'
+    assert 'Ann Lee' in cached.get('/profile').get_data(as_text=True)
+
+
+def test_least_recently_used_users_are_evicted(app, cached, make_user):
+    app.config['USER_CACHE_SIZE'] = 2
+    ids = [make_user(f'vol{i}') for i in range(3)]
+    with app.test_request_context():
+        for user_id in ids + ids[-1:]:
+            usercache.load_user(user_id)
+    assert usercache.stats() == {'hits': 1, 'misses': 3, 'evictions': 1, 'size': 2}
@@ -0,0 +1,104 @@
+import json
+
+import pytest
+
+import volunteering_hours as vh
+
+
+@pytest.fixture
+def tracker(tmp_path, monkeypatch):
+    monkeypatch.setattr(vh, 'CSV_FILE', str(tmp_path / 'volunteer_hours.csv'))
+    monkeypatch.setattr(vh, 'INDEX_FILE', str(tmp_path / 'volunteer_hours.index.json'))
+    monkeypatch.setattr(vh, 'JOURNAL_FILE', str(tmp_path / 'volunteer_hours.index.log'))
+    vh.ensure_csv_exists()
+    return tmp_path
+
+
+def row(day, name, event, hours):
+    return {'Date': day, 'Volunteer Name': name, 'Event': event, 'Start Time': '08:00',
+            'End Time': '09:00', 'Total Hours': hours, 'Notes': ''}
+
+
+def test_appends_update_the_index_incrementally(tracker, monkeypatch):
+    vh.append_rows([row('2024-05-01', 'Ann', 'Food Drive', 2.0),
+                    row('2024-05-03', 'Bob', 'Book Sale', 1.5)])
+    index = json.loads((tracker / 'volunteer_hours.index.json').read_text())
+    assert index['totals'] == {'Ann': 2.0, 'Bob': 1.5}
+    assert index['offset'] == (tracker / 'volunteer_hours.csv').stat().st_size
+
+    # Rows added behind the tracker's back are folded in on the next read,
+    # without re-reading what the index already holds
+    with open(vh.CSV_FILE, 'a') as f:
+        f.write('2024-05-02,Ann,food drive,08:00,09:00,1.0,late\n')
+    parsed = []
+    parse = vh._parse_line
+    monkeypatch.setattr(vh, '_parse_line', lambda line: parsed.append(line) or parse(line))
+    assert vh.refresh_index()['totals'] == {'Ann': 3.0, 'Bob': 1.5}
+    assert len(parsed) == 1
+
+    found = vh.find_entries(start_date='2024-05-02', event='FOOD DRIVE')
+    assert [(r['Date'], r['Notes']) for r in found] == [('2024-05-02', 'late')]
+    assert [r['Volunteer Name'] for r in vh.find_entries(end_date='2024-05-02')] == ['Ann', 'Ann']
+
+
+def test_index_is_rebuilt_when_the_csv_is_replaced(tracker):
+    vh.append_rows([row('2024-05-01', 'Ann', 'Food Drive', 2.0)] * 3)
+    (tracker / 'volunteer_hours.csv').unlink()
+    vh.ensure_csv_exists()
+    vh.append_rows([row('2024-06-01', 'Cy', 'Food Drive', 4.0)])
+    assert vh.refresh_index()['totals'] == {'Cy': 4.0}
+
+
+def test_index_is_rebuilt_when_a_row_is_edited_in_place(tracker, monkeypatch):
+    vh.append_rows([row('2024-05-01', 'Ann', 'Food Drive', 2.0),
+                    row('2024-05-03', 'Bob', 'Book Sale', 1.5)])
+    csv_path = tracker / 'volunteer_hours.csv'
+    # Same length, same inode, and a hand edit can land within the mtime's
+    # resolution of the last check: only the digest can tell
+    stat = csv_path.stat()
+    csv_path.write_bytes(csv_path.read_bytes().replace(b',2.0,', b',3.0,'))
+    assert csv_path.stat().st_size == stat.st_size
+    assert vh.refresh_index()['totals'] == {'Ann': 3.0, 'Bob': 1.5}
+
+    # Rewritten with the old rows changed and new ones after them, so the
+    # file still runs past the saved offset at a row boundary
+    csv_path.write_bytes(csv_path.read_bytes().replace(b',1.5,', b',4.5,')
+                         + b'2024-05-04,Cy,Book Sale,08:00,09:00,1.0,\r\n')
+    assert vh.refresh_index()['totals'] == {'Ann': 3.0, 'Bob': 4.5, 'Cy': 1.0}
+
+
+def test_an_untouched_csv_is_not_read_again(tracker, monkeypatch):
+    vh.append_rows([row('2024-05-01', 'Ann', 'Food Drive', 2.0)])
+    # Once the last write is safely older than the check, the stat alone suffices
+    monkeypatch.setattr(vh, 'RACY_NS', -10**12)
+    vh.refresh_index()
+    monkeypatch.setattr(vh, '_ends', lambda file, offset: pytest.fail('CSV re-read'))
+    assert vh.refresh_index()['totals'] == {'Ann': 2.0}
+
+
+def test_appending_a_row_only_adds_to_the_journal(tracker, monkeypatch):
+    vh.append_rows([row('2024-05-01', 'Ann', 'Food Drive', 2.0)] * 50)
+    index_file = tracker / 'volunteer_hours.index.json'
+    saved = index_file.read_bytes()
+    read = []
+    monkeypatch.setattr(vh, '_ends', lambda file, offset, ends=vh._ends:
+                        read.append(offset) or ends(file, offset))
+    for day in ('2024-05-02', '2024-05-03'):
+        vh.append_rows([row(day, 'Bob', 'Book Sale', 1.5)])
+    # The saved index is untouched, and only the CSV's ends were read back
+    assert index_file.read_bytes() == saved
+    assert len((tracker / 'volunteer_hours.index.log').read_text().splitlines()) == 2
+    assert len(read) == 4
+
+    # Another process reads the index back as this one has it
+    vh._loaded['index'] = None
+    expected = {'Ann': 100.0, 'Bob': 3.0}
+    assert vh.refresh_index()['totals'] == expected
+    assert [r['Volunteer Name'] for r in vh.find_entries(start_date='2024-05-02')] == ['Bob'] * 2
+
+    # A long journal is folded back into the saved index
+    monkeypatch.setattr(vh, 'COMPACT_AT', 1)
+    vh.append_rows([row('2024-05-04', 'Cy', 'Book Sale', 1.0)])
+    assert (tracker / 'volunteer_hours.index.log').read_bytes() == b''
+    vh._loaded['index'] = None
+    assert vh.load_index()['totals'] == {**expected, 'Cy': 1.0}
@@ -0,0 +1,39 @@
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_gunicorn_serves_with_preload_and_threads(tmp_path):
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    env = dict(os.environ, RENDER='true', PORT=str(port), WEB_CONCURRENCY='2',
+               GUNICORN_WORKER_CLASS='gthread', GUNICORN_PRELOAD='true',
+               DATABASE_URL=f'sqlite:///{tmp_path}/v.db',
+               METRICS_DIR=str(tmp_path / 'metrics'))
+    server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+                               'wsgi:app'], cwd=ROOT, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = time.time() + 30
+        while True:
+            try:
+                resp = urllib.request.urlopen(f'http://127.0.0.1:{port}/login')
+                break
+            except OSError:
+                assert time.time() < deadline and server.poll() is None
+                time.sleep(0.2)
+        assert resp.status == 200
+        children = Path(f'/proc/{server.pid}/task/{server.pid}/children')
+        while len(children.read_text().split()) < 2:
+            assert time.time() < deadline
+            time.sleep(0.2)
+    finally:
+        server.terminate()
+        server.wait()
@@ -0,0 +1,128 @@
+# usercache.py
+"""
+In-process cache of logged-in users for ``login_manager.user_loader``.
+
+Every authenticated request asks for ``current_user``. Without the cache,
+that is a ``SELECT`` from ``user`` each time. Here the user's column values
+are kept for ``USER_CACHE_TTL`` seconds, in an LRU of ``USER_CACHE_SIZE``
+users. On a hit they are attached to the request's session without a query,
+so routes can still change and commit ``current_user``.
+
+Routes that change a user call :func:`invalidate` after committing. That
+replaces the stamp file ``USER_CACHE_STAMP``, which every gunicorn worker
+checks (one ``stat``) before using its cache: a worker that sees a new stamp
+drops every user it cached, so a demoted admin or deleted user takes effect
+on the next request in every worker. Entries remember the stamp seen before
+their row was read, so a load racing a change can't put the old row back.
+"""
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+
+from models import db, User
+
+_lock = threading.Lock()
+_entries = OrderedDict()   # user_id -> (stamp, expires_at, column values)
+_stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+
+def _reset():
+    """A forked child counts from zero; the parent's numbers are the parent's to report."""
+    global _lock
+    _lock = threading.Lock()
+    for key in _stats:
+        _stats[key] = 0
+
+
+os.register_at_fork(after_in_child=_reset)
+
+
+def _columns(user):
+    return {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs}
+
+
+def _attach(values):
+    """A session-bound ``User`` built from cached values, without a query."""
+    user = User(**values)
+    make_transient_to_detached(user)
+    return db.session.merge(user, load=False)
+
+
+def _stamp():
+    """The stamp file's identity, changed by every invalidate(); None if there is none yet."""
+    try:
+        stat = os.stat(current_app.config['USER_CACHE_STAMP'])
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns
+
+
+def load_user(user_id):
+    """``User`` ``user_id`` from the cache, or from the database on a miss."""
+    ttl = current_app.config['USER_CACHE_TTL']
+    if not ttl:
+        return db.session.get(User, user_id)
+
+    now = time.monotonic()
+    stamp = _stamp()
+    with _lock:
+        entry = _entries.get(user_id)
+        if entry and entry[0] == stamp and entry[1] > now:
+            _entries.move_to_end(user_id)
+            _stats['hits'] += 1
+            values = entry[2]
+        else:
+            _stats['misses'] += 1
+            values = None
+    if values is not None:
+        return _attach(values)
+
+    user = db.session.get(User, user_id)
+    if user is None:
+        return None
+    values = _columns(user)
+    with _lock:
+        # Tagged with the stamp from before the read: if a change lands
+        # meanwhile, the next load sees a newer stamp and skips this entry
+        _entries[user_id] = (stamp, now + ttl, values)
+        _entries.move_to_end(user_id)
+        while len(_entries) > current_app.config['USER_CACHE_SIZE']:
+            _entries.popitem(last=False)
+            _stats['evictions'] += 1
+    return user
+
+
+def invalidate(user_id):
+    """
+    Forget ``user_id`` after changing or deleting them, in this worker and
+    (through the stamp file) every other one.
+    """
+    with _lock:
+        _entries.pop(user_id, None)
+    path = current_app.config['USER_CACHE_STAMP']
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # A new file each time, so the stamp changes even within one mtime tick
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'w') as out:
+        out.write(f'{user_id}\n')
+    os.replace(tmp, path)
+
+
+def clear():
+    """Forget everyone and reset the counters."""
+    with _lock:
+        _entries.clear()
+        for key in _stats:
+            _stats[key] = 0
+
+
+def stats():
+    """Hit, miss and eviction counts so far, plus the current size."""
+    with _lock:
+        return dict(_stats, size=len(_entries))
@@ -1,5 +1,6 @@
 # utils.py
 
+from datetime import date, datetime
 from functools import wraps
 from flask import abort
 from flask_login import current_user
@@ -22,3 +23,26 @@ def role_required(min_role):
             return fn(*args, **kwargs)
         return wrapper
     return decorator
+
+
+def parse_date(value):
+    """'YYYY-MM-DD' → date. Raises ValueError on anything else."""
+    return datetime.strptime((value or '').strip(), '%Y-%m-%d').date()
+
+def parse_time(value):
+    """'HH:MM' (or 'HH:MM:SS', as some browsers send) → time. Raises ValueError."""
+    value = (value or '').strip()
+    fmt = '%H:%M:%S' if value.count(':') == 2 else '%H:%M'
+    return datetime.strptime(value, fmt).time()
+
+def hours_between(start, end):
+    """Hours from start to end, wrapping past midnight like the old strptime math."""
+    delta = datetime.combine(date.min, end) - datetime.combine(date.min, start)
+    return round(delta.seconds / 3600, 2)
+
+def format_date(value):
+    return value.isoformat() if value else ''
+
+def format_time(value):
+    """time → 'HH:MM' for templates and exports."""
+    return value.strftime('%H:%M') if value else ''
@@ -1,10 +1,32 @@
 import csv
+import hashlib
+import json
 import os
+import time
+from bisect import bisect_left, bisect_right
 from datetime import datetime
+from functools import lru_cache
 
 CSV_FILE = "data/volunteer_hours.csv"
 FIELDNAMES = ["Date", "Volunteer Name", "Event", "Start Time", "End Time", "Total Hours", "Notes"]
 
+# Sidecar index of CSV_FILE, so the summary and the filters don't re-read it:
+#   offset  - bytes of CSV_FILE already folded in (rows are only ever appended)
+#   stat    - [inode, size, mtime_ns] of CSV_FILE when it was last checked
+#   checked - when that was, in ns
+#   head    - blake2b of the first CHECK_BYTES folded in, and
+#   tail    - of the last CHECK_BYTES, to catch a CSV that was edited or replaced
+#   totals  - hours per volunteer name
+#   dates   - {"YYYY-MM-DD": [byte offset of each row on that day]}
+#   events  - {lower-cased event: [byte offset of each row]}
+INDEX_FILE = "data/volunteer_hours.index.json"
+# What each refresh since INDEX_FILE was written added to it, one JSON line
+# per refresh, so appending a row doesn't rewrite the whole index. It is
+# folded into INDEX_FILE once it passes COMPACT_AT bytes.
+JOURNAL_FILE = "data/volunteer_hours.index.log"
+COMPACT_AT = 4 * 2**20
+CHECK_BYTES = 4096
+
 def ensure_csv_exists():
     os.makedirs(os.path.dirname(CSV_FILE), exist_ok=True)
     if not os.path.exists(CSV_FILE):
@@ -12,6 +34,185 @@ def ensure_csv_exists():
             writer = csv.DictWriter(file, fieldnames=FIELDNAMES)
             writer.writeheader()
 
+# A file modified this close to a check may change again without its mtime moving
+RACY_NS = 2 * 10**9
+
+# The index as last read or written by this process, so a refresh only reads
+# the journal lines added since
+_loaded = {"index": None, "snapshot": None, "journal": 0}
+
+def _empty_index():
+    return {"offset": 0, "stat": None, "checked": 0, "head": None, "tail": None,
+            "totals": {}, "dates": {}, "events": {}}
+
+def _fold(index, record):
+    """Apply one journal record to ``index``: the rows it read, then where it stopped."""
+    totals, dates, events = index["totals"], index["dates"], index["events"]
+    for row_at, day, event, name, hours in record["rows"]:
+        totals[name] = totals.get(name, 0) + hours
+        dates.setdefault(day, []).append(row_at)
+        events.setdefault(event, []).append(row_at)
+    for key in ("offset", "stat", "checked", "head", "tail"):
+        index[key] = record[key]
+
+def _snapshot():
+    try:
+        st = os.stat(INDEX_FILE)
+    except OSError:
+        return None
+    return INDEX_FILE, st.st_ino, st.st_size, st.st_mtime_ns
+
+def load_index():
+    """The saved index, or an empty one if it is missing or unreadable."""
+    snapshot = _snapshot()
+    try:
+        journal_size = os.path.getsize(JOURNAL_FILE)
+    except OSError:
+        journal_size = 0
+    if (_loaded["index"] is None or _loaded["snapshot"] != snapshot
+            or _loaded["journal"] > journal_size):
+        index = _empty_index()
+        try:
+            with open(INDEX_FILE) as file:
+                saved = json.load(file)
+            if index.keys() <= saved.keys():
+                index = saved
+        except (OSError, ValueError, AttributeError):
+            pass
+        _loaded.update(index=index, snapshot=snapshot, journal=0)
+    index = _loaded["index"]
+    if _loaded["journal"] < journal_size:
+        with open(JOURNAL_FILE, "rb") as journal:
+            journal.seek(_loaded["journal"])
+            for line in journal:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break  # a record still being written
+                # Skip what INDEX_FILE already holds, if compacting stopped halfway
+                if record["from"] == index["offset"]:
+                    _fold(index, record)
+                _loaded["journal"] += len(line)
+    return index
+
+def _ends(file, offset):
+    """Hashes of the first and last CHECK_BYTES of ``file`` before ``offset``."""
+    ends = []
+    for start in (0, max(0, offset - CHECK_BYTES)):
+        file.seek(start)
+        ends.append(hashlib.blake2b(file.read(min(CHECK_BYTES, offset)), digest_size=16)
+                    .hexdigest())
+    return ends
+
+def _still_matches(index, file, stat):
+    """
+    Whether the CSV still starts with the bytes folded into ``index``, judged
+    from its stat and its ends. An edit in the middle of a large file that
+    also appends rows gets past this; ``index`` is then rebuilt by deleting
+    INDEX_FILE.
+    """
+    inode, size, mtime = index["stat"]
+    if stat[0] != inode or stat[1] < index["offset"] or stat[2] < mtime:
+        return False
+    if stat[1] == size and stat[2] != mtime:
+        return False  # rewritten without growing; appending always grows it
+    return _ends(file, index["offset"]) == [index["head"], index["tail"]]
+
+@lru_cache(maxsize=4096)
+def _iso_day(value):
+    return datetime.strptime(value, "%Y-%m-%d").date().isoformat()
+
+def _parse_line(line):
+    return dict(zip(FIELDNAMES, next(csv.reader([line.decode("utf-8", errors="replace")]))))
+
+def save_index(index):
+    """Write all of ``index`` to INDEX_FILE, emptying the journal."""
+    # Journal first: a crash in between leaves the older index, which refresh catches up
+    open(JOURNAL_FILE, "wb").close()
+    tmp = INDEX_FILE + ".tmp"
+    with open(tmp, "w") as file:
+        file.write(json.dumps(index))   # one C-encoded string; json.dump is far slower
+    os.replace(tmp, INDEX_FILE)
+    _loaded.update(index=index, snapshot=_snapshot(), journal=0)
+
+def _journal(index, record):
+    """Fold ``record`` into ``index`` and append it to the journal, compacting if due."""
+    _fold(index, record)
+    line = (json.dumps(record) + "\n").encode()
+    if _loaded["journal"] + len(line) > COMPACT_AT:
+        save_index(index)
+        return
+    with open(JOURNAL_FILE, "ab") as journal:
+        journal.write(line)
+    _loaded["journal"] += len(line)
+
+def refresh_index():
+    """
+    Fold the rows appended since the last refresh into the index, and return it.
+    If the CSV changed in any other way (edited by hand, replaced, truncated),
+    the index is rebuilt from scratch.
+    """
+    index = load_index()
+    if not os.path.exists(CSV_FILE):
+        return index
+    with open(CSV_FILE, "rb") as file:
+        st = os.fstat(file.fileno())
+        stat = [st.st_ino, st.st_size, st.st_mtime_ns]
+        if index["offset"]:
+            if stat == index["stat"] and stat[2] + RACY_NS < index["checked"]:
+                return index
+            if not _still_matches(index, file, stat):
+                index = _empty_index()
+        start = offset = index["offset"]
+        rows = []
+        file.seek(offset)
+        for line in file:
+            if not line.endswith(b"\n"):
+                break  # a row still being written
+            row_at, offset = offset, offset + len(line)
+            if row_at == 0:
+                continue  # the header
+            row = _parse_line(line)
+            try:
+                day = _iso_day(row["Date"])
+                hours = float(row["Total Hours"])
+            except (KeyError, ValueError):
+                continue
+            rows.append([row_at, day, row["Event"].strip().lower(), row["Volunteer Name"], hours])
+        head, tail = _ends(file, offset)
+    record = {"from": start, "offset": offset, "stat": stat, "checked": time.time_ns(),
+              "head": head, "tail": tail, "rows": rows}
+    if start:
+        _journal(index, record)
+    else:
+        _fold(index, record)
+        save_index(index)
+    return index
+
+def append_rows(rows):
+    """Append rows to the CSV and fold them into the index."""
+    with open(CSV_FILE, mode='a', newline='', encoding="utf-8") as file:
+        writer = csv.DictWriter(file, fieldnames=FIELDNAMES)
+        writer.writerows(rows)
+    refresh_index()
+
+def find_entries(start_date=None, end_date=None, event=None):
+    """
+    Rows between two YYYY-MM-DD dates (inclusive) and/or for one event,
+    in file order. Reads only the matching rows, by seeking to their offsets.
+    """
+    index = refresh_index()
+    days = sorted(index["dates"])
+    lo = bisect_left(days, start_date) if start_date else 0
+    hi = bisect_right(days, end_date) if end_date else len(days)
+    offsets = {offset for day in days[lo:hi] for offset in index["dates"][day]}
+    if event:
+        offsets &= set(index["events"].get(event.strip().lower(), []))
+    with open(CSV_FILE, "rb") as file:
+        for offset in sorted(offsets):
+            file.seek(offset)
+            yield _parse_line(file.readline())
+
 def log_hours():
     print("\n--- Log Volunteer Hours ---")
     name = input("Volunteer Name: ").strip()
@@ -30,17 +231,15 @@ def log_hours():
         print("❌ Error with date/time format:", e)
         return
 
-    with open(CSV_FILE, mode='a', newline='') as file:
-        writer = csv.DictWriter(file, fieldnames=FIELDNAMES)
-        writer.writerow({
-            "Date": date,
-            "Volunteer Name": name,
-            "Event": event,
-            "Start Time": start,
-            "End Time": end,
-            "Total Hours": total_hours,
-            "Notes": notes
-        })
+    append_rows([{
+        "Date": date,
+        "Volunteer Name": name,
+        "Event": event,
+        "Start Time": start,
+        "End Time": end,
+        "Total Hours": total_hours,
+        "Notes": notes
+    }])
 
     print(f"✅ Logged {total_hours} hours for {name} on {date}.")
 
@@ -67,19 +266,17 @@ def log_hours_bulk():
         print("❌ Error with date/time format:", e)
         return
 
-    with open(CSV_FILE, mode='a', newline='') as file:
-        writer = csv.DictWriter(file, fieldnames=FIELDNAMES)
-        for name in names:
-            writer.writerow({
-                "Date": date,
-                "Volunteer Name": name,
-                "Event": event,
-                "Start Time": start,
-                "End Time": end,
-                "Total Hours": total_hours,
-                "Notes": notes
-            })
-            print(f"✅ Logged {total_hours} hours for {name} on {date}.")
+    append_rows([{
+        "Date": date,
+        "Volunteer Name": name,
+        "Event": event,
+        "Start Time": start,
+        "End Time": end,
+        "Total Hours": total_hours,
+        "Notes": notes
+    } for name in names])
+    for name in names:
+        print(f"✅ Logged {total_hours} hours for {name} on {date}.")
 
 def view_entries():
     print("\n--- All Volunteer Entries ---")
@@ -93,19 +290,26 @@ def view_entries():
 
 def summary():
     print("\n--- Volunteer Summary ---")
-    totals = {}
     if not os.path.exists(CSV_FILE):
         print("No entries yet.")
         return
-    with open(CSV_FILE, newline='') as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            name = row["Volunteer Name"]
-            hours = float(row["Total Hours"])
-            totals[name] = totals.get(name, 0) + hours
-    for name, hours in totals.items():
+    for name, hours in refresh_index()["totals"].items():
         print(f"{name}: {hours:.2f} hours")
 
+def filter_entries():
+    print("\n--- Find Entries ---")
+    start_date = input("From (YYYY-MM-DD) [Leave blank for any]: ").strip()
+    end_date = input("To (YYYY-MM-DD) [Leave blank for any]: ").strip()
+    event = input("Event/Task [Leave blank for any]: ").strip()
+    if not os.path.exists(CSV_FILE):
+        print("No entries yet.")
+        return
+    total = 0
+    for row in find_entries(start_date or None, end_date or None, event or None):
+        print(f"{row['Date']} | {row['Volunteer Name']} | {row['Event']} | {row['Total Hours']} hrs")
+        total += float(row["Total Hours"])
+    print(f"Total: {total:.2f} hours")
+
 def main():
     ensure_csv_exists()
     while True:
@@ -114,7 +318,8 @@ def main():
         print("2. Bulk Log Hours")
         print("3. View All Entries")
         print("4. View Summary")
-        print("5. Exit")
+        print("5. Find Entries by Date Range or Event")
+        print("6. Exit")
         choice = input("Choose an option: ").strip()
         if choice == '1':
             log_hours()
@@ -125,6 +330,8 @@ def main():
         elif choice == '4':
             summary()
         elif choice == '5':
+            filter_entries()
+        elif choice == '6':
             print("👋 Goodbye!")
             break
         else:
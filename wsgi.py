@@ -0,0 +1,13 @@
+# wsgi.py
+"""
+WSGI entry point for production servers::
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+The app is built once at import. Under ``preload_app`` that happens in the
+gunicorn master, and the forked workers share its code and data
+copy-on-write; see gunicorn.conf.py.
+"""
+from app import create_app
+
+app = create_app()